@@ -1,58 +1,301 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from aws_services import AWSServices
+from commands import router
+from jobs import CANCELLED, DONE, JobManager, QueueFullError
+from renderers import FORMATS, render, to_text
+from router import CommandError
+import json
+import logging
 import os
+import queue
+import threading
+import metrics
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+class RequestMetrics:
+    """Middleware WSGI: trace por requisição e tempo total, incluindo o próprio Flask"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        trace, token = metrics.start_trace(f"{environ['REQUEST_METHOD']} {environ.get('PATH_INFO', '')}")
+        status = ['500']
+
+        def capture(status_line, headers, exc_info=None):
+            status[0] = status_line.split(' ', 1)[0]
+            return start_response(status_line, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, capture)
+        finally:
+            # Rota do Flask ('/jobs/<job_id>'), não o caminho, para não explodir a cardinalidade
+            route = environ.get('chatbot.route', 'unmatched')
+            metrics.HTTP_REQUESTS.inc(1, environ['REQUEST_METHOD'], route, status[0])
+            metrics.HTTP_SECONDS.observe(trace.elapsed, environ['REQUEST_METHOD'], route)
+            metrics.finish_trace(trace, token)
+
 app = Flask(__name__)
+app.wsgi_app = RequestMetrics(app.wsgi_app)
 aws_services = AWSServices()
+jobs = JobManager()
+
+metrics.registry.gauge('chatbot_cache_entries', 'Entradas no cache de AWSServices',
+                       lambda: len(aws_services.cache))
+metrics.registry.gauge('chatbot_jobs_pending', 'Tarefas aguardando na fila', lambda: jobs.pending)
+# Coalescência de chamadas AWS idênticas (singleflight.py): líderes executam, os demais aguardam
+metrics.registry.counter_func('chatbot_singleflight_calls_total', 'Chamadas recebidas pelo single-flight',
+                              lambda: aws_services.flight.stats()['calls'])
+metrics.registry.counter_func('chatbot_singleflight_executions_total', 'Chamadas executadas de fato (líderes)',
+                              lambda: aws_services.flight.stats()['executions'])
+metrics.registry.counter_func('chatbot_singleflight_coalesced_total',
+                              'Chamadas que aguardaram uma idêntica em andamento',
+                              lambda: aws_services.flight.stats()['coalesced'])
+metrics.registry.gauge('chatbot_singleflight_in_flight', 'Chamadas únicas em andamento',
+                       lambda: aws_services.flight.stats()['in_flight'])
+
+def warm_up(background=False):
+    """Cria os clientes boto3 e compila os templates antes da primeira requisição
+
+    Nenhuma conexão é aberta. No gunicorn com preload roda no master, antes do
+    fork, e os workers herdam clientes prontos; com background=True roda em uma
+    thread, sem atrasar o /ready. O CostStore (SQLite) continua sendo aberto sob
+    demanda em cada worker.
+    """
+    if background:
+        thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+        thread.start()
+        return thread
+    for service in ('s3', 'ec2', 'ce'):
+        try:
+            aws_services.clients.get(service)
+        except Exception as e:
+            logger.warning("Não foi possível criar o cliente %s: %s", service, e)
+    app.jinja_env.get_template('index.html')
+
+@app.before_request
+def tag_route():
+    request.environ['chatbot.route'] = request.url_rule.rule if request.url_rule else 'unmatched'
+
+@app.after_request
+def server_timing(response):
+    trace = metrics.current_trace()
+    if trace is not None:
+        timings = trace.server_timing()
+        total = f"total;dur={trace.elapsed * 1000:.1f}"
+        response.headers['Server-Timing'] = f"{timings}, {total}" if timings else total
+    return response
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Health check do ALB: não importa o SDK, não chama a AWS nem renderiza templates
+    return jsonify({'status': 'ready', 'aws_clients': len(aws_services.clients)})
+
+# Intervalo (s) entre comentários keep-alive no stream, abaixo do idle timeout do ALB
+STREAM_HEARTBEAT_SECONDS = 15
+# Tempo (s) que /chat aguarda um comando em background antes de devolver o id da tarefa
+CHAT_INLINE_WAIT = float(os.environ.get('CHAT_INLINE_WAIT', '2'))
+
+def handle_message(message, progress=None):
+    """Processa uma mensagem do chat e retorna o resultado, ainda não renderizado
+
+    Compartilhado pela view síncrona, pelo stream SSE e pelo ponto de entrada
+    ASGI (asgi.py). progress(texto, status=False) recebe resultados parciais
+    dos comandos que os produzem.
+    """
+    message = message.strip()
+    
+    if not message:
+        return 'Por favor, digite uma mensagem.'
+    
+    try:
+        return router.dispatch(message, aws_services, progress=progress)
+    except CommandError as e:
+        metrics.ERRORS.inc(1, 'command', 'CommandError')
+        return str(e)
+
+def job_result(job, format='markdown'):
+    """Resposta final de uma tarefa concluída"""
+    if job.status == DONE:
+        result = job.result
+    elif job.status == CANCELLED:
+        result = "🛑 Operação cancelada."
+    else:
+        result = f"Erro: {job.error}"
+    with metrics.span('render'):
+        return render(result, format)
+
+def job_payload(job, format='markdown'):
+    """Estado da tarefa com a resposta renderizada (job.result guarda o registro)"""
+    payload = job.to_dict()
+    payload['result'] = None
+    if job.finished:
+        payload['response'] = job_result(job, format)
+        if job.status == DONE:
+            payload['result'] = payload['response']
+    return payload
+
+def submit_job(message):
+    """Tarefa para comandos marcados como background; None para os demais (levanta QueueFullError)"""
+    key = router.job_key(message.strip())
+    if key is None:
+        return None
+    return jobs.submit(key, lambda job: handle_message(message, progress=job.report),
+                       description=message.strip())
+
+def respond(message, format='markdown'):
+    """Resposta de /chat como (payload, status HTTP)
+
+    Comandos marcados como background viram tarefas: se terminarem em
+    CHAT_INLINE_WAIT segundos a resposta é imediata, senão o cliente recebe
+    202 com o id da tarefa para acompanhar em /jobs/<id>.
+    """
+    try:
+        job = submit_job(message)
+    except QueueFullError as e:
+        return {'response': f"⏳ {e}"}, 503
+    if job is None:
+        result = handle_message(message)
+        with metrics.span('render'):
+            return {'response': render(result, format)}, 200
+    
+    if job.wait(CHAT_INLINE_WAIT):
+        return {'response': job_result(job, format)}, 200
+    return {
+        'response': f"⏳ Operação em andamento. Acompanhe em /jobs/{job.id}",
+        'job_id': job.id,
+        'status': job.status
+    }, 202
+
+def read_message(payload):
+    """Extrai o campo 'message' do corpo JSON; None se o corpo for inválido"""
+    if not isinstance(payload, dict):
+        return None
+    message = payload.get('message', '')
+    return message if isinstance(message, str) else None
+
+def read_format(payload):
+    """Extrai o campo opcional 'format' (markdown, text ou json); None se for inválido"""
+    format = payload.get('format') if isinstance(payload, dict) else None
+    if format is None:
+        return 'markdown'
+    return format if format in FORMATS else None
+
+INVALID_FORMAT = f'Formato inválido: use {", ".join(FORMATS)}.'
+
 @app.route('/chat', methods=['POST'])
 def chat():
-    try:
-        message = request.json.get('message', '').lower().strip()
-        
-        if not message:
-            return jsonify({'response': 'Por favor, digite uma mensagem.'})
-        
-        # Processar comandos
-        if 'custos' in message:
-            response = aws_services.get_cost_estimate()
-        elif 's3 buckets' in message:
-            response = aws_services.list_s3_buckets()
-        elif 's3 arquivos' in message:
-            bucket_name = message.replace('s3 arquivos', '').strip()
-            if bucket_name:
-                response = aws_services.count_s3_objects(bucket_name)
-            else:
-                response = "Por favor, especifique o nome do bucket. Exemplo: 's3 arquivos meu-bucket'"
-        elif 'ec2 instancias' in message or 'ec2 instâncias' in message:
-            response = aws_services.list_ec2_instances()
-        elif 'ajuda' in message or 'help' in message:
-            response = """
-            🤖 **Comandos disponíveis:**
-            
-            • `custos` - Estimativa de custos da conta
-            • `s3 buckets` - Lista todos os buckets S3
-            • `s3 arquivos nome-do-bucket` - Conta arquivos em um bucket
-            • `ec2 instancias` - Lista instâncias EC2
-            • `ajuda` - Mostra esta mensagem
-            
-            📊 **Projeto TDC 2025 Q Developer Quest**
-            Todas as 4 etapas concluídas! ✅
-            """
-        else:
-            response = "Comando não reconhecido. Digite 'ajuda' para ver os comandos disponíveis."
-        
-        return jsonify({'response': response})
+    body = request.get_json(silent=True)
+    message = read_message(body)
+    if message is None:
+        return jsonify({'response': 'Requisição inválida: envie um JSON com o campo "message".'}), 400
+    format = read_format(body)
+    if format is None:
+        return jsonify({'response': INVALID_FORMAT}), 400
     
+    try:
+        payload, status = respond(message, format)
     except Exception as e:
+        logger.exception("Erro ao processar /chat")
+        metrics.ERRORS.inc(1, 'chat', type(e).__name__)
         return jsonify({'response': f'Erro: {str(e)}'})
+    
+    headers = {'Retry-After': '1'} if status == 503 else {}
+    with metrics.span('serialize'):
+        return jsonify(payload), status, headers
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Tarefa não encontrada.'}), 404
+    format = read_format({'format': request.args.get('format')})
+    if format is None:
+        return jsonify({'error': INVALID_FORMAT}), 400
+    return jsonify(job_payload(job, format))
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Tarefa não encontrada.'}), 404
+    return jsonify(job_payload(job)), 202
+
+# Sem cache nem buffering em proxies: cada evento chega ao navegador assim que é gerado
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def sse_event(event, data):
+    """Formata um evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_message(message, format='markdown', job=None):
+    """Gera eventos SSE: start imediato, parciais (status/partial) e o resultado final
+
+    Comandos em background chegam como job (JobManager): o progresso vem de
+    job.report e, se o cliente desconectar antes do fim, a tarefa é cancelada
+    quando ninguém mais a aguarda. Os demais rodam na própria requisição, como
+    em /chat.
+    """
+    # O primeiro byte sai antes de qualquer chamada AWS
+    yield sse_event('start', {'message': message})
+    if job is None:
+        try:
+            result = handle_message(message)
+            yield sse_event('result', {'response': render(result, format)})
+        except Exception as e:
+            logger.exception("Erro ao processar /chat/stream")
+            metrics.ERRORS.inc(1, 'stream', type(e).__name__)
+            yield sse_event('result', {'response': f'Erro: {str(e)}'})
+        return
+    
+    events = job.subscribe()
+    try:
+        while True:
+            try:
+                item = events.get(timeout=STREAM_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            kind, text = item
+            # Parciais são linhas de markdown: nos outros formatos seguem como texto simples
+            yield sse_event(kind, {'text': text if format == 'markdown' else to_text(text)})
+        yield sse_event('result', {'response': job_result(job, format)})
+    finally:
+        job.unsubscribe(events)
+        if not job.finished:
+            # GeneratorExit: o cliente desconectou no meio do stream
+            jobs.release(job.id)
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    body = request.get_json(silent=True)
+    message = read_message(body)
+    if message is None:
+        return jsonify({'response': 'Requisição inválida: envie um JSON com o campo "message".'}), 400
+    format = read_format(body)
+    if format is None:
+        return jsonify({'response': INVALID_FORMAT}), 400
+    
+    try:
+        job = submit_job(message)
+    except QueueFullError as e:
+        return jsonify({'response': f"⏳ {e}"}), 503, {'Retry-After': '1'}
+    
+    return Response(stream_message(message, format, job), mimetype='text/event-stream', headers=STREAM_HEADERS)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
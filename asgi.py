@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Ponto de entrada ASGI para o AWS Chatbot
+POST /chat e POST /chat/stream são atendidos de forma assíncrona; as chamadas
+boto3 e os passos do stream rodam em executores limitados e não prendem o
+processo. As demais rotas (rápidas) são delegadas ao app Flask (app.py).
+
+Executar: uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app as chat_app
+import metrics
+from jobs import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+# Requisições /chat em andamento por processo; acima disso a requisição espera na fila
+CHAT_MAX_CONCURRENCY = int(os.environ.get('CHAT_MAX_CONCURRENCY', '64'))
+# Tempo máximo (s) na fila antes de responder 503
+CHAT_QUEUE_TIMEOUT = float(os.environ.get('CHAT_QUEUE_TIMEOUT', '10'))
+# Threads para chamadas boto3 bloqueantes
+AWS_EXECUTOR_WORKERS = int(os.environ.get('AWS_EXECUTOR_WORKERS', '16'))
+# Threads para streams /chat/stream simultâneos (cada um ocupa uma enquanto aguarda o próximo evento)
+STREAM_EXECUTOR_WORKERS = int(os.environ.get('STREAM_EXECUTOR_WORKERS', '32'))
+# Tamanho máximo do corpo de /chat em bytes
+MAX_BODY_BYTES = 64 * 1024
+
+class ChatASGIApp:
+    """Aplicação ASGI: /chat e /chat/stream assíncronos, resto via Flask
+
+    O WsgiToAsgi atende todas as rotas delegadas em uma única thread; um stream
+    longo servido por ele atrasaria o /ready e o acompanhamento de tarefas.
+    """
+
+    def __init__(self, wsgi_app, max_concurrency=CHAT_MAX_CONCURRENCY,
+                 executor_workers=AWS_EXECUTOR_WORKERS, queue_timeout=CHAT_QUEUE_TIMEOUT,
+                 stream_workers=STREAM_EXECUTOR_WORKERS):
+        self.fallback = WsgiToAsgi(wsgi_app)
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix='aws-call')
+        self.stream_executor = ThreadPoolExecutor(max_workers=stream_workers, thread_name_prefix='chat-stream')
+        self._semaphore = None
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['path'] == '/chat' and scope['method'] == 'POST':
+            await self._traced('/chat', self._chat, receive, send)
+        elif scope['type'] == 'http' and scope['path'] == '/chat/stream' and scope['method'] == 'POST':
+            await self._traced('/chat/stream', self._chat_stream, receive, send)
+        else:
+            await self.fallback(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                self.stream_executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _traced(self, route, handler, receive, send):
+        trace, token = metrics.start_trace(f'POST {route}')
+        status = 500
+        try:
+            status = await handler(receive, send)
+        finally:
+            metrics.HTTP_REQUESTS.inc(1, 'POST', route, str(status))
+            metrics.HTTP_SECONDS.observe(trace.elapsed, 'POST', route)
+            metrics.finish_trace(trace, token)
+
+    async def _read_request(self, receive, send):
+        """(mensagem, formato) do corpo JSON; None depois de responder 400"""
+        body = await self._read_body(receive)
+        try:
+            payload = json.loads(body) if body is not None else None
+        except ValueError:
+            payload = None
+        message = chat_app.read_message(payload)
+        if message is None:
+            await self._send_json(send, 400, {'response': 'Requisição inválida: envie um JSON com o campo "message".'})
+            return None
+        format = chat_app.read_format(payload)
+        if format is None:
+            await self._send_json(send, 400, {'response': chat_app.INVALID_FORMAT})
+            return None
+        return message, format
+
+    async def _chat(self, receive, send):
+        # O semáforo precisa ser criado dentro do loop em execução
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        request = await self._read_request(receive, send)
+        if request is None:
+            return 400
+        message, format = request
+
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return await self._send_json(send, 503, {'response': 'Servidor ocupado. Tente novamente em instantes.'},
+                                         headers=[(b'retry-after', b'1')])
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # O executor não herda o contexto: copiá-lo leva o trace da requisição junto
+            context = contextvars.copy_context()
+            payload, status = await loop.run_in_executor(self.executor, context.run, chat_app.respond, message,
+                                                         format)
+            headers = [(b'retry-after', b'1')] if status == 503 else []
+            return await self._send_json(send, status, payload, headers=headers)
+        except Exception as e:
+            logger.exception("Erro ao processar /chat")
+            metrics.ERRORS.inc(1, 'chat', type(e).__name__)
+            return await self._send_json(send, 200, {'response': f'Erro: {str(e)}'})
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def _chat_stream(self, receive, send):
+        """SSE de /chat/stream: os eventos de app.stream_message saem assim que ficam prontos
+
+        O gerador avança um passo por vez no executor de streams, então o loop
+        continua livre enquanto ele aguarda a AWS ou o progresso da tarefa. Se o
+        cliente desconectar, o gerador é fechado e a tarefa, liberada.
+        """
+        request = await self._read_request(receive, send)
+        if request is None:
+            return 400
+        message, format = request
+        try:
+            job = chat_app.submit_job(message)
+        except QueueFullError as e:
+            return await self._send_json(send, 503, {'response': f"⏳ {e}"}, headers=[(b'retry-after', b'1')])
+
+        headers = [(b'content-type', b'text/event-stream; charset=utf-8')]
+        headers += [(name.lower().encode(), value.encode()) for name, value in chat_app.STREAM_HEADERS.items()]
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        events = chat_app.stream_message(message, format, job)
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        step = None
+        try:
+            while True:
+                step = loop.run_in_executor(self.stream_executor, context.run, next, events, None)
+                await asyncio.wait({step, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not step.done():
+                    break
+                chunk = step.result()
+                if chunk is None:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    break
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+        except OSError:
+            # Cliente desconectou durante o envio
+            pass
+        finally:
+            disconnected.cancel()
+            if step is not None and not step.done():
+                # Um gerador em execução não pode ser fechado: o passo atual termina no próximo
+                # evento ou keep-alive (STREAM_HEARTBEAT_SECONDS), como no stream do Flask
+                await asyncio.wait({step})
+            await loop.run_in_executor(self.stream_executor, context.run, events.close)
+        return 200
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def _read_body(self, receive):
+        """Lê o corpo completo; None se exceder MAX_BODY_BYTES"""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def _send_json(self, send, status, payload, headers=()):
+        """Envia a resposta JSON (com Server-Timing do trace atual) e retorna o status"""
+        with metrics.span('serialize'):
+            body = json.dumps(payload).encode('utf-8')
+        headers = [(b'content-type', b'application/json'),
+                   (b'content-length', str(len(body)).encode())] + list(headers)
+        trace = metrics.current_trace()
+        if trace is not None and trace.phases:
+            headers.append((b'server-timing', trace.server_timing().encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+        return status
+
+application = ChatASGIApp(chat_app.app)
+metrics.registry.gauge('chatbot_asgi_in_flight', 'Requisições /chat em andamento no processo ASGI',
+                       lambda: application.in_flight)
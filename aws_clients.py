@@ -0,0 +1,70 @@
+"""
+Fábrica de clientes boto3 compartilhados, configurados e criados sob demanda
+
+boto3 só é importado na criação do primeiro cliente real: importar o app
+(e responder / ou /ready) não paga os ~250ms de importação do SDK.
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from metrics import instrument_client
+
+if TYPE_CHECKING:
+    from botocore.config import Config
+
+def default_config() -> 'Config':
+    """Configuração padrão dos clientes, ajustável por variáveis de ambiente"""
+    from botocore.config import Config
+
+    return Config(
+        # Deve cobrir o maior número de threads que usam o mesmo cliente (ex.: S3_LIST_MAX_WORKERS)
+        max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '50')),
+        connect_timeout=float(os.environ.get('AWS_CONNECT_TIMEOUT', '5')),
+        read_timeout=float(os.environ.get('AWS_READ_TIMEOUT', '30')),
+        retries={
+            'mode': os.environ.get('AWS_RETRY_MODE', 'adaptive'),
+            'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '5'))
+        },
+        tcp_keepalive=True
+    )
+
+class ClientPool:
+    """Um cliente boto3 por (serviço, região), criado no primeiro uso e reutilizado
+
+    Clientes boto3 são thread-safe e mantêm seu próprio pool de conexões HTTP,
+    então reutilizá-los evita novos handshakes TLS. A criação, por outro lado,
+    não é thread-safe (a Session compartilhada), por isso é serializada.
+    """
+
+    def __init__(self, config: Optional['Config'] = None,
+                 factory: Optional[Callable[[str, Optional[str]], Any]] = None):
+        self.config = config
+        self._factory = factory or self._create
+        self._session = None
+        self._clients: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._lock = threading.Lock()
+
+    def _create(self, service: str, region: Optional[str]):
+        if self._session is None:
+            import boto3
+
+            self._session = boto3.session.Session()
+            self.config = self.config or default_config()
+        return self._session.client(service, region_name=region, config=self.config)
+
+    def get(self, service: str, region: Optional[str] = None):
+        """Retorna o cliente do serviço na região (None = região padrão)"""
+        key = (service, region)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = instrument_client(self._factory(service, region))
+                    self._clients[key] = client
+        return client
+
+    def __len__(self):
+        return len(self._clients)
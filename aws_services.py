@@ -1,104 +1,514 @@
-import boto3
+import logging
+import os
+import threading
+import time
+from functools import partial
 from datetime import datetime, timedelta
 from botocore.exceptions import ClientError, NoCredentialsError
+from aws_clients import ClientPool
+from cache_backends import CacheEntry, MemoryBackend, backend_from_env
+from cost_store import CostStore
+from ec2_inventory import InventoryError, collect_inventory, list_enabled_regions
+from metrics import CACHE_REQUESTS, ERRORS, instrument_methods
+from listing import BUCKET_ORDERS, INSTANCE_ORDERS, InstanceFilter, select_page
+from results import (Bucket, BucketPage, CostAnomalies, CostBreakdown, CostEstimate, CostForecast, CostShare,
+                     DailyCost, DailyCosts, Failure, InstancePage, Notice)
+from singleflight import SingleFlight
+from s3_inventory import count_objects, count_objects_parallel
 
+logger = logging.getLogger(__name__)
+
+# Políticas de cache por operação: (TTL fresco, janela extra servida como stale) em segundos.
+# Cost Explorer cobra $0.01 por requisição e os dados mudam poucas vezes ao dia.
+CACHE_POLICIES = {
+    'get_cost_table': (3600, 6 * 3600),
+    'list_s3_buckets': (300, 900),
+    'list_ec2_instances': (60, 240),
+}
+
+# Trava de recarga no cache compartilhado: validade (cobre a carga mais lenta) e
+# quanto uma task espera pelo valor de outra antes de carregar por conta própria
+CACHE_LOCK_SECONDS = float(os.environ.get('CACHE_LOCK_SECONDS', '120'))
+CACHE_LOCK_WAIT = float(os.environ.get('CACHE_LOCK_WAIT', '30'))
+# Incrementar quando mudar a estrutura dos valores em cache (CostTable, EC2Inventory...)
+CACHE_FORMAT_VERSION = 4
+# Após uma falha, o cache compartilhado é ignorado por esse tempo (só o local é usado)
+CACHE_SHARED_RETRY_SECONDS = int(os.environ.get('CACHE_SHARED_RETRY_SECONDS', '30'))
+
+# Inventário EC2 com regiões em falha: fica em cache só por esse tempo, sem stale
+CACHE_PARTIAL_TTL = int(os.environ.get('CACHE_PARTIAL_TTL', '15'))
+
+# Dias de histórico diário mantidos no CostStore para as consultas locais (custos top, por região...)
+COST_TABLE_DAYS = int(os.environ.get('COST_TABLE_DAYS', '365'))
+# Janelas sincronizadas sob demanda: cada consulta usa a menor que cobre os dias pedidos,
+# então um processo novo não baixa COST_TABLE_DAYS dias dentro da requisição
+COST_TABLE_WINDOWS = tuple(sorted({min(days, COST_TABLE_DAYS) for days in (30, 90, COST_TABLE_DAYS)}))
+# Histórico usado pela previsão e pelas anomalias (média de 28 dias e efeito do dia da semana)
+COST_ANALYSIS_DAYS = 90
+# Dias de linha de base antes de cada dia avaliado por custos anomalias
+COST_ANOMALY_WINDOW = 28
+# 1 = após a primeira sincronização, completa em background os COST_TABLE_DAYS dias,
+# em blocos: uma requisição espera no máximo um bloco
+COST_BACKFILL = os.environ.get('COST_BACKFILL', '0') == '1'
+COST_BACKFILL_CHUNK_DAYS = 90
+
+class TTLCache:
+    """Cache LRU limitado com TTL por entrada e stale-while-revalidate
+
+    Com um backend compartilhado (cache_backends.py), misses locais consultam o
+    backend antes do loader e cada recarga acontece sob uma trava distribuída,
+    então só uma task por vez vai à AWS para a mesma chave. O relógio padrão é
+    o de parede, comum a todas as tasks.
+    """
+    
+    def __init__(self, max_entries=256, clock=time.time, flight=None, shared=None, namespace='',
+                 lock_ttl=CACHE_LOCK_SECONDS, lock_wait=CACHE_LOCK_WAIT):
+        self._clock = clock
+        self.local = MemoryBackend(max_entries, clock)
+        self.shared = shared
+        # Prefixo das chaves no backend; uma função é resolvida no primeiro uso (conta/região)
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self.poll_interval = 0.05
+        self._shared_down_until = 0.0
+        self._lock = threading.Lock()
+        # Misses simultâneos da mesma chave compartilham uma única chamada AWS
+        self.flight = flight if flight is not None else SingleFlight()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+    
+    @property
+    def max_entries(self):
+        return self.local.max_entries
+    
+    def __len__(self):
+        return len(self.local)
+    
+    def _state(self, entry):
+        if entry is None:
+            return 'miss'
+        return 'fresh' if self._clock() < entry.fresh_until else 'stale'
+    
+    def _lookup(self, key):
+        """Retorna (valor, estado) onde estado é 'fresh', 'shared', 'stale' ou 'miss'"""
+        entry = self.local.get(key)
+        state = self._state(entry)
+        if state != 'fresh' and self.shared is not None:
+            shared_entry = self._shared_call('get', key)
+            if shared_entry is not None and (entry is None or shared_entry.loaded_at > entry.loaded_at):
+                # Outra task carregou (ou recarregou) a chave: a cópia local passa a ser essa
+                self.local.set(key, shared_entry)
+                entry = shared_entry
+                state = 'shared' if self._state(entry) == 'fresh' else 'stale'
+        return (entry.value if entry is not None else None), state
+    
+    def set(self, key, value, ttl, stale_ttl=0):
+        """Armazena um valor, removendo as entradas menos usadas acima do limite"""
+        now = self._clock()
+        entry = CacheEntry(value, now + ttl, now + ttl + stale_ttl, now)
+        self.local.set(key, entry)
+        if self.shared is not None:
+            self._shared_call('set', key, entry)
+    
+    def invalidate(self, key=None):
+        """Remove uma chave ou, sem argumento, todo o cache (também no backend compartilhado)"""
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.delete(key)
+        if self.shared is not None:
+            self._shared_call('delete' if key is not None else 'clear', key)
+    
+    def get_or_load(self, key, loader, ttl, stale_ttl=0, fresh=False, policy=None, refresh_loader=None):
+        """Obtém do cache ou executa loader(); fresh=True ignora o valor em cache
+
+        policy(valor), se dado, pode retornar (ttl, stale_ttl) para substituir a
+        validade conforme o valor carregado (ex.: resultados parciais).
+        refresh_loader, se dado, substitui loader na recarga em background, que
+        continua depois que a requisição terminou (sem callbacks dela).
+        """
+        # As chaves de AWSServices começam pelo nome da operação
+        operation = key[0] if isinstance(key, tuple) else str(key)
+        if not fresh:
+            value, state = self._lookup(key)
+            CACHE_REQUESTS.inc(1, operation, state)
+            if state == 'fresh':
+                self.hits += 1
+                return value
+            if state == 'shared':
+                self.shared_hits += 1
+                return value
+            if state == 'stale':
+                self.stale_hits += 1
+                self._refresh_in_background(key, refresh_loader or loader, ttl, stale_ttl, policy)
+                return value
+        else:
+            CACHE_REQUESTS.inc(1, operation, 'bypass')
+        
+        self.misses += 1
+        since = self._clock() if fresh else None
+        return self.flight.do(key, lambda: self._load(key, loader, ttl, stale_ttl, since=since, policy=policy))
+    
+    def _load(self, key, loader, ttl, stale_ttl, since=None, background=False, policy=None):
+        """Executa loader() e armazena; com backend compartilhado, sob a trava da chave
+
+        Quem não obtém a trava aguarda o valor gravado pela task que a detém (uma
+        recarga em background simplesmente desiste). since exige um valor
+        carregado depois desse instante (fresh=True).
+        """
+        token = None
+        if self.shared is not None:
+            deadline = time.monotonic() + self.lock_wait
+            while True:
+                token = self._shared_call('acquire', key, self.lock_ttl)
+                entry = self._shared_call('get', key)
+                if entry is not None and self._state(entry) == 'fresh' and (since is None or entry.loaded_at >= since):
+                    if token is not None:
+                        self._shared_call('release', key, token)
+                    self.local.set(key, entry)
+                    return entry.value
+                if token is not None or self._shared_unavailable():
+                    break
+                if background:
+                    return None
+                if time.monotonic() >= deadline:
+                    logger.warning("Trava de cache ocupada há mais de %.0fs, carregando sem ela: %s",
+                                   self.lock_wait, key)
+                    break
+                time.sleep(self.poll_interval)
+        try:
+            value = loader()
+            self.set(key, value, *((policy and policy(value)) or (ttl, stale_ttl)))
+            return value
+        finally:
+            if token is not None:
+                self._shared_call('release', key, token)
+    
+    def _refresh_in_background(self, key, loader, ttl, stale_ttl, policy=None):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                # Chave própria: quem pede o valor (fresh=True ou miss) não herda o None de uma
+                # recarga que desistiu porque outra task detém a trava
+                self.flight.do(('refresh', key), lambda: self._load(key, loader, ttl, stale_ttl, background=True,
+                                                          policy=policy))
+            except Exception:
+                # Mantém o valor stale; a próxima leitura tenta novamente
+                logger.exception("Falha ao atualizar cache em background: %s", key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        
+        threading.Thread(target=refresh, name=f"cache-refresh-{key[0]}", daemon=True).start()
+    
+    def shared_key(self, key):
+        """Chave no backend compartilhado: namespace + partes da chave local"""
+        namespace = self.namespace() if callable(self.namespace) else self.namespace
+        parts = key if isinstance(key, tuple) else (key,)
+        return ':'.join([namespace] + [str(part) for part in parts])
+    
+    def _shared_unavailable(self):
+        return time.monotonic() < self._shared_down_until
+    
+    def _shared_call(self, method, key, *args):
+        """Operação no backend compartilhado; falhas viram miss e o desligam por um tempo"""
+        if self._shared_unavailable():
+            return None
+        try:
+            if method == 'clear':
+                namespace = self.namespace() if callable(self.namespace) else self.namespace
+                return self.shared.clear(namespace + ':')
+            name = self.shared_key(key)
+            if method in ('acquire', 'release'):
+                name += ':lock'
+            return getattr(self.shared, method)(name, *args)
+        except Exception as e:
+            ERRORS.inc(1, 'cache', type(e).__name__)
+            logger.warning("Cache compartilhado indisponível por %ds (%s): %s", CACHE_SHARED_RETRY_SECONDS, method, e)
+            self._shared_down_until = time.monotonic() + CACHE_SHARED_RETRY_SECONDS
+            return None
+
+@instrument_methods('services')
 class AWSServices:
-    def __init__(self):
+    """Consultas do chatbot; os comandos retornam registros (results.py) e renderers.py os formata"""
+    
+    def __init__(self, cache_max_entries=256, cache_policies=None, clients=None, cost_store=None, cache_backend=None,
+                 cost_backfill=None):
+        # Clientes são criados no primeiro uso de cada serviço
+        self.clients = clients if clients is not None else ClientPool()
+        self.cost_store = cost_store if cost_store is not None else CostStore()
+        self.cost_backfill = COST_BACKFILL if cost_backfill is None else cost_backfill
+        self._backfill_lock = threading.Lock()
+        self._backfilling = False
+        # Compartilhado entre o cache e as operações não cacheadas, para métricas únicas
+        self.flight = SingleFlight()
+        self._namespace = None
+        self.cache = TTLCache(max_entries=cache_max_entries, flight=self.flight,
+                              shared=cache_backend if cache_backend is not None else backend_from_env(),
+                              namespace=self._cache_namespace)
+        self.cache_policies = dict(CACHE_POLICIES, **(cache_policies or {}))
+    
+    def _cache_namespace(self):
+        """Prefixo das chaves no cache compartilhado: formato, conta e região"""
+        if self._namespace is None:
+            account = os.environ.get('AWS_ACCOUNT_ID') or self._client('sts').get_caller_identity()['Account']
+            self._namespace = f"chatbot:v{CACHE_FORMAT_VERSION}:{account}:{self.ec2_client.meta.region_name}"
+        return self._namespace
+    
+    def _client(self, service, region=None):
         try:
-            self.s3_client = boto3.client('s3')
-            self.ec2_client = boto3.client('ec2')
-            self.ce_client = boto3.client('ce')
+            return self.clients.get(service, region)
         except NoCredentialsError:
             raise Exception("Credenciais AWS não configuradas. Configure suas credenciais AWS.")
     
-    def get_cost_estimate(self):
+    @property
+    def s3_client(self):
+        return self._client('s3')
+    
+    @property
+    def ec2_client(self):
+        return self._client('ec2')
+    
+    @property
+    def ce_client(self):
+        return self._client('ce')
+    
+    def _ec2_client_for(self, region):
+        """Cliente EC2 da região, reutilizando o cliente padrão na região de origem"""
+        if region == self.ec2_client.meta.region_name:
+            return self.ec2_client
+        return self._client('ec2', region)
+    
+    def _ec2_regions(self):
+        """Regiões a consultar: EC2_REGIONS (separadas por vírgula) ou todas as habilitadas"""
+        configured = os.environ.get('EC2_REGIONS')
+        if configured:
+            return [region.strip() for region in configured.split(',') if region.strip()]
         try:
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=30)
-            
-            response = self.ce_client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date.strftime('%Y-%m-%d'),
-                    'End': end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='MONTHLY',
-                Metrics=['BlendedCost']
-            )
-            
-            if response['ResultsByTime']:
-                amount = response['ResultsByTime'][0]['Total']['BlendedCost']['Amount']
-                currency = response['ResultsByTime'][0]['Total']['BlendedCost']['Unit']
-                return f"💰 **Custos dos últimos 30 dias:** {currency} ${float(amount):.2f}"
-            else:
-                return "📊 Não foi possível obter informações de custo no momento."
-                
+            regions = list_enabled_regions(self.ec2_client)
         except ClientError as e:
-            return f"❌ Erro ao obter custos: {e.response['Error']['Message']}"
+            logger.warning("Não foi possível listar regiões, usando apenas a padrão: %s", e)
+            regions = []
+        return regions or [self.ec2_client.meta.region_name]
+    
+    def _cached(self, operation, loader, *args, fresh=False, policy=None, refresh_loader=None):
+        """Executa loader(*args) através do cache com a política da operação"""
+        ttl, stale_ttl = self.cache_policies[operation]
+        return self.cache.get_or_load(
+            (operation,) + args, lambda: loader(*args), ttl, stale_ttl, fresh=fresh, policy=policy,
+            refresh_loader=refresh_loader and (lambda: refresh_loader(*args))
+        )
+    
+    def get_cost_estimate(self, fresh=False):
+        try:
+            table = self.get_cost_table(days=30, fresh=fresh)
+        except ClientError as e:
+            return Failure(f"Erro ao obter custos: {e.response['Error']['Message']}")
         except Exception as e:
-            return f"❌ Erro inesperado: {str(e)}"
+            return Failure(f"Erro inesperado: {str(e)}")
+        
+        if not len(table):
+            return Notice("Não foi possível obter informações de custo no momento.", '📊')
+        return CostEstimate(table.total(days=30), table.currency, days=30)
     
-    def list_s3_buckets(self):
+    def get_cost_table(self, days=COST_TABLE_DAYS, fresh=False):
+        """Tabela de custos diários cobrindo ao menos os últimos `days` dias (levanta erros AWS)
+
+        A tabela tem a menor janela de COST_TABLE_WINDOWS que cobre `days`; cada
+        janela fica em cache separadamente.
+        """
+        window = next((size for size in COST_TABLE_WINDOWS if size >= days), COST_TABLE_WINDOWS[-1])
+        return self._cached('get_cost_table', self._fetch_cost_table, window, fresh=fresh)
+    
+    def _fetch_cost_table(self, days=COST_TABLE_DAYS):
+        # Só os dias ausentes e os ainda mutáveis da janela vão ao Cost Explorer; o resto vem do disco
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days)
+        self.cost_store.sync(self.ce_client, start_date, end_date, today=end_date)
+        if self.cost_backfill and days < COST_TABLE_DAYS:
+            self._backfill_cost_history(end_date - timedelta(days=COST_TABLE_DAYS), start_date)
+        return self.cost_store.load(start_date, end_date)
+    
+    def _backfill_cost_history(self, start_date, end_date):
+        """Sincroniza [start_date, end_date) em uma thread, fora da requisição; uma por vez"""
+        with self._backfill_lock:
+            if self._backfilling:
+                return None
+            self._backfilling = True
+        
+        def backfill():
+            try:
+                fetched = 0
+                # Do mais recente para o mais antigo: as janelas maiores ficam prontas primeiro
+                chunk_end = end_date
+                while chunk_end > start_date:
+                    chunk_start = max(start_date, chunk_end - timedelta(days=COST_BACKFILL_CHUNK_DAYS))
+                    fetched += self.cost_store.sync(self.ce_client, chunk_start, chunk_end, today=end_date)
+                    chunk_end = chunk_start
+                if fetched:
+                    logger.info("Histórico de custos completado em background: %d dia(s)", fetched)
+            except Exception:
+                # A próxima sincronização tenta de novo
+                logger.exception("Falha ao completar o histórico de custos")
+            finally:
+                with self._backfill_lock:
+                    self._backfilling = False
+        
+        thread = threading.Thread(target=backfill, name='cost-backfill', daemon=True)
+        thread.start()
+        return thread
+    
+    def cost_breakdown(self, dimension, days=30, top=None, fresh=False):
+        """Custo por serviço, região ou conta, agregado localmente"""
         try:
-            response = self.s3_client.list_buckets()
-            buckets = response['Buckets']
-            
-            if not buckets:
-                return "📦 Nenhum bucket S3 encontrado."
-            
-            bucket_list = "🗂️ **Seus buckets S3:**\n\n"
-            for bucket in buckets:
-                bucket_list += f"• {bucket['Name']} (criado em {bucket['CreationDate'].strftime('%d/%m/%Y')})\n"
-            
-            return bucket_list
-            
+            table = self.get_cost_table(days=days, fresh=fresh)
         except ClientError as e:
-            return f"❌ Erro ao listar buckets: {e.response['Error']['Message']}"
+            return Failure(f"Erro ao obter custos: {e.response['Error']['Message']}")
         except Exception as e:
-            return f"❌ Erro inesperado: {str(e)}"
+            return Failure(f"Erro inesperado: {str(e)}")
+        
+        days = min(days, table.num_days)
+        items = [CostShare(name, amount) for name, amount in table.totals_by(dimension, days=days)]
+        return CostBreakdown(dimension, days, table.currency, items, top=top)
     
-    def count_s3_objects(self, bucket_name):
+    def daily_costs(self, days=7, fresh=False):
+        """Custo total de cada um dos últimos dias, agregado localmente"""
         try:
-            response = self.s3_client.list_objects_v2(Bucket=bucket_name)
-            
-            if 'Contents' in response:
-                count = len(response['Contents'])
-                return f"📁 **Bucket '{bucket_name}':** {count} arquivo(s) encontrado(s)"
-            else:
-                return f"📁 **Bucket '{bucket_name}':** Vazio (0 arquivos)"
-                
+            table = self.get_cost_table(days=days, fresh=fresh)
+        except ClientError as e:
+            return Failure(f"Erro ao obter custos: {e.response['Error']['Message']}")
+        except Exception as e:
+            return Failure(f"Erro inesperado: {str(e)}")
+        
+        return DailyCosts(table.currency, [DailyCost(day, amount) for day, amount in table.daily_totals(days=days)])
+    
+    def cost_forecast(self, days=30, method='holt', fresh=False):
+        """Previsão de custo dos próximos dias por serviço"""
+        try:
+            table = self.get_cost_table(days=COST_ANALYSIS_DAYS, fresh=fresh)
+        except ClientError as e:
+            return Failure(f"Erro ao obter custos: {e.response['Error']['Message']}")
+        except Exception as e:
+            return Failure(f"Erro inesperado: {str(e)}")
+        
+        # NumPy só é importado na primeira previsão
+        from cost_forecast import FORECASTERS, rolling_mean, series_matrix
+        
+        labels, matrix = series_matrix(table, by=('service',))
+        if not labels or table.num_days < 7:
+            return Notice("Histórico de custos insuficiente para uma previsão.", '📊')
+        
+        forecast = FORECASTERS[method](matrix, days)
+        by_service = forecast.sum(axis=1)
+        current = float(rolling_mean(matrix, 7)[:, -1].sum())
+        ranked = sorted(range(len(labels)), key=lambda index: (-by_service[index], labels[index]))
+        services = [CostShare(labels[index], float(by_service[index])) for index in ranked if by_service[index] > 0]
+        return CostForecast(days, method, table.currency, float(by_service.sum()), current, services)
+    
+    def cost_anomalies(self, days=7, fresh=False, top=10):
+        """Dias com custo anormal por serviço e região"""
+        try:
+            table = self.get_cost_table(days=max(days + COST_ANOMALY_WINDOW, COST_ANALYSIS_DAYS), fresh=fresh)
+        except ClientError as e:
+            return Failure(f"Erro ao obter custos: {e.response['Error']['Message']}")
+        except Exception as e:
+            return Failure(f"Erro inesperado: {str(e)}")
+        
+        from cost_forecast import detect_anomalies, series_matrix
+        
+        labels, matrix = series_matrix(table)
+        anomalies = detect_anomalies(labels, matrix, table.start, window=COST_ANOMALY_WINDOW, days=days)
+        return CostAnomalies(days, table.currency, anomalies, top=top)
+    
+    def list_s3_buckets(self, prefix='', order='nome', cursor=None, page=1, size=None, fresh=False):
+        """Uma página dos buckets cujo nome começa com prefix, sobre a listagem em cache"""
+        try:
+            buckets = self.get_s3_buckets(fresh=fresh)
+        except ClientError as e:
+            return Failure(f"Erro ao listar buckets: {e.response['Error']['Message']}")
+        except Exception as e:
+            return Failure(f"Erro inesperado: {str(e)}")
+        
+        matching = [Bucket(bucket['Name'], bucket['CreationDate']) for bucket in buckets
+                    if bucket['Name'].startswith(prefix)]
+        try:
+            return BucketPage(select_page(matching, order, BUCKET_ORDERS, size, cursor, page), prefix)
+        except ValueError as e:
+            return Failure(str(e))
+    
+    def get_s3_buckets(self, fresh=False):
+        """Buckets S3 como retornados por list_buckets (levanta erros AWS)"""
+        return self._cached('list_s3_buckets', self._fetch_s3_buckets, fresh=fresh)
+    
+    def _fetch_s3_buckets(self):
+        return self.s3_client.list_buckets()['Buckets']
+    
+    def count_s3_objects(self, bucket_name, prefix=None, progress=None, parallel=False, max_workers=None):
+        def count():
+            if parallel:
+                return count_objects_parallel(self.s3_client, bucket_name, prefix=prefix,
+                                              max_workers=max_workers, progress=progress)
+            return count_objects(self.s3_client, bucket_name, prefix=prefix, progress=progress)
+        
+        try:
+            # Contagens simultâneas do mesmo bucket/prefixo compartilham a listagem;
+            # só quem iniciou a contagem recebe o progresso
+            return self.flight.do(('count_s3_objects', bucket_name, prefix or ''), count)
         except ClientError as e:
             if e.response['Error']['Code'] == 'NoSuchBucket':
-                return f"❌ Bucket '{bucket_name}' não encontrado."
+                return Failure(f"Bucket '{bucket_name}' não encontrado.")
             else:
-                return f"❌ Erro ao acessar bucket: {e.response['Error']['Message']}"
+                return Failure(f"Erro ao acessar bucket: {e.response['Error']['Message']}")
         except Exception as e:
-            return f"❌ Erro inesperado: {str(e)}"
+            return Failure(f"Erro inesperado: {str(e)}")
     
-    def list_ec2_instances(self):
+    def list_ec2_instances(self, filters=None, order='regiao', cursor=None, page=1, size=None, fresh=False,
+                           on_region=None):
+        """Uma página das instâncias que passam pelos filtros, sobre o inventário em cache"""
         try:
-            response = self.ec2_client.describe_instances()
-            
-            instances = []
-            for reservation in response['Reservations']:
-                for instance in reservation['Instances']:
-                    instances.append({
-                        'id': instance['InstanceId'],
-                        'type': instance['InstanceType'],
-                        'state': instance['State']['Name'],
-                        'launch_time': instance['LaunchTime']
-                    })
-            
-            if not instances:
-                return "🖥️ Nenhuma instância EC2 encontrada."
-            
-            instance_list = "🖥️ **Suas instâncias EC2:**\n\n"
-            for instance in instances:
-                status_emoji = "🟢" if instance['state'] == 'running' else "🔴" if instance['state'] == 'stopped' else "🟡"
-                instance_list += f"{status_emoji} **{instance['id']}** ({instance['type']}) - {instance['state']}\n"
-            
-            return instance_list
-            
+            inventory = self.get_ec2_inventory(fresh=fresh, on_region=on_region)
+        except InventoryError as e:
+            return Failure(f"Erro ao listar instâncias: {e}")
         except ClientError as e:
-            return f"❌ Erro ao listar instâncias: {e.response['Error']['Message']}"
+            return Failure(f"Erro ao listar instâncias: {e.response['Error']['Message']}")
         except Exception as e:
-            return f"❌ Erro inesperado: {str(e)}"
\ No newline at end of file
+            return Failure(f"Erro inesperado: {str(e)}")
+        
+        filters = filters or InstanceFilter()
+        matching = [instance for instance in inventory.instances if filters.matches(instance)]
+        try:
+            selected = select_page(matching, order, INSTANCE_ORDERS, size, cursor, page)
+        except ValueError as e:
+            return Failure(str(e))
+        return InstancePage(selected, filters, [result.region for result in inventory.failed])
+    
+    def get_ec2_inventory(self, fresh=False, on_region=None):
+        """Inventário EC2 de todas as regiões (falhas por região ficam em inventory.failed)
+
+        Levanta InventoryError se nenhuma região respondeu; nesse caso nada é
+        cacheado, e um inventário parcial expira em CACHE_PARTIAL_TTL segundos.
+        """
+        # Em um acerto de cache não há progresso: o inventário já está pronto. A recarga em
+        # background roda depois da requisição e não recebe o callback dela (a tarefa pode
+        # já ter terminado ou sido cancelada)
+        loader = partial(self._fetch_ec2_instances, on_region=on_region) if on_region else self._fetch_ec2_instances
+        return self._cached('list_ec2_instances', loader, fresh=fresh, policy=self._inventory_policy,
+                            refresh_loader=self._fetch_ec2_instances)
+    
+    def _inventory_policy(self, inventory):
+        return (CACHE_PARTIAL_TTL, 0) if inventory.failed else None
+    
+    def _fetch_ec2_instances(self, on_region=None):
+        inventory = collect_inventory(self._ec2_client_for, self._ec2_regions(), on_region=on_region)
+        if inventory.regions and len(inventory.failed) == len(inventory.regions):
+            # Falha total (ex.: RequestLimitExceeded) não é cacheada como sucesso
+            raise InventoryError(inventory)
+        return inventory
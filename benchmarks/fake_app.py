@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+App do chatbot ligado ao fake_aws.py, para servir em outro processo
+Usado pelo load_test.py (--server dev|gunicorn) para comparar servidores sem
+que o gerador de carga dispute o GIL com o app. A AWS simulada é configurada
+por FAKE_AWS_LATENCY_MS, FAKE_AWS_JITTER_MS e FAKE_AWS_THROTTLE_RATE.
+
+Executar:
+    python benchmarks/fake_app.py --port 5001            # servidor de desenvolvimento (como o antigo CMD)
+    gunicorn -c gunicorn.conf.py benchmarks.fake_app:app
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as chat_app
+from aws_clients import ClientPool
+from aws_services import AWSServices
+from cost_store import CostStore
+from fake_aws import FakeAWS
+
+fake = FakeAWS(latency=float(os.environ.get('FAKE_AWS_LATENCY_MS', '50')) / 1000,
+               jitter=float(os.environ.get('FAKE_AWS_JITTER_MS', '0')) / 1000,
+               throttle_rate=float(os.environ.get('FAKE_AWS_THROTTLE_RATE', '0')))
+chat_app.aws_services = AWSServices(clients=ClientPool(factory=fake.client), cost_store=CostStore(':memory:'))
+app = chat_app.app
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Servidor de desenvolvimento do Flask com AWS simulada")
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+    # Mesmo servidor do `python app.py`; sem o reloader, que criaria um segundo processo
+    app.run(host='127.0.0.1', port=args.port, debug=True, use_reloader=False)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do endpoint /chat
+Dispara requisições concorrentes com uma mistura de comandos contra o app
+local (fake_aws.py, com latência e throttling injetáveis) ou contra uma URL, e mede
+throughput, latências p50/p95/p99 e taxa de erros. Os resultados em JSON
+podem ser comparados entre commits e lidos pelo capacity_planner.py.
+
+Executar:
+    python benchmarks/load_test.py --concurrency 16 --duration 30 --output resultados.json
+    python benchmarks/load_test.py --compare resultados.json   # falha se houver regressão
+    python benchmarks/load_test.py --server dev --output dev.json        # servidor de desenvolvimento
+    python benchmarks/load_test.py --server gunicorn --compare dev.json  # gunicorn.conf.py
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_MIX = {'custos': 4, 's3 buckets': 3, 'ec2 instancias': 2, 'ajuda': 1}
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'custos=4,s3 buckets=3' -> {'custos': 4.0, 's3 buckets': 3.0}"""
+    mix = {}
+    for part in text.split(','):
+        command, _, weight = part.partition('=')
+        if command.strip():
+            mix[command.strip()] = float(weight or 1)
+    return mix
+
+# Servidores em subprocesso (benchmarks/fake_app.py), como em produção
+PROCESS_SERVERS = ('dev', 'gunicorn')
+
+class LocalServer:
+    """Sobe o app com AWSServices ligado à AWS simulada
+
+    'wsgi' e 'asgi' rodam em uma thread deste processo; 'dev' (servidor de
+    desenvolvimento do Flask) e 'gunicorn' (gunicorn.conf.py) rodam em um
+    subprocesso, para não disputarem o GIL com o gerador de carga.
+    """
+
+    def __init__(self, kind: str = 'wsgi', latency: float = 0.05, jitter: float = 0.0,
+                 throttle_rate: float = 0.0, factory=None):
+        self.kind = kind
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.factory = factory
+        self.url = None
+        self._server = None
+        self._thread = None
+        self._previous = None
+        self._process = None
+
+    def __enter__(self):
+        if self.kind in PROCESS_SERVERS:
+            self._start_process()
+            return self
+
+        import app as chat_app
+        from aws_clients import ClientPool
+        from aws_services import AWSServices
+        from cost_store import CostStore
+
+        if self.factory is None:
+            from fake_aws import FakeAWS
+            self.factory = FakeAWS(latency=self.latency, jitter=self.jitter, throttle_rate=self.throttle_rate).client
+        self._previous = chat_app.aws_services
+        chat_app.aws_services = AWSServices(clients=ClientPool(factory=self.factory), cost_store=CostStore(':memory:'))
+
+        if self.kind == 'asgi':
+            self._start_asgi()
+        else:
+            self._start_wsgi(chat_app.app)
+        return self
+
+    def _start_wsgi(self, wsgi_app):
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class KeepAliveHandler(WSGIRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self._server = make_server('127.0.0.1', 0, wsgi_app, threaded=True, request_handler=KeepAliveHandler)
+        self.url = f'http://127.0.0.1:{self._server.server_port}'
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def _start_asgi(self):
+        import uvicorn
+        from asgi import application
+
+        config = uvicorn.Config(application, host='127.0.0.1', port=0, log_level='warning', lifespan='on')
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        port = self._server.servers[0].sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}'
+
+    def _start_process(self):
+        import socket
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        env = dict(os.environ, FAKE_AWS_LATENCY_MS=str(self.latency * 1000), FAKE_AWS_JITTER_MS=str(self.jitter * 1000),
+                   FAKE_AWS_THROTTLE_RATE=str(self.throttle_rate), GUNICORN_ACCESS_LOG='')
+        if self.kind == 'gunicorn':
+            command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+                       'benchmarks.fake_app:app']
+        else:
+            command = [sys.executable, os.path.join('benchmarks', 'fake_app.py'), '--port', str(port)]
+        self._process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.DEVNULL)
+        self.url = f'http://127.0.0.1:{port}'
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"O servidor '{self.kind}' terminou ao iniciar (código {self._process.returncode})")
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+                connection.request('GET', '/')
+                if connection.getresponse().status == 200:
+                    connection.close()
+                    return
+            except OSError:
+                time.sleep(0.1)
+        self._process.kill()
+        raise RuntimeError(f"O servidor '{self.kind}' não respondeu em 30s")
+
+    def __exit__(self, *exc):
+        if self._process is not None:
+            # SIGTERM: o gunicorn conclui as requisições em andamento antes de sair
+            self._process.terminate()
+            try:
+                self._process.wait(30)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            return
+
+        import app as chat_app
+
+        if self.kind == 'asgi':
+            self._server.should_exit = True
+        else:
+            self._server.shutdown()
+        self._thread.join(5)
+        chat_app.aws_services = self._previous
+
+def run_load(url: str, mix: Dict[str, float], concurrency: int = 8, duration: Optional[float] = 10,
+             requests: Optional[int] = None, seed: int = 0, timeout: float = 30) -> Tuple[List[Tuple[str, float, int, bool]], float]:
+    """Executa a carga; retorna ([(comando, latência s, status, ok)], duração s)"""
+    target = urlsplit(url)
+    commands, weights = list(mix), list(mix.values())
+    records = []
+    lock = threading.Lock()
+    remaining = [requests]
+    start = time.perf_counter()
+    deadline = start + duration if duration and not requests else None
+
+    def take():
+        if remaining[0] is None:
+            return time.perf_counter() < deadline
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=timeout)
+        local = []
+        while take():
+            command = rng.choices(commands, weights)[0]
+            body = json.dumps({'message': command})
+            began = time.perf_counter()
+            try:
+                connection.request('POST', '/chat', body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                payload = response.read()
+                status = response.status
+                ok = status < 400 and not json.loads(payload).get('response', '').startswith('❌')
+            except Exception:
+                connection.close()
+                status, ok = 0, False
+            local.append((command, time.perf_counter() - began, status, ok))
+        connection.close()
+        with lock:
+            records.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - start
+
+def latency_summary(latencies) -> Dict[str, float]:
+    if not len(latencies):
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'mean': 0.0, 'max': 0.0}
+    milliseconds = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+    return {'p50': round(float(p50), 2), 'p95': round(float(p95), 2), 'p99': round(float(p99), 2),
+            'mean': round(float(milliseconds.mean()), 2), 'max': round(float(milliseconds.max()), 2)}
+
+def summarize(records, elapsed: float) -> Dict:
+    """Throughput, latências e erros, no total e por comando"""
+    def section(selected):
+        errors = sum(1 for record in selected if not record[3])
+        return {
+            'requests': len(selected),
+            'errors': errors,
+            'error_rate': round(errors / len(selected), 4) if selected else 0.0,
+            'throughput_rps': round(len(selected) / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': latency_summary([record[1] for record in selected])
+        }
+
+    summary = section(records)
+    summary['elapsed'] = round(elapsed, 3)
+    summary['status'] = {str(status): sum(1 for record in records if record[2] == status)
+                         for status in sorted({record[2] for record in records})}
+    summary['commands'] = {command: section([record for record in records if record[0] == command])
+                           for command in sorted({record[0] for record in records})}
+    return summary
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.1) -> List[str]:
+    """Regressões do resultado atual em relação ao de referência"""
+    regressions = []
+    if current['throughput_rps'] < baseline['throughput_rps'] * (1 - tolerance):
+        regressions.append(f"throughput caiu de {baseline['throughput_rps']} para {current['throughput_rps']} req/s")
+    for percentile in ('p50', 'p95', 'p99'):
+        before, after = baseline['latency_ms'][percentile], current['latency_ms'][percentile]
+        if after > before * (1 + tolerance):
+            regressions.append(f"{percentile} subiu de {before} para {after} ms")
+    if current['error_rate'] > baseline['error_rate'] + 0.01:
+        regressions.append(f"taxa de erros subiu de {baseline['error_rate']:.2%} para {current['error_rate']:.2%}")
+    return regressions
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do endpoint /chat")
+    parser.add_argument('--url', help='servidor já em execução (padrão: app local com AWS simulada)')
+    parser.add_argument('--server', choices=('wsgi', 'asgi') + PROCESS_SERVERS, default='wsgi',
+                        help='app local: Flask ou asgi.py em thread; dev ou gunicorn em subprocesso')
+    parser.add_argument('--latency-ms', type=float, default=50, help='latência de cada chamada AWS simulada')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='variação aleatória extra da latência')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='fração das chamadas AWS com throttling')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help='segundos de carga')
+    parser.add_argument('--requests', type=int, help='número fixo de requisições (ignora --duration)')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help="ex.: 'custos=4,s3 buckets=3'")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cpu', type=int, help='CPU da task medida (para o capacity_planner.py)')
+    parser.add_argument('--memory', type=int, help='memória da task medida (para o capacity_planner.py)')
+    parser.add_argument('--output', help='arquivo JSON de resultados')
+    parser.add_argument('--append', action='store_true', help='acrescenta ao arquivo em vez de sobrescrever')
+    parser.add_argument('--compare', help='resultado de referência; sai com código 1 se houver regressão')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='piora aceita na comparação (0.1 = 10%%)')
+    args = parser.parse_args(argv)
+
+    def execute(url):
+        return run_load(url, args.mix, args.concurrency, args.duration, args.requests, args.seed)
+
+    if args.url:
+        records, elapsed = execute(args.url)
+    else:
+        with LocalServer(args.server, args.latency_ms / 1000, args.jitter_ms / 1000, args.throttle_rate) as server:
+            records, elapsed = execute(server.url)
+
+    result = summarize(records, elapsed)
+    result.update({
+        'cpu': args.cpu,
+        'memory': args.memory,
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'config': {'url': args.url, 'server': None if args.url else args.server, 'latency_ms': args.latency_ms,
+                   'jitter_ms': args.jitter_ms, 'throttle_rate': args.throttle_rate, 'concurrency': args.concurrency, 'duration': args.duration,
+                   'requests': args.requests, 'mix': args.mix, 'seed': args.seed}
+    })
+
+    latency = result['latency_ms']
+    print(f"{result['requests']} requisições em {result['elapsed']:.1f}s: {result['throughput_rps']} req/s, "
+          f"p50 {latency['p50']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms, "
+          f"erros {result['error_rate']:.2%}")
+    for command, section in result['commands'].items():
+        print(f"  • {command}: {section['requests']} req, p99 {section['latency_ms']['p99']} ms, "
+              f"erros {section['error_rate']:.2%}")
+
+    if args.output:
+        results = []
+        if args.append and os.path.exists(args.output):
+            with open(args.output, encoding='utf-8') as results_file:
+                results = json.load(results_file)['results']
+        with open(args.output, 'w', encoding='utf-8') as results_file:
+            json.dump({'results': results + [result]}, results_file, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['results'][-1]
+        regressions = compare(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"⚠️ Regressão: {regression}")
+        if regressions:
+            return 1
+        print(f"✅ Sem regressões em relação a {baseline.get('commit') or args.compare}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
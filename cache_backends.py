@@ -0,0 +1,386 @@
+"""
+Backends do cache de AWSServices
+O TTLCache (aws_services.py) mantém sempre uma cópia local em memória. Com um
+backend compartilhado, um miss local consulta o backend antes da AWS e uma
+trava distribuída faz com que só uma task por vez recarregue cada chave: N
+tasks atrás do ALB fazem as mesmas chamadas AWS que uma só.
+
+CACHE_BACKEND=memory (padrão) não compartilha nada entre processos;
+CACHE_BACKEND=redis usa CACHE_REDIS_URL (redis://[:senha@]host:porta/db) pelo
+protocolo RESP, sem dependências extras, e exige CACHE_SECRET. fake_redis.py é
+um servidor local compatível para testes.
+"""
+
+import abc
+import base64
+import hashlib
+import hmac
+import importlib
+import inspect
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+# Assina os valores do Redis (obrigatório): só é lido o que uma task do app gravou
+CACHE_SECRET = os.environ.get('CACHE_SECRET', '')
+# Timeout de cada comando; com o Redis fora do ar o cache volta a ser só local
+CACHE_REDIS_TIMEOUT = float(os.environ.get('CACHE_REDIS_TIMEOUT', '0.5'))
+
+# Compare-and-delete: só quem adquiriu a trava (mesmo token) pode liberá-la
+UNLOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+class CacheBackendError(Exception):
+    """Falha de comunicação ou de formato no backend compartilhado"""
+    pass
+
+class CacheEntry(NamedTuple):
+    """Valor em cache com validade em tempo absoluto (segundos, relógio do cache)"""
+    value: Any
+    fresh_until: float
+    stale_until: float
+    loaded_at: float
+
+class CacheBackend(abc.ABC):
+    """Armazenamento de CacheEntry por chave, com travas de recarga"""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, entry: CacheEntry):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abc.abstractmethod
+    def clear(self, prefix: str = ''):
+        """Remove todas as chaves que começam com prefix"""
+
+    @abc.abstractmethod
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        """Adquire a trava por até ttl segundos; retorna o token ou None se ocupada"""
+
+    @abc.abstractmethod
+    def release(self, name: str, token: str):
+        ...
+
+class MemoryBackend(CacheBackend):
+    """LRU limitado no processo; os valores são guardados sem serialização"""
+
+    def __init__(self, max_entries: int = 256, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: 'OrderedDict[Any, CacheEntry]' = OrderedDict()
+        self._locks: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._clock() >= entry.stale_until:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, prefix: str = ''):
+        with self._lock:
+            if not prefix:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if str(key).startswith(prefix)]:
+                del self._entries[key]
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        now = self._clock()
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._locks[name] = (token, now + ttl)
+            return token
+
+    def release(self, name: str, token: str):
+        with self._lock:
+            if self._locks.get(name, (None,))[0] == token:
+                del self._locks[name]
+
+# Tipos que podem voltar do Redis, por nome: a lista é fixa no código, nunca vem do valor
+CACHE_TYPES = {
+    'CostTable': 'cost_explorer:CostTable',
+    'EC2Inventory': 'ec2_inventory:EC2Inventory',
+    'RegionResult': 'ec2_inventory:RegionResult',
+    'Instance': 'ec2_inventory:Instance',
+}
+TYPE_TAG = '$t'
+
+def _record_fields(cls) -> Tuple[str, ...]:
+    # NamedTuple, dataclass ou classe cujos parâmetros do construtor são atributos (CostTable)
+    return tuple(inspect.signature(cls).parameters)
+
+def _record_type(name: str):
+    path = CACHE_TYPES.get(name)
+    if path is None:
+        raise CacheBackendError(f"Tipo não permitido no cache: {name}")
+    module, _, attribute = path.partition(':')
+    return getattr(importlib.import_module(module), attribute)
+
+def encode_value(value: Any) -> Any:
+    """Converte um valor em cache para JSON, marcando tipos que o JSON não tem com '$t'"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        if TYPE_TAG in value or not all(isinstance(key, str) for key in value):
+            raise CacheBackendError("Dicionário não serializável no cache")
+        return {key: encode_value(item) for key, item in value.items()}
+    if isinstance(value, datetime):
+        return {TYPE_TAG: 'datetime', 'v': value.isoformat()}
+    if isinstance(value, date):
+        return {TYPE_TAG: 'date', 'v': value.isoformat()}
+    name = type(value).__name__
+    if name in CACHE_TYPES and _record_type(name) is type(value):
+        return {TYPE_TAG: name, 'v': {field: encode_value(getattr(value, field)) for field in _record_fields(type(value))}}
+    if isinstance(value, tuple):
+        return {TYPE_TAG: 'tuple', 'v': [encode_value(item) for item in value]}
+    if type(value).__module__ == 'numpy' and name == 'ndarray' and value.dtype.kind in 'biuf':
+        return {TYPE_TAG: 'ndarray', 'dtype': value.dtype.str, 'shape': list(value.shape),
+                'v': base64.b64encode(value.tobytes()).decode('ascii')}
+    raise CacheBackendError(f"Tipo não serializável no cache: {name}")
+
+def decode_value(data: Any) -> Any:
+    """Inverso de encode_value; só reconstrói os tipos de CACHE_TYPES"""
+    if isinstance(data, list):
+        return [decode_value(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    tag = data.get(TYPE_TAG)
+    if tag is None:
+        return {key: decode_value(item) for key, item in data.items()}
+    if tag == 'datetime':
+        return datetime.fromisoformat(data['v'])
+    if tag == 'date':
+        return date.fromisoformat(data['v'])
+    if tag == 'tuple':
+        return tuple(decode_value(item) for item in data['v'])
+    if tag == 'ndarray':
+        # NumPy só é importado quando há uma tabela de custos em cache
+        import numpy as np
+        dtype = np.dtype(data['dtype'])
+        if dtype.kind not in 'biuf':
+            raise CacheBackendError(f"dtype não permitido no cache: {dtype}")
+        raw = bytearray(base64.b64decode(data['v']))
+        return np.frombuffer(raw, dtype=dtype).reshape(data['shape'])
+    cls = _record_type(tag)
+    return cls(**{field: decode_value(item) for field, item in data['v'].items()})
+
+class Serializer:
+    """JSON assinado com HMAC-SHA256 (CACHE_SECRET)
+
+    Os valores em cache (CostTable, EC2Inventory, respostas boto3 com datetime)
+    viram JSON com os tipos marcados (encode_value); só os registros de
+    CACHE_TYPES são reconstruídos. A assinatura é verificada antes de qualquer
+    decodificação, então o Redis só devolve valores gravados por uma task do app.
+    """
+
+    def __init__(self, secret: str):
+        if not secret:
+            raise ValueError("O cache compartilhado exige um segredo (CACHE_SECRET)")
+        self._key = secret.encode()
+
+    def dumps(self, entry: CacheEntry) -> bytes:
+        entry = entry._replace(value=encode_value(entry.value))
+        payload = json.dumps(list(entry), separators=(',', ':')).encode()
+        return hmac.new(self._key, payload, hashlib.sha256).digest() + payload
+
+    def loads(self, data: bytes) -> CacheEntry:
+        signature, data = data[:32], data[32:]
+        if not hmac.compare_digest(signature, hmac.new(self._key, data, hashlib.sha256).digest()):
+            raise CacheBackendError("Assinatura inválida no valor em cache")
+        try:
+            entry = CacheEntry(*json.loads(data))
+            return entry._replace(value=decode_value(entry.value))
+        except CacheBackendError:
+            raise
+        except Exception as e:
+            raise CacheBackendError(f"Valor em cache ilegível: {e}")
+
+class RedisClient:
+    """Cliente RESP mínimo com pool de conexões, seguro entre threads"""
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 timeout: float = CACHE_REDIS_TIMEOUT, max_connections: int = 16):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._idle: 'queue.LifoQueue' = queue.LifoQueue(maxsize=max_connections)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisClient':
+        parts = urlsplit(url)
+        if parts.scheme != 'redis':
+            raise ValueError(f"URL Redis inválida: {url}")
+        db = int(parts.path.lstrip('/') or 0)
+        password = unquote(parts.password) if parts.password else None
+        return cls(parts.hostname or 'localhost', parts.port or 6379, db, password, **kwargs)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = (sock, sock.makefile('rb'))
+        for command in ([('AUTH', self.password)] if self.password else []) + ([('SELECT', self.db)] if self.db else []):
+            reply = self._roundtrip(connection, command)
+            if isinstance(reply, CacheBackendError):
+                sock.close()
+                raise reply
+        return connection
+
+    def execute(self, *args):
+        """Envia um comando e retorna a resposta decodificada (bytes, int, lista ou None)"""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = None
+        try:
+            if connection is None:
+                connection = self._connect()
+            reply = self._roundtrip(connection, args)
+        except (OSError, EOFError) as e:
+            if connection is not None:
+                connection[0].close()
+            raise CacheBackendError(f"Redis {self.host}:{self.port} indisponível: {e}")
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection[0].close()
+        if isinstance(reply, CacheBackendError):
+            raise reply
+        return reply
+
+    def _roundtrip(self, connection, args):
+        sock, reader = connection
+        sock.sendall(encode_command(args))
+        return read_reply(reader)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait()[0].close()
+            except queue.Empty:
+                return
+
+def encode_command(args) -> bytes:
+    """Comando como array RESP de bulk strings"""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+    return b''.join(parts)
+
+def read_reply(reader):
+    """Lê uma resposta RESP; erros do servidor voltam como CacheBackendError (não levantados)"""
+    line = reader.readline()
+    if not line.endswith(b'\r\n'):
+        raise EOFError("conexão encerrada")
+    kind, body = line[:1], line[1:-2]
+    if kind == b'+':
+        return body.decode()
+    if kind == b'-':
+        return CacheBackendError(body.decode())
+    if kind == b':':
+        return int(body)
+    if kind == b'$':
+        size = int(body)
+        if size < 0:
+            return None
+        data = reader.read(size + 2)
+        if len(data) < size + 2:
+            raise EOFError("conexão encerrada")
+        return data[:-2]
+    if kind == b'*':
+        size = int(body)
+        return None if size < 0 else [read_reply(reader) for _ in range(size)]
+    raise CacheBackendError(f"Resposta RESP inválida: {line!r}")
+
+class RedisBackend(CacheBackend):
+    """Cache compartilhado no Redis; cada chave expira junto com a janela stale"""
+
+    def __init__(self, client: RedisClient, serializer: Serializer, clock: Callable[[], float] = time.time):
+        self.client = client
+        self.serializer = serializer
+        self._clock = clock
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        data = self.client.execute('GET', key)
+        return None if data is None else self.serializer.loads(data)
+
+    def set(self, key: str, entry: CacheEntry):
+        expire_ms = int((entry.stale_until - self._clock()) * 1000)
+        if expire_ms > 0:
+            self.client.execute('SET', key, self.serializer.dumps(entry), 'PX', expire_ms)
+
+    def delete(self, key: str):
+        self.client.execute('DEL', key)
+
+    def clear(self, prefix: str = ''):
+        cursor = b'0'
+        while True:
+            cursor, keys = self.client.execute('SCAN', cursor, 'MATCH', prefix + '*', 'COUNT', 500)
+            if keys:
+                self.client.execute('DEL', *keys)
+            if cursor == b'0':
+                return
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        reply = self.client.execute('SET', name, token, 'NX', 'PX', max(1, int(ttl * 1000)))
+        return token if reply == 'OK' else None
+
+    def release(self, name: str, token: str):
+        self.client.execute('EVAL', UNLOCK_SCRIPT, 1, name, token)
+
+def backend_from_env() -> Optional[CacheBackend]:
+    """Backend compartilhado configurado (None = só o cache local do processo)"""
+    if CACHE_BACKEND == 'memory':
+        return None
+    if CACHE_BACKEND == 'redis':
+        if not CACHE_SECRET:
+            raise ValueError("CACHE_BACKEND=redis exige CACHE_SECRET (o mesmo em todas as tasks)")
+        return RedisBackend(RedisClient.from_url(CACHE_REDIS_URL), Serializer(CACHE_SECRET))
+    raise ValueError(f"CACHE_BACKEND inválido: {CACHE_BACKEND} (use memory ou redis)")
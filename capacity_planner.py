@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Planejador de capacidade para o serviço ECS Fargate
+Combina o custo de cada configuração (AWSCostCalculator) com o throughput
+medido por tamanho de task em um benchmark e lista as configurações mais
+baratas que atendem a uma meta de requisições/s e de latência p99.
+
+Executar: python capacity_planner.py resultados.json --rps 200 --p99 500
+"""
+
+import argparse
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from cost_calculator import AWSCostCalculator, CostItem, Scenario
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TaskSize:
+    """Tamanho de task Fargate com o desempenho medido por task"""
+    cpu: int
+    memory: int
+    throughput_rps: float
+    p99_ms: float
+
+    @property
+    def vcpu(self) -> float:
+        return self.cpu / 1024
+
+    @property
+    def memory_gb(self) -> float:
+        return self.memory / 1024
+
+@dataclass
+class Plan:
+    """Configuração candidata: tamanho × quantidade de tasks"""
+    size: TaskSize
+    tasks: int
+    capacity_rps: float
+    utilization: float
+    monthly_cost: float
+    items: List[CostItem] = field(default_factory=list)
+
+def load_benchmarks(path: str) -> List[TaskSize]:
+    """Lê os resultados de benchmark por tamanho de task
+
+    Formato: {"results": [{"cpu": 256, "memory": 512, "throughput_rps": 40.0,
+    "latency_ms": {"p99": 180.0}}, ...]}
+
+    Execuções do load_test.py sem --cpu/--memory não dizem o tamanho da task
+    medida e são ignoradas com um aviso.
+    """
+    with open(path, encoding='utf-8') as results_file:
+        data = json.load(results_file)
+    sizes = []
+    for index, result in enumerate(data['results']):
+        if result.get('cpu') is None or result.get('memory') is None:
+            logger.warning("Resultado %d de %s ignorado: sem cpu/memory (use load_test.py --cpu --memory)",
+                           index, path)
+            continue
+        sizes.append(benchmark_size(result))
+    return sizes
+
+def benchmark_size(result: Dict[str, Any]) -> TaskSize:
+    return TaskSize(int(result['cpu']), int(result['memory']),
+                    float(result['throughput_rps']), float(result['latency_ms']['p99']))
+
+def plan_capacity(sizes: List[TaskSize], target_rps: float, max_p99_ms: float,
+                  calculator: Optional[AWSCostCalculator] = None, max_tasks: int = 20, min_tasks: int = 1,
+                  headroom: float = 0.2, top: int = 10, **parameters) -> List[Plan]:
+    """Configurações mais baratas que atendem à meta, da mais barata para a mais cara
+
+    `headroom` reserva uma fração da capacidade medida (0.2 = usar até 80%).
+    Parâmetros extras (ex.: load_balancers=1, alb_lcu=2) entram no custo de
+    todas as configurações, como em AWSCostCalculator.batch_costs.
+    """
+    calculator = calculator if calculator is not None else AWSCostCalculator()
+    if not sizes:
+        return []
+
+    counts = np.arange(min_tasks, max_tasks + 1)[:, None]
+    throughput = np.array([size.throughput_rps for size in sizes])[None, :]
+    p99 = np.array([size.p99_ms for size in sizes])[None, :]
+    costs = calculator.batch_costs(
+        tasks=counts,
+        vcpu=np.array([size.vcpu for size in sizes])[None, :],
+        memory_gb=np.array([size.memory_gb for size in sizes])[None, :],
+        **parameters
+    )['total']
+
+    capacity = counts * throughput * (1 - headroom)
+    feasible = (capacity >= target_rps) & (p99 <= max_p99_ms)
+    rows, columns = np.nonzero(feasible)
+    # Mais barato primeiro; no empate, menos tasks
+    order = np.lexsort((counts[rows, 0], costs[rows, columns]))[:top]
+
+    plans = []
+    for index in order:
+        row, column = rows[index], columns[index]
+        size, tasks = sizes[column], int(counts[row, 0])
+        scenario = Scenario('capacity', f"{tasks} x {size.cpu}/{size.memory}", tasks=tasks, vcpu=size.vcpu,
+                            memory_gb=size.memory_gb, **parameters)
+        plans.append(Plan(size, tasks, float(capacity[row, column]), target_rps / float(counts[row, 0] * size.throughput_rps),
+                          float(costs[row, column]), calculator.scenario_costs(scenario)))
+    return plans
+
+def format_plans(plans: List[Plan], target_rps: float, max_p99_ms: float) -> str:
+    """Tabela Markdown com as configurações ranqueadas"""
+    if not plans:
+        return (f"Nenhuma configuração atende {target_rps:g} req/s com p99 <= {max_p99_ms:g} ms. "
+                "Aumente --max-tasks ou meça tamanhos maiores.")
+
+    lines = [f"Meta: {target_rps:g} req/s, p99 <= {max_p99_ms:g} ms\n",
+             "| # | CPU | Memória | Tasks | Capacidade (req/s) | Utilização | p99 (ms) | Custo/mês |",
+             "|---|-----|---------|-------|--------------------|------------|----------|-----------|"]
+    for rank, plan in enumerate(plans, 1):
+        lines.append(f"| {rank} | {plan.size.cpu} | {plan.size.memory} | {plan.tasks} | {plan.capacity_rps:.0f} "
+                     f"| {plan.utilization:.0%} | {plan.size.p99_ms:.0f} | ${plan.monthly_cost:.2f} |")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Configurações Fargate mais baratas para uma meta de carga")
+    parser.add_argument('results', help='JSON de resultados do benchmark')
+    parser.add_argument('--rps', type=float, required=True, help='requisições/s a atender')
+    parser.add_argument('--p99', type=float, required=True, help='latência p99 máxima em ms')
+    parser.add_argument('--max-tasks', type=int, default=20)
+    parser.add_argument('--min-tasks', type=int, default=1, help='use 2 ou mais para alta disponibilidade')
+    parser.add_argument('--headroom', type=float, default=0.2, help='fração da capacidade reservada')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    plans = plan_capacity(load_benchmarks(args.results), args.rps, args.p99, max_tasks=args.max_tasks,
+                          min_tasks=args.min_tasks, headroom=args.headroom, top=args.top)
+    print(format_plans(plans, args.rps, args.p99))
+    if plans:
+        best = plans[0]
+        print(f"\nSugestão para infrastructure/ecs.tf: cpu = \"{best.size.cpu}\", "
+              f"memory = \"{best.size.memory}\", desired_count = {best.tasks}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Comandos do chatbot
+Para adicionar um comando basta registrar um handler em `router`; o app
+Flask, o ponto de entrada ASGI e o texto de ajuda o descobrem sozinhos.
+"""
+
+import time
+
+from aws_services import COST_ANOMALY_WINDOW, COST_TABLE_DAYS
+from listing import (BUCKET_ORDERS, INSTANCE_ORDERS, INSTANCE_STATES, LISTING_MAX_PAGE_SIZE, LISTING_PAGE_SIZE,
+                     InstanceFilter)
+from router import Arg, CommandError, CommandRouter, Flag
+from s3_inventory import format_bytes
+
+router = CommandRouter()
+
+FRESH = Flag('fresh', help='ignora o cache e consulta a AWS')
+# Horizonte máximo da previsão: a matriz prevista tem séries × dias
+FORECAST_MAX_DAYS = 365
+
+HELP_FOOTER = """
+📊 **Projeto TDC 2025 Q Developer Quest**
+Todas as 4 etapas concluídas! ✅"""
+
+def positive_int(value):
+    """Tipo para contagens e janelas de dias: inteiro maior que zero"""
+    number = int(value)
+    if number < 1:
+        raise ValueError(value)
+    return number
+
+def bounded_int(maximum):
+    """Tipo inteiro entre 1 e maximum; acima do limite a mensagem informa o máximo"""
+    def parse(value):
+        number = positive_int(value)
+        if number > maximum:
+            raise CommandError(f"Valor acima do máximo permitido ({maximum}): '{value}'")
+        return number
+    return parse
+
+def choice(*options):
+    """Tipo que aceita apenas um dos valores dados"""
+    def parse(value):
+        value = value.lower()
+        if value not in options:
+            raise ValueError(value)
+        return value
+    return parse
+
+def days_flag(default, help='janela em dias', maximum=COST_TABLE_DAYS):
+    # A tabela de custos não guarda mais que COST_TABLE_DAYS dias
+    return Flag('dias', help=f'{help} (máximo {maximum})', type=bounded_int(maximum), default=default)
+
+def page_flags():
+    """Opções de paginação das listagens (listing.py)"""
+    return (Flag('cursor', help='continua de onde a página anterior parou', type=str),
+            Flag('pagina', help='página a exibir', type=positive_int, default=1),
+            Flag('limite', help=f'itens por página (máximo {LISTING_MAX_PAGE_SIZE})', type=positive_int,
+                 default=LISTING_PAGE_SIZE))
+
+def throttled(callback, interval=0.25):
+    """Limita callbacks de progresso frequentes (ex.: uma página S3) a um por intervalo"""
+    last = [0.0]
+    
+    def wrapper(value):
+        now = time.monotonic()
+        if now - last[0] >= interval:
+            last[0] = now
+            callback(value)
+    return wrapper
+
+@router.command('custos', help='Estimativa de custos da conta', flags=(FRESH,))
+def cost_estimate(services, fresh):
+    return services.get_cost_estimate(fresh=fresh)
+
+@router.command('custos servicos', 'custos serviços', 'custos top', help='Serviços com maior custo',
+                args=(Arg('n', help='quantos serviços mostrar', type=positive_int, default=5),),
+                flags=(days_flag(30), FRESH), example='custos top 5 --dias 7')
+def cost_by_service(services, n, dias, fresh):
+    return services.cost_breakdown('service', days=dias, top=n, fresh=fresh)
+
+@router.command('custos regioes', 'custos regiões', help='Custos por região',
+                flags=(days_flag(30), FRESH))
+def cost_by_region(services, dias, fresh):
+    return services.cost_breakdown('region', days=dias, fresh=fresh)
+
+@router.command('custos contas', help='Custos por conta vinculada',
+                flags=(days_flag(30), FRESH))
+def cost_by_account(services, dias, fresh):
+    return services.cost_breakdown('account', days=dias, fresh=fresh)
+
+@router.command('custos diarios', 'custos diários', help='Custo total de cada dia',
+                flags=(days_flag(7), FRESH))
+def daily_costs(services, dias, fresh):
+    return services.daily_costs(days=dias, fresh=fresh)
+
+@router.command('custos previsao', 'custos previsão', help='Previsão de custos dos próximos dias',
+                flags=(days_flag(30, help='dias a prever', maximum=FORECAST_MAX_DAYS), Flag('metodo', help='linear ou holt', type=choice('linear', 'holt'), default='holt'),
+                       FRESH),
+                example='custos previsao --dias 30 --metodo linear')
+def cost_forecast(services, dias, metodo, fresh):
+    return services.cost_forecast(days=dias, method=metodo, fresh=fresh)
+
+@router.command('custos anomalias', help='Dias com custo fora do padrão por serviço e região',
+                # Cada dia avaliado precisa de COST_ANOMALY_WINDOW dias anteriores dentro da tabela
+                flags=(days_flag(7, maximum=COST_TABLE_DAYS - COST_ANOMALY_WINDOW), FRESH))
+def cost_anomalies(services, dias, fresh):
+    return services.cost_anomalies(days=dias, fresh=fresh)
+
+@router.command('s3 buckets', help='Lista os buckets S3 em páginas',
+                args=(Arg('prefix', help='prefixo do nome', label='prefixo'),),
+                flags=(Flag('ordem', help='nome, recentes ou antigos', type=choice(*BUCKET_ORDERS), default='nome'),
+                       *page_flags(), FRESH),
+                example='s3 buckets logs- --ordem recentes')
+def s3_buckets(services, prefix, ordem, cursor, pagina, limite, fresh):
+    return services.list_s3_buckets(prefix=prefix or '', order=ordem, cursor=cursor, page=pagina, size=limite,
+                                    fresh=fresh)
+
+@router.command(
+    's3 arquivos',
+    help='Conta arquivos e bytes em um bucket',
+    args=(Arg('bucket', help='o nome do bucket', required=True, label='nome-do-bucket'),
+          Arg('prefix', label='prefixo')),
+    flags=(Flag('parallel', help='lista os prefixos de primeiro nível em paralelo'),),
+    example='s3 arquivos meu-bucket',
+    stream=True,
+    background=True
+)
+def s3_objects(services, bucket, prefix, parallel, progress=None):
+    on_stats = None
+    if progress:
+        on_stats = throttled(lambda stats: progress(
+            f"⏳ {stats.count} arquivo(s), {format_bytes(stats.total_bytes)} ({stats.pages} página(s))",
+            status=True
+        ))
+    return services.count_s3_objects(bucket, prefix=prefix, parallel=parallel, progress=on_stats)
+
+def _region_progress(progress):
+    def on_region(result):
+        if result.error:
+            progress(f"⚠️ **{result.region}**: falhou ({result.error})")
+        else:
+            progress(f"✅ **{result.region}**: {len(result.instances)} instância(s) em {result.elapsed:.2f}s")
+    return on_region
+
+@router.command('ec2 instancias', 'ec2 instâncias',
+                help='Lista instâncias EC2 de todas as regiões, com filtros e páginas',
+                args=(Arg('estado', help='filtra pelo estado (running, stopped...)', type=choice(*INSTANCE_STATES)),),
+                flags=(Flag('tipo', help='tipo (t3.micro) ou família (t3)', type=str.lower),
+                       Flag('tag', help='tag presente (chave) ou com valor (chave=valor)', type=str),
+                       Flag('nome', help='prefixo do nome (tag Name)', type=str),
+                       Flag('ordem', help=', '.join(INSTANCE_ORDERS), type=choice(*INSTANCE_ORDERS), default='regiao'),
+                       *page_flags(), FRESH),
+                example='ec2 instancias running --tipo t3 --pagina 2', stream=True, background=True)
+def ec2_instances(services, estado, tipo, tag, nome, ordem, cursor, pagina, limite, fresh, progress=None):
+    filters = InstanceFilter(estado or '', tipo or '', tag or '', nome or '')
+    return services.list_ec2_instances(filters=filters, order=ordem, cursor=cursor, page=pagina, size=limite,
+                                       fresh=fresh, on_region=_region_progress(progress) if progress else None)
+
+@router.command('ajuda', 'help', help='Mostra esta mensagem')
+def help_command(services):
+    return router.help_text() + "\n" + HELP_FOOTER
@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 """
 Calculadora de custos detalhada para o AWS Chatbot
-Estima custos de desenvolvimento, produção e diferentes cenários de uso
+Estima custos de desenvolvimento, produção e diferentes cenários de uso a
+partir de uma tabela de preços e dos parâmetros de cada cenário
 """
 
-from typing import Dict, List, Any
-from dataclasses import dataclass
+import argparse
+import json
+import os
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field, fields, asdict
 from datetime import datetime
 
+import numpy as np
+
 @dataclass
 class CostItem:
     """Item de custo individual"""
@@ -17,133 +23,248 @@ class CostItem:
     unit: str = "USD"
     notes: str = ""
 
-class AWSCostCalculator:
-    """Calculadora de custos AWS para o projeto"""
-    
-    def __init__(self, region: str = "us-east-1"):
-        self.region = region
-        self.currency = "USD"
-    
-    def get_development_costs(self) -> List[CostItem]:
-        """Custos de desenvolvimento (Free Tier)"""
-        return [
+@dataclass
+class PriceTable:
+    """Preços sob demanda em USD (padrão: us-east-1)
+
+    Pode ser carregada de um JSON com os mesmos campos (`PRICE_TABLE` aponta
+    para o arquivo padrão); campos ausentes mantêm o valor abaixo.
+    """
+    hours_per_month: float = 730.0
+    fargate_vcpu_hour: float = 0.04048
+    fargate_gb_hour: float = 0.004445
+    alb_hour: float = 0.0225
+    alb_lcu_hour: float = 0.008
+    data_transfer_gb: float = 0.09
+    data_transfer_free_gb: float = 0.0
+    logs_ingest_gb: float = 0.50
+    logs_storage_gb: float = 0.03
+    route53_hosted_zone: float = 0.50
+    route53_queries_million: float = 0.40
+    route53_health_check: float = 0.50
+    s3_storage_gb: float = 0.023
+    s3_requests_thousand: float = 0.0004
+    instance_hour: Dict[str, float] = field(default_factory=lambda: {
+        'db.t3.micro': 0.017,
+        'db.t3.small': 0.034,
+        'cache.t3.micro': 0.017,
+        'cache.t3.small': 0.034,
+    })
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PriceTable':
+        known = {item.name for item in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Campos desconhecidos na tabela de preços: {', '.join(sorted(unknown))}")
+        prices = cls()
+        for name, value in data.items():
+            if name == 'instance_hour':
+                prices.instance_hour = dict(prices.instance_hour, **value)
+            else:
+                setattr(prices, name, float(value))
+        return prices
+
+    @classmethod
+    def load(cls, path: str) -> 'PriceTable':
+        with open(path, encoding='utf-8') as price_file:
+            return cls.from_dict(json.load(price_file))
+
+    @classmethod
+    def default(cls) -> 'PriceTable':
+        path = os.environ.get('PRICE_TABLE')
+        return cls.load(path) if path else cls()
+
+@dataclass
+class Scenario:
+    """Parâmetros de um cenário; serviços com quantidade zero não geram custo"""
+    name: str
+    description: str
+    tasks: float = 0
+    vcpu: float = 0.25
+    memory_gb: float = 0.5
+    load_balancers: float = 0
+    alb_lcu: float = 0
+    data_transfer_gb: float = 0
+    log_gb: float = 0
+    hosted_zones: float = 0
+    dns_queries_million: float = 0
+    health_checks: float = 0
+    s3_gb: float = 0
+    s3_requests_thousand: float = 0
+    # (serviço, tipo de instância, quantidade, descrição)
+    instances: Tuple[Tuple[str, str, int, str], ...] = ()
+    # Itens sem modelo de preço (Free Tier, CloudFront, WAF...)
+    extras: Tuple[CostItem, ...] = ()
+    notes: Dict[str, str] = field(default_factory=dict)
+
+    def parameters(self) -> Dict[str, float]:
+        """Parâmetros numéricos aceitos por AWSCostCalculator.batch_costs"""
+        return {name: getattr(self, name) for name in BATCH_PARAMETERS}
+
+BATCH_PARAMETERS = ('tasks', 'vcpu', 'memory_gb', 'load_balancers', 'alb_lcu', 'data_transfer_gb', 'log_gb',
+                    'hosted_zones', 'dns_queries_million', 'health_checks', 's3_gb', 's3_requests_thousand')
+
+SCENARIOS = {
+    'development': Scenario(
+        'development', "Desenvolvimento e testes (Free Tier)",
+        extras=(
             CostItem("AWS Free Tier", "Desenvolvimento e testes", 0.00, notes="12 meses gratuitos"),
             CostItem("ECS Fargate", "750 horas/mês gratuitas", 0.00, notes="Suficiente para desenvolvimento"),
             CostItem("Application Load Balancer", "750 horas/mês gratuitas", 0.00, notes="Primeiro ano"),
             CostItem("CloudWatch Logs", "5GB gratuitos/mês", 0.00, notes="Logs básicos"),
             CostItem("S3", "5GB armazenamento gratuito", 0.00, notes="Para assets estáticos"),
             CostItem("EC2", "750 horas t2.micro/mês", 0.00, notes="Para testes se necessário")
+        )
+    ),
+    'production_basic': Scenario(
+        'production_basic', "Produção básica (baixo tráfego)",
+        tasks=1, vcpu=0.25, memory_gb=0.5, load_balancers=1, alb_lcu=1, data_transfer_gb=10, log_gb=1,
+        hosted_zones=1, s3_gb=1, s3_requests_thousand=100,
+        notes={'ECS Fargate': "24/7 uptime", 'Application Load Balancer': "Com health checks",
+               'Route 53': "DNS personalizado", 'S3': "Assets estáticos"}
+    ),
+    'production_scaled': Scenario(
+        'production_scaled', "Produção escalada (tráfego moderado)",
+        tasks=2, vcpu=0.5, memory_gb=1, load_balancers=1, alb_lcu=2.5, data_transfer_gb=50, log_gb=4,
+        hosted_zones=1, health_checks=2, s3_gb=5, s3_requests_thousand=500,
+        instances=(("RDS", "db.t3.micro", 1, "PostgreSQL para dados persistentes"),
+                   ("ElastiCache", "cache.t3.micro", 1, "Redis para cache de sessões")),
+        notes={'ECS Fargate': "Alta disponibilidade", 'Application Load Balancer': "SSL e múltiplas regras",
+               'S3': "Assets + backups"}
+    ),
+    'enterprise': Scenario(
+        'enterprise', "Enterprise (alto tráfego e disponibilidade)",
+        tasks=4, vcpu=1, memory_gb=2, load_balancers=1, alb_lcu=5, data_transfer_gb=200, log_gb=15,
+        hosted_zones=1, dns_queries_million=1, health_checks=4, s3_gb=50, s3_requests_thousand=2000,
+        instances=(("RDS", "db.t3.small", 2, "PostgreSQL Multi-AZ"),
+                   ("ElastiCache", "cache.t3.small", 2, "Redis cluster")),
+        extras=(
+            CostItem("CloudFront", "CDN global", 10.00, notes="Distribuição de conteúdo"),
+            CostItem("AWS WAF", "Proteção web", 5.00, notes="Segurança adicional"),
+            CostItem("Systems Manager", "Gerenciamento de parâmetros", 2.00, notes="Configurações seguras")
+        ),
+        notes={'ECS Fargate': "Multi-AZ, auto-scaling", 'Route 53': "DNS + health checks + failover"}
+    ),
+}
+
+class AWSCostCalculator:
+    """Calculadora de custos AWS para o projeto"""
+
+    def __init__(self, region: str = "us-east-1", prices: Optional[PriceTable] = None):
+        self.region = region
+        self.currency = "USD"
+        self.prices = prices if prices is not None else PriceTable.default()
+
+    def batch_costs(self, **parameters) -> Dict[str, np.ndarray]:
+        """Custo mensal por serviço para arrays de parâmetros, em uma única passada
+
+        Os parâmetros de BATCH_PARAMETERS são combinados por broadcasting
+        (ex.: tasks com forma (N, 1) e vcpu com forma (1, M) geram N × M
+        configurações); os ausentes valem zero. Retorna um array por serviço
+        e o total em 'total'.
+        """
+        unknown = set(parameters) - set(BATCH_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Parâmetros desconhecidos: {', '.join(sorted(unknown))}")
+        values = dict(zip(BATCH_PARAMETERS, np.broadcast_arrays(
+            *(np.asarray(parameters.get(name, 0), dtype=np.float64) for name in BATCH_PARAMETERS)
+        )))
+        prices = self.prices
+        hours = prices.hours_per_month
+
+        costs = {
+            "ECS Fargate": values['tasks'] * hours * (
+                values['vcpu'] * prices.fargate_vcpu_hour + values['memory_gb'] * prices.fargate_gb_hour),
+            "Application Load Balancer": hours * (
+                values['load_balancers'] * prices.alb_hour + values['alb_lcu'] * prices.alb_lcu_hour),
+            "CloudWatch Logs": values['log_gb'] * (prices.logs_ingest_gb + prices.logs_storage_gb),
+            "Route 53": (values['hosted_zones'] * prices.route53_hosted_zone
+                         + values['dns_queries_million'] * prices.route53_queries_million
+                         + values['health_checks'] * prices.route53_health_check),
+            "Data Transfer": np.maximum(values['data_transfer_gb'] - prices.data_transfer_free_gb, 0)
+                             * prices.data_transfer_gb,
+            "S3": values['s3_gb'] * prices.s3_storage_gb + values['s3_requests_thousand'] * prices.s3_requests_thousand,
+        }
+        costs['total'] = sum(costs.values())
+        return costs
+
+    def instance_cost(self, instance_type: str, count: int = 1) -> float:
+        """Custo mensal de instâncias gerenciadas (RDS, ElastiCache) pela tabela de preços"""
+        try:
+            return self.prices.instance_hour[instance_type] * self.prices.hours_per_month * count
+        except KeyError:
+            raise ValueError(f"Tipo de instância sem preço na tabela: {instance_type}")
+
+    def scenario_costs(self, scenario: Scenario) -> List[CostItem]:
+        """Itens de custo de um cenário qualquer"""
+        costs = self.batch_costs(**scenario.parameters())
+        descriptions = {
+            "ECS Fargate": f"{scenario.tasks:g} task(s), {scenario.vcpu:g} vCPU, {scenario.memory_gb:g}GB RAM cada",
+            "Application Load Balancer": f"{scenario.load_balancers:g} ALB, ~{scenario.alb_lcu:g} LCU/hora",
+            "CloudWatch Logs": f"~{scenario.log_gb:g}GB/mês de logs",
+            "Route 53": f"{scenario.hosted_zones:g} hosted zone(s), {scenario.health_checks:g} health check(s)",
+            "Data Transfer": f"~{scenario.data_transfer_gb:g}GB/mês de saída",
+            "S3": f"{scenario.s3_gb:g}GB armazenamento + requests",
+        }
+        items = [
+            CostItem(service, descriptions[service], round(float(costs[service]), 2),
+                     notes=scenario.notes.get(service, ""))
+            for service in descriptions if costs[service] > 0
         ]
-    
+        for service, instance_type, count, description in scenario.instances:
+            items.append(CostItem(service, f"{count}x {instance_type}", round(self.instance_cost(instance_type, count), 2),
+                                  notes=description))
+        items.extend(scenario.extras)
+        return items
+
+    def get_development_costs(self) -> List[CostItem]:
+        """Custos de desenvolvimento (Free Tier)"""
+        return self.scenario_costs(SCENARIOS['development'])
+
     def get_production_costs_basic(self) -> List[CostItem]:
         """Custos de produção - configuração básica"""
-        return [
-            CostItem("ECS Fargate", "1 task, 0.25 vCPU, 0.5GB RAM", 8.50, notes="24/7 uptime"),
-            CostItem("Application Load Balancer", "Básico com health checks", 16.20, notes="Inclui 1 LCU/hora"),
-            CostItem("CloudWatch Logs", "Logs da aplicação", 0.50, notes="~1GB/mês"),
-            CostItem("Route 53", "Hosted zone + queries", 0.50, notes="DNS personalizado"),
-            CostItem("Data Transfer", "Tráfego de saída", 1.00, notes="~10GB/mês"),
-            CostItem("S3", "Assets estáticos", 0.30, notes="1GB armazenamento + requests")
-        ]
-    
+        return self.scenario_costs(SCENARIOS['production_basic'])
+
     def get_production_costs_scaled(self) -> List[CostItem]:
         """Custos de produção - configuração escalada"""
-        return [
-            CostItem("ECS Fargate", "2 tasks, 0.5 vCPU, 1GB RAM cada", 34.00, notes="Alta disponibilidade"),
-            CostItem("Application Load Balancer", "Com SSL e múltiplas regras", 18.50, notes="2-3 LCU/hora"),
-            CostItem("CloudWatch Logs", "Logs detalhados + métricas", 2.00, notes="~4GB/mês"),
-            CostItem("Route 53", "Hosted zone + health checks", 1.50, notes="DNS + monitoramento"),
-            CostItem("Data Transfer", "Tráfego moderado", 5.00, notes="~50GB/mês"),
-            CostItem("S3", "Assets + backups", 1.00, notes="5GB + versionamento"),
-            CostItem("RDS", "db.t3.micro PostgreSQL", 12.50, notes="Para dados persistentes"),
-            CostItem("ElastiCache", "cache.t3.micro Redis", 11.50, notes="Cache de sessões")
-        ]
-    
+        return self.scenario_costs(SCENARIOS['production_scaled'])
+
     def get_enterprise_costs(self) -> List[CostItem]:
         """Custos enterprise - configuração completa"""
-        return [
-            CostItem("ECS Fargate", "4 tasks, 1 vCPU, 2GB RAM cada", 136.00, notes="Multi-AZ, auto-scaling"),
-            CostItem("Application Load Balancer", "Multi-AZ com WAF", 25.00, notes="5+ LCU/hora + WAF"),
-            CostItem("CloudWatch", "Logs + métricas + dashboards", 8.00, notes="Monitoramento completo"),
-            CostItem("Route 53", "DNS + health checks + failover", 3.00, notes="DNS avançado"),
-            CostItem("Data Transfer", "Tráfego alto", 20.00, notes="~200GB/mês"),
-            CostItem("S3", "Multi-class storage", 5.00, notes="IA + Glacier para backups"),
-            CostItem("RDS", "db.t3.small Multi-AZ", 35.00, notes="Alta disponibilidade"),
-            CostItem("ElastiCache", "cache.t3.small cluster", 25.00, notes="Redis cluster"),
-            CostItem("CloudFront", "CDN global", 10.00, notes="Distribuição de conteúdo"),
-            CostItem("AWS WAF", "Proteção web", 5.00, notes="Segurança adicional"),
-            CostItem("Systems Manager", "Gerenciamento de parâmetros", 2.00, notes="Configurações seguras")
-        ]
-    
+        return self.scenario_costs(SCENARIOS['enterprise'])
+
     def calculate_total(self, cost_items: List[CostItem]) -> float:
         """Calcula o total de uma lista de itens de custo"""
         return sum(item.monthly_cost for item in cost_items)
-    
-    def generate_cost_report(self) -> Dict[str, Any]:
+
+    def scenario_report(self, scenario: Scenario) -> Dict[str, Any]:
+        """Seção do relatório para um cenário"""
+        items = self.scenario_costs(scenario)
+        monthly_total = self.calculate_total(items)
+        return {
+            "description": scenario.description,
+            "monthly_total": monthly_total,
+            "annual_total": monthly_total * 12,
+            "items": [
+                {
+                    "service": item.service,
+                    "description": item.description,
+                    "monthly_cost": item.monthly_cost,
+                    "notes": item.notes
+                } for item in items
+            ]
+        }
+
+    def generate_cost_report(self, scenarios: Optional[Dict[str, Scenario]] = None) -> Dict[str, Any]:
         """Gera relatório completo de custos"""
-        dev_costs = self.get_development_costs()
-        prod_basic_costs = self.get_production_costs_basic()
-        prod_scaled_costs = self.get_production_costs_scaled()
-        enterprise_costs = self.get_enterprise_costs()
-        
+        scenarios = scenarios if scenarios is not None else SCENARIOS
         return {
             "generated_at": datetime.now().isoformat(),
             "currency": self.currency,
             "region": self.region,
-            "scenarios": {
-                "development": {
-                    "description": "Desenvolvimento e testes (Free Tier)",
-                    "monthly_total": self.calculate_total(dev_costs),
-                    "annual_total": self.calculate_total(dev_costs) * 12,
-                    "items": [
-                        {
-                            "service": item.service,
-                            "description": item.description,
-                            "monthly_cost": item.monthly_cost,
-                            "notes": item.notes
-                        } for item in dev_costs
-                    ]
-                },
-                "production_basic": {
-                    "description": "Produção básica (baixo tráfego)",
-                    "monthly_total": self.calculate_total(prod_basic_costs),
-                    "annual_total": self.calculate_total(prod_basic_costs) * 12,
-                    "items": [
-                        {
-                            "service": item.service,
-                            "description": item.description,
-                            "monthly_cost": item.monthly_cost,
-                            "notes": item.notes
-                        } for item in prod_basic_costs
-                    ]
-                },
-                "production_scaled": {
-                    "description": "Produção escalada (tráfego moderado)",
-                    "monthly_total": self.calculate_total(prod_scaled_costs),
-                    "annual_total": self.calculate_total(prod_scaled_costs) * 12,
-                    "items": [
-                        {
-                            "service": item.service,
-                            "description": item.description,
-                            "monthly_cost": item.monthly_cost,
-                            "notes": item.notes
-                        } for item in prod_scaled_costs
-                    ]
-                },
-                "enterprise": {
-                    "description": "Enterprise (alto tráfego e disponibilidade)",
-                    "monthly_total": self.calculate_total(enterprise_costs),
-                    "annual_total": self.calculate_total(enterprise_costs) * 12,
-                    "items": [
-                        {
-                            "service": item.service,
-                            "description": item.description,
-                            "monthly_cost": item.monthly_cost,
-                            "notes": item.notes
-                        } for item in enterprise_costs
-                    ]
-                }
-            },
+            "prices": asdict(self.prices),
+            "scenarios": {name: self.scenario_report(scenario) for name, scenario in scenarios.items()},
             "recommendations": [
                 "Comece com o cenário de desenvolvimento usando Free Tier",
                 "Para produção inicial, use a configuração básica",
@@ -154,19 +275,54 @@ class AWSCostCalculator:
             ]
         }
 
-if __name__ == "__main__":
+def markdown_report(report: Dict[str, Any]) -> str:
+    """Cenários do relatório em Markdown (tabelas e comparativo do COST_ANALYSIS.md)"""
+    lines = []
+    for scenario in report["scenarios"].values():
+        lines += [
+            f"### {scenario['description']}",
+            f"**Custo mensal: ${scenario['monthly_total']:,.2f}**",
+            f"**Custo anual: ${scenario['annual_total']:,.2f}**",
+            "",
+            "| Serviço | Custo/mês | Descrição | Observações |",
+            "|---------|-----------|-----------|-------------|",
+        ]
+        lines += [f"| {item['service']} | ${item['monthly_cost']:,.2f} | {item['description']} | {item['notes']} |"
+                  for item in scenario["items"]]
+        lines += ["", "---", ""]
+
+    width = max(len(scenario["description"]) for scenario in report["scenarios"].values()) + 2
+    lines += ["### 📈 Comparativo de Cenários", "", "```"]
+    lines += [f"{scenario['description'] + ':':<{width}} {'$' + format(scenario['monthly_total'], ',.2f'):>9}/mês"
+              for scenario in report["scenarios"].values()]
+    lines.append("```")
+    return "\n".join(lines) + "\n"
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Relatório de custos dos cenários do AWS Chatbot")
+    parser.add_argument('--markdown', action='store_true',
+                        help="Imprime as tabelas em Markdown (seção gerada do COST_ANALYSIS.md)")
+    args = parser.parse_args(argv)
+
     calculator = AWSCostCalculator()
     report = calculator.generate_cost_report()
-    
+
+    if args.markdown:
+        print(markdown_report(report), end="")
+        return
+
     print("=== RELATÓRIO DE CUSTOS AWS CHATBOT ===\n")
-    
+
     for scenario_name, scenario_data in report["scenarios"].items():
         print(f"📊 {scenario_data['description'].upper()}")
         print(f"💰 Custo mensal: ${scenario_data['monthly_total']:.2f}")
         print(f"💰 Custo anual: ${scenario_data['annual_total']:.2f}")
         print()
-        
+
         for item in scenario_data['items']:
             if item['monthly_cost'] > 0:
                 print(f"  • {item['service']}: ${item['monthly_cost']:.2f}/mês - {item['description']}")
-        print("\n" + "="*50 + "\n")
\ No newline at end of file
+        print("\n" + "="*50 + "\n")
+
+if __name__ == "__main__":
+    main()
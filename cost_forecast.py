@@ -0,0 +1,161 @@
+"""
+Previsão e detecção de anomalias de custos
+Todas as séries (ex.: serviço × região) ficam em uma matriz séries × dias e
+cada cálculo é uma operação NumPy sobre a matriz inteira; só há laços sobre
+dias da semana ou passos de tempo, nunca sobre séries.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from cost_explorer import CostTable
+
+# Desvio padrão mínimo (na moeda da conta) para séries constantes
+MIN_STD = 0.01
+# Acima deste número de combinações possíveis as séries são numeradas por ordenação
+DENSE_COMBINATIONS = 1 << 22
+
+@dataclass
+class Anomaly:
+    """Dia em que o custo de uma série ficou muito acima do esperado"""
+    label: str
+    day: date
+    amount: float
+    expected: float
+    score: float
+
+    @property
+    def excess(self) -> float:
+        return self.amount - self.expected
+
+def series_matrix(table: CostTable, by: Sequence[str] = ('service', 'region')) -> Tuple[List[str], np.ndarray]:
+    """Agrupa a tabela em séries diárias: (rótulos, matriz séries × dias)
+
+    Séries sem nenhum custo no período são descartadas.
+    """
+    index = np.zeros(len(table), dtype=np.int64)
+    sizes = [len(table.dictionaries[dimension]) for dimension in by]
+    for dimension, size in zip(by, sizes):
+        index = index * size + table.codes[dimension]
+    # Só as combinações presentes viram linhas da matriz; com poucas combinações
+    # possíveis a renumeração por contagem evita ordenar todas as linhas
+    total = int(np.prod(sizes, dtype=np.int64))
+    if total <= DENSE_COMBINATIONS:
+        present = np.bincount(index, minlength=total) > 0
+        combinations = np.flatnonzero(present)
+        rows = (np.cumsum(present) - 1)[index]
+    else:
+        combinations, rows = np.unique(index, return_inverse=True)
+    flat = rows.reshape(-1) * table.num_days + table.codes['day']
+    matrix = np.bincount(flat, weights=table.amount, minlength=len(combinations) * table.num_days)
+    matrix = matrix.reshape(len(combinations), table.num_days)
+
+    keep = np.flatnonzero(matrix.any(axis=1))
+    labels = []
+    for combination in combinations[keep]:
+        names = []
+        for dimension, size in reversed(list(zip(by, sizes))):
+            combination, code = divmod(int(combination), size)
+            names.append(table.dictionaries[dimension][code])
+        labels.append(names[-1] if len(names) == 1 else f"{names[-1]} ({', '.join(reversed(names[:-1]))})")
+    return labels, matrix[keep]
+
+def rolling_mean(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Média móvel dos últimos `window` dias; as primeiras colunas usam os dias disponíveis"""
+    cumulative = np.cumsum(matrix, axis=1)
+    shifted = np.zeros_like(cumulative)
+    shifted[:, window:] = cumulative[:, :-window]
+    counts = np.minimum(np.arange(1, matrix.shape[1] + 1), window)
+    return (cumulative - shifted) / counts
+
+def weekday_adjust(matrix: np.ndarray, weekdays: np.ndarray, history: int = None) -> np.ndarray:
+    """Remove o efeito do dia da semana de cada série (sazonalidade aditiva)
+
+    O efeito é estimado nas primeiras `history` colunas, para que os dias
+    avaliados não contaminem a própria linha de base.
+    """
+    reference = matrix[:, :history]
+    reference_days = weekdays[:reference.shape[1]]
+    overall = reference.mean(axis=1, keepdims=True)
+    effect = np.zeros((matrix.shape[0], 7))
+    for weekday in range(7):
+        columns = reference_days == weekday
+        if columns.any():
+            effect[:, weekday] = reference[:, columns].mean(axis=1) - overall[:, 0]
+    return matrix - effect[:, weekdays]
+
+def anomaly_scores(matrix: np.ndarray, weekdays: np.ndarray, window: int = 28,
+                   days: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """Z-scores dos últimos `days` dias contra os `window` dias anteriores a cada um
+
+    Retorna (scores, esperado), ambos séries × days, já ajustados pelo dia da semana.
+    Só são avaliados dias com `window` dias completos de histórico antes deles:
+    com menos, a linha de base não existe e os z-scores seriam inventados.
+    """
+    num_days = matrix.shape[1]
+    days = max(min(days, num_days - window), 0)
+    history = num_days - days
+    if not days:
+        empty = np.zeros((matrix.shape[0], 0))
+        return empty, empty
+    adjusted = weekday_adjust(matrix, weekdays, history=history)
+    effect = matrix - adjusted
+
+    cumulative = np.concatenate([np.zeros((matrix.shape[0], 1)), np.cumsum(adjusted, axis=1)], axis=1)
+    squares = np.concatenate([np.zeros((matrix.shape[0], 1)), np.cumsum(adjusted ** 2, axis=1)], axis=1)
+    evaluated = np.arange(history, num_days)
+    starts = np.maximum(evaluated - window, 0)
+    counts = evaluated - starts
+    mean = (cumulative[:, evaluated] - cumulative[:, starts]) / counts
+    variance = (squares[:, evaluated] - squares[:, starts]) / counts - mean ** 2
+    std = np.maximum(np.sqrt(np.maximum(variance, 0)), MIN_STD)
+
+    scores = (adjusted[:, evaluated] - mean) / std
+    return scores, mean + effect[:, evaluated]
+
+def detect_anomalies(labels: List[str], matrix: np.ndarray, start: date, window: int = 28, days: int = 7,
+                     threshold: float = 3.0, min_excess: float = 1.0) -> List[Anomaly]:
+    """Dias com z-score acima de `threshold` e ao menos `min_excess` acima do esperado"""
+    if matrix.shape[1] < 2 or not len(labels):
+        return []
+    weekdays = (start.weekday() + np.arange(matrix.shape[1])) % 7
+    scores, expected = anomaly_scores(matrix, weekdays, window=window, days=days)
+    first = matrix.shape[1] - scores.shape[1]
+    actual = matrix[:, first:]
+    series, columns = np.nonzero((scores >= threshold) & (actual - expected >= min_excess))
+    anomalies = [
+        Anomaly(labels[row], date.fromordinal(start.toordinal() + first + int(column)),
+                float(actual[row, column]), float(expected[row, column]), float(scores[row, column]))
+        for row, column in zip(series, columns)
+    ]
+    return sorted(anomalies, key=lambda anomaly: (-anomaly.excess, anomaly.label))
+
+def linear_forecast(matrix: np.ndarray, horizon: int, window: int = 28) -> np.ndarray:
+    """Regressão linear dos últimos `window` dias de cada série, projetada `horizon` dias"""
+    recent = matrix[:, -window:]
+    x = np.arange(recent.shape[1], dtype=np.float64)
+    x_mean = x.mean()
+    y_mean = recent.mean(axis=1, keepdims=True)
+    denominator = ((x - x_mean) ** 2).sum()
+    slope = ((recent - y_mean) * (x - x_mean)).sum(axis=1, keepdims=True) / denominator if denominator else 0
+    future = np.arange(recent.shape[1], recent.shape[1] + horizon)
+    return np.maximum(y_mean + slope * (future - x_mean), 0)
+
+def holt_forecast(matrix: np.ndarray, horizon: int, alpha: float = 0.3, beta: float = 0.1) -> np.ndarray:
+    """Suavização exponencial dupla (Holt), atualizando todas as séries a cada dia"""
+    level = matrix[:, 0].astype(np.float64)
+    trend = np.zeros_like(level)
+    for column in range(1, matrix.shape[1]):
+        previous = level
+        level = alpha * matrix[:, column] + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous) + (1 - beta) * trend
+    steps = np.arange(1, horizon + 1)
+    return np.maximum(level[:, None] + trend[:, None] * steps, 0)
+
+FORECASTERS = {
+    'linear': linear_forecast,
+    'holt': holt_forecast,
+}
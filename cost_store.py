@@ -0,0 +1,140 @@
+"""
+Histórico de custos em disco (SQLite)
+Dias fechados não mudam no Cost Explorer, então cada dia é baixado uma única
+vez e guardado localmente. A sincronização incremental busca apenas os dias
+que faltam e os últimos `mutable_days` dias, que a AWS ainda pode ajustar.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, List, Optional, Set, Tuple
+
+# cost_explorer (e o NumPy) só é importado na primeira consulta de custos
+if TYPE_CHECKING:
+    from cost_explorer import CostTable
+
+# Arquivo do histórico; em contêineres aponte para um volume persistente (EFS em infrastructure/efs.tf)
+COST_HISTORY_DB = os.environ.get('COST_HISTORY_DB', 'cost_history.db')
+# WAL exige memória compartilhada local: em volumes de rede (EFS/NFS) use DELETE
+COST_HISTORY_JOURNAL = os.environ.get('COST_HISTORY_JOURNAL', 'WAL')
+# Dias recentes rebuscados a cada sincronização (a AWS ajusta os custos por até ~72h)
+COST_MUTABLE_DAYS = int(os.environ.get('COST_MUTABLE_DAYS', '3'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_cost (
+    day TEXT NOT NULL,
+    account TEXT NOT NULL,
+    service TEXT NOT NULL,
+    region TEXT NOT NULL,
+    amount REAL NOT NULL,
+    currency TEXT NOT NULL,
+    PRIMARY KEY (day, account, service, region)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS synced_day (
+    day TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+class CostStore:
+    """Custos diários por serviço × região × conta persistidos em SQLite"""
+
+    def __init__(self, path: str = None, mutable_days: int = COST_MUTABLE_DAYS, journal_mode: str = None):
+        self.path = path or COST_HISTORY_DB
+        self.mutable_days = mutable_days
+        self.journal_mode = journal_mode or COST_HISTORY_JOURNAL
+        self._lock = threading.Lock()
+        # Sincronizações simultâneas (requisição e backfill) não buscam os mesmos dias
+        self._sync_lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        # Aberta no primeiro uso: importar o app não cria o arquivo
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(f'PRAGMA journal_mode={self.journal_mode}')
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def synced_days(self, start: date, end: date) -> Set[date]:
+        """Dias de [start, end) já gravados"""
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT day FROM synced_day WHERE day >= ? AND day < ?',
+                (start.isoformat(), end.isoformat())
+            ).fetchall()
+        return {date.fromisoformat(day) for (day,) in rows}
+
+    def stale_ranges(self, start: date, end: date, today: Optional[date] = None) -> List[Tuple[date, date]]:
+        """Intervalos [início, fim) a buscar: dias ausentes e dias ainda mutáveis"""
+        mutable_from = (today or date.today()) - timedelta(days=self.mutable_days)
+        synced = self.synced_days(start, end)
+
+        def stale(day):
+            return day not in synced or day >= mutable_from
+
+        ranges = []
+        day = start
+        while day < end:
+            if not stale(day):
+                day += timedelta(days=1)
+                continue
+            range_start = day
+            while day < end and stale(day):
+                day += timedelta(days=1)
+            ranges.append((range_start, day))
+        return ranges
+
+    def replace_days(self, start: date, end: date, rows, currency: str = 'USD'):
+        """Substitui os dias [start, end) pelas linhas dadas e os marca como sincronizados"""
+        bounds = (start.isoformat(), end.isoformat())
+        now = time.time()
+        days = [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days)]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM daily_cost WHERE day >= ? AND day < ?', bounds)
+                conn.executemany(
+                    'INSERT INTO daily_cost (day, service, region, account, amount, currency) VALUES (?, ?, ?, ?, ?, ?)',
+                    (row + (currency,) for row in rows)
+                )
+                conn.executemany('INSERT OR REPLACE INTO synced_day (day, synced_at) VALUES (?, ?)',
+                                 ((day, now) for day in days))
+
+    def sync(self, ce_client, start: date, end: date, today: Optional[date] = None) -> int:
+        """Busca no Cost Explorer só o necessário; retorna quantos dias foram buscados"""
+        from cost_explorer import fetch_cost_rows
+
+        fetched = 0
+        with self._sync_lock:
+            for range_start, range_end in self.stale_ranges(start, end, today):
+                rows, currency = fetch_cost_rows(ce_client, range_start, range_end)
+                self.replace_days(range_start, range_end, rows, currency)
+                fetched += (range_end - range_start).days
+        return fetched
+
+    def load(self, start: date, end: date) -> 'CostTable':
+        """Monta a tabela colunar do período a partir do histórico local"""
+        from cost_explorer import CostTable
+
+        bounds = (start.isoformat(), end.isoformat())
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                'SELECT day, service, region, account, amount FROM daily_cost WHERE day >= ? AND day < ?',
+                bounds
+            ).fetchall()
+            currency = conn.execute(
+                'SELECT currency FROM daily_cost WHERE day >= ? AND day < ? LIMIT 1', bounds
+            ).fetchone()
+        return CostTable.from_rows(start, end, rows, currency[0] if currency else 'USD')
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,103 @@
+"""
+Inventário EC2 multi-região com consultas concorrentes e paginadas
+"""
+
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from pagination import paginate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = int(os.environ.get('EC2_MAX_WORKERS', '16'))
+
+class Instance(NamedTuple):
+    """Instância EC2 com apenas os campos exibidos (tupla, sem __dict__ por instância)"""
+    id: str
+    type: str
+    state: str
+    launch_time: datetime
+    region: str
+    # Tag Name e todas as tags como pares (chave, valor)
+    name: str = ''
+    tags: Tuple[Tuple[str, str], ...] = ()
+
+@dataclass
+class RegionResult:
+    """Resultado da consulta de uma região"""
+    region: str
+    instances: List[Instance] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+@dataclass
+class EC2Inventory:
+    """Inventário consolidado de todas as regiões consultadas"""
+    regions: List[RegionResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    
+    @property
+    def instances(self) -> List[Instance]:
+        return [instance for result in self.regions for instance in result.instances]
+    
+    @property
+    def failed(self) -> List[RegionResult]:
+        return [result for result in self.regions if result.error]
+
+class InventoryError(Exception):
+    """Todas as regiões consultadas falharam"""
+
+    def __init__(self, inventory: EC2Inventory):
+        self.inventory = inventory
+        super().__init__(inventory.failed[0].error)
+
+def list_enabled_regions(ec2_client) -> List[str]:
+    """Lista as regiões habilitadas na conta (opt-in desativadas ficam de fora)"""
+    response = ec2_client.describe_regions(AllRegions=False)
+    return sorted(region['RegionName'] for region in response['Regions'])
+
+def describe_region(ec2_client, region: str) -> RegionResult:
+    """Percorre todas as páginas de describe_instances de uma região"""
+    result = RegionResult(region=region)
+    start = time.perf_counter()
+    try:
+        for page in paginate(ec2_client.describe_instances, 'NextToken', MaxResults=1000):
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    # Tipos, estados e chaves de tag se repetem em milhares de instâncias: uma cópia de cada string
+                    tags = tuple((sys.intern(tag['Key']), tag['Value']) for tag in instance.get('Tags', ()))
+                    name = next((value for key, value in tags if key == 'Name'), '')
+                    result.instances.append(Instance(instance['InstanceId'], sys.intern(instance['InstanceType']),
+                                                     sys.intern(instance['State']['Name']),
+                                                     instance['LaunchTime'], region, name, tags))
+    except Exception as e:
+        # Uma região com falha não deve derrubar o inventário inteiro
+        logger.warning("Falha ao listar instâncias em %s: %s", region, e)
+        result.instances = []
+        result.error = str(e)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def collect_inventory(client_for_region: Callable[[str], Any], regions: List[str],
+                      max_workers: Optional[int] = None,
+                      on_region: Optional[Callable[[RegionResult], None]] = None) -> EC2Inventory:
+    """Consulta todas as regiões em paralelo; a latência total é a da região mais lenta"""
+    inventory = EC2Inventory()
+    start = time.perf_counter()
+    workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(regions)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ec2-region') as pool:
+        futures = [pool.submit(describe_region, client_for_region(region), region) for region in regions]
+        for future in as_completed(futures):
+            result = future.result()
+            inventory.regions.append(result)
+            if on_region:
+                on_region(result)
+    inventory.regions.sort(key=lambda result: result.region)
+    inventory.elapsed = time.perf_counter() - start
+    return inventory
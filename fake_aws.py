@@ -0,0 +1,379 @@
+"""
+AWS local e determinística para testes de desempenho
+Simula as APIs de S3, EC2, Cost Explorer e STS usadas por AWSServices com contas
+sintéticas em escala (milhões de chaves S3, milhares de instâncias, anos de
+custo diário). Os dados são gerados sob demanda a partir de um seed, as
+respostas paginam como as APIs reais e cada chamada pode ter latência e
+erros de throttling injetados.
+
+Uso: AWSServices(clients=ClientPool(factory=FakeAWS().client))
+"""
+
+import functools
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+from botocore.hooks import HierarchicalEmitter
+
+STORAGE_CLASSES = ('STANDARD',) * 70 + ('STANDARD_IA',) * 20 + ('GLACIER',) * 9 + ('DEEP_ARCHIVE',)
+INSTANCE_TYPES = ('t3.micro', 't3.small', 't3.medium', 'm5.large', 'm5.xlarge', 'c5.large', 'r5.large')
+INSTANCE_ROLES = ('web', 'api', 'worker', 'batch')
+SERVICES = ('Amazon Elastic Compute Cloud - Compute', 'Amazon Simple Storage Service', 'AWS Lambda',
+            'Amazon Relational Database Service', 'Amazon CloudFront', 'Amazon DynamoDB',
+            'Elastic Load Balancing', 'Amazon CloudWatch', 'Amazon ElastiCache', 'AWS Key Management Service',
+            'Amazon Route 53', 'Amazon Elastic Container Service')
+THROTTLING_CODES = {'s3': 'SlowDown', 'ec2': 'RequestLimitExceeded', 'ce': 'ThrottlingException', 'sts': 'Throttling'}
+
+def _stable_hash(*parts) -> int:
+    """Hash estável entre processos (o hash() de str muda a cada execução)"""
+    return zlib.crc32('|'.join(str(part) for part in parts).encode())
+
+@dataclass
+class FakeAccount:
+    """Tamanho da conta sintética"""
+    seed: int = 0
+    # bucket -> número de objetos
+    buckets: Dict[str, int] = field(default_factory=lambda: {
+        'app-logs': 1_000_000, 'static-assets': 20_000, 'backups': 2_500, 'empty-bucket': 0
+    })
+    # prefixos de primeiro nível por bucket; ~2% dos objetos ficam na raiz
+    prefixes: int = 16
+    # região habilitada -> número de instâncias
+    regions: Dict[str, int] = field(default_factory=lambda: {
+        'us-east-1': 2000, 'us-west-2': 1000, 'eu-west-1': 500, 'sa-east-1': 500
+    })
+    accounts: Tuple[str, ...] = ('111111111111', '222222222222', '333333333333')
+    services: Tuple[str, ...] = SERVICES
+    cost_days: int = 3 * 365
+    today: date = field(default_factory=date.today)
+
+    @property
+    def instance_count(self) -> int:
+        return sum(self.regions.values())
+
+class _Segment:
+    """Faixa contínua de chaves ordenadas: key(i) = prefixo + formato(i)"""
+
+    def __init__(self, directory: str, template: str, count: int, salt: int):
+        self.directory = directory
+        self.template = template
+        self.count = count
+        self.salt = salt
+
+    def key(self, index: int) -> str:
+        return self.directory + self.template.format(index)
+
+    def _bisect(self, target: str) -> int:
+        """Primeiro índice com key(i) >= target"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def range(self, prefix: str) -> Tuple[int, int]:
+        """Índices [início, fim) das chaves que começam com prefix"""
+        if not prefix:
+            return 0, self.count
+        return self._bisect(prefix), self._bisect(prefix + '\U0010ffff')
+
+    def obj(self, index: int) -> Dict:
+        mixed = index * 2654435761 + self.salt
+        return {
+            'Key': self.key(index),
+            'Size': 1 + mixed % 2_000_000,
+            'StorageClass': STORAGE_CLASSES[mixed % len(STORAGE_CLASSES)],
+            'LastModified': datetime(2024, 1, 1) + timedelta(seconds=index),
+        }
+
+class _FakeBucket:
+    def __init__(self, name: str, objects: int, prefixes: int, seed: int):
+        root = objects // 50 if prefixes else objects
+        per_prefix, extra = divmod(objects - root, prefixes) if prefixes else (0, 0)
+        salt = _stable_hash(seed, name)
+        # 'index-' < 'part-': a ordem dos segmentos é a ordem lexicográfica das chaves
+        self.segments = [_Segment('', 'index-{:07d}.html', root, salt)]
+        self.segments += [_Segment(f'part-{number:02d}/', 'obj-{:09d}', per_prefix + (number < extra), salt + number)
+                          for number in range(prefixes)]
+        self.created = datetime(2020, 1, 1) + timedelta(days=salt % 1000)
+
+    def count(self, prefix: str = '') -> int:
+        total = 0
+        for segment in self.segments:
+            start, end = segment.range(prefix)
+            total += end - start
+        return total
+
+class FakeAWS:
+    """Fábrica de clientes falsos compatível com ClientPool(factory=...)"""
+
+    def __init__(self, account: Optional[FakeAccount] = None, latency: float = 0.0, jitter: float = 0.0,
+                 throttle_rate: float = 0.0, seed: int = 0):
+        self.account = account if account is not None else FakeAccount()
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = Counter()
+        self.throttled = Counter()
+        self._buckets = {name: _FakeBucket(name, objects, self.account.prefixes, self.account.seed)
+                         for name, objects in self.account.buckets.items()}
+
+    def client(self, service: str, region: str = None):
+        region = region or 'us-east-1'
+        clients = {'s3': FakeS3, 'ec2': FakeEC2, 'ce': FakeCostExplorer, 'sts': FakeSTS}
+        return clients[service](self, region)
+
+    def call(self, service: str, operation: str):
+        """Contabiliza a chamada, aplica a latência e, por sorteio, o throttling"""
+        name = f'{service}.{operation}'
+        with self._lock:
+            self.calls[name] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            throttle = self.throttle_rate and self._random.random() < self.throttle_rate
+            if throttle:
+                self.throttled[name] += 1
+        if delay > 0:
+            time.sleep(delay)
+        if throttle:
+            raise ClientError({'Error': {'Code': THROTTLING_CODES[service], 'Message': 'Rate exceeded'}}, operation)
+
+    def bucket(self, name: str) -> _FakeBucket:
+        try:
+            return self._buckets[name]
+        except KeyError:
+            raise ClientError({'Error': {'Code': 'NoSuchBucket', 'Message': 'The specified bucket does not exist'}},
+                              'ListObjectsV2')
+
+    def expected_objects(self, bucket: str, prefix: str = '') -> int:
+        """Número de objetos que uma listagem completa deve encontrar"""
+        return self.bucket(bucket).count(prefix)
+
+    def daily_cost(self, account: str, service: str, region: str, day: date) -> float:
+        """Custo determinístico de uma série em um dia (0 se fora do histórico)"""
+        offset = (day - (self.account.today - timedelta(days=self.account.cost_days))).days
+        if offset < 0 or day >= self.account.today:
+            return 0.0
+        series = _stable_hash(self.account.seed, account, service, region)
+        base = 0.5 + (series % 5000) / 100
+        weekday = 1.0 if day.weekday() < 5 else 0.6
+        trend = 1 + 0.0005 * offset
+        noise = 0.95 + (_stable_hash(series, offset) % 1000) / 10000
+        return round(base * weekday * trend * noise, 6)
+
+    def cost_series(self, account: str) -> List[Tuple[str, str]]:
+        """(serviço, região) com custo em uma conta: cada serviço em até 3 regiões"""
+        regions = sorted(self.account.regions) + ['global']
+        series = []
+        for service in self.account.services:
+            mixed = _stable_hash(self.account.seed, account, service)
+            for step in range(1 + mixed % 3):
+                series.append((service, regions[(mixed + step) % len(regions)]))
+        return sorted(set(series))
+
+def _operation(name: str):
+    """Marca um método como operação da API: conta, aplica latência/throttling e
+    emite os eventos before-*/after-call do botocore (usados por metrics.py)"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, **kwargs):
+            event = f'{self.service_id}.{name}'
+            context = {}
+            self.meta.events.emit(f'before-parameter-build.{event}', params=kwargs, context=context)
+            self.meta.events.emit(f'before-call.{event}', params=kwargs, context=context)
+            try:
+                self.aws.call(self.service, name)
+                response = method(self, **kwargs)
+            except ClientError as e:
+                self.meta.events.emit(f'after-call.{event}', http_response=SimpleNamespace(status_code=400),
+                                      parsed=e.response, context=context)
+                raise
+            self.meta.events.emit(f'after-call.{event}', http_response=SimpleNamespace(status_code=200),
+                                  parsed=response, context=context)
+            return response
+        return wrapper
+    return decorator
+
+class _FakeClient:
+    service = ''
+    service_id = ''
+
+    def __init__(self, aws: FakeAWS, region: str):
+        self.aws = aws
+        self.meta = SimpleNamespace(region_name=region, events=HierarchicalEmitter())
+
+class FakeS3(_FakeClient):
+    service = 's3'
+    service_id = 's3'
+
+    @_operation('ListBuckets')
+    def list_buckets(self, **kwargs):
+        return {'Buckets': [{'Name': name, 'CreationDate': bucket.created}
+                            for name, bucket in sorted(self.aws._buckets.items())]}
+
+    @_operation('ListObjectsV2')
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=None, ContinuationToken=None, MaxKeys=1000, **kwargs):
+        bucket = self.aws.bucket(Bucket)
+        max_keys = min(MaxKeys, 1000)
+        segment_index, position = map(int, ContinuationToken.split(':')) if ContinuationToken else (0, 0)
+
+        contents, common_prefixes = [], []
+        while segment_index < len(bucket.segments) and len(contents) + len(common_prefixes) < max_keys:
+            segment = bucket.segments[segment_index]
+            start, end = segment.range(Prefix)
+            if Delimiter == '/' and segment.directory and len(Prefix) < len(segment.directory):
+                # Todas as chaves do segmento se agrupam no prefixo comum
+                if start < end and position == 0:
+                    common_prefixes.append({'Prefix': segment.directory})
+                segment_index, position = segment_index + 1, 0
+                continue
+            index = max(start, position)
+            stop = min(end, index + max_keys - len(contents) - len(common_prefixes))
+            contents.extend(segment.obj(i) for i in range(index, stop))
+            if stop < end:
+                position = stop
+                break
+            segment_index, position = segment_index + 1, 0
+
+        truncated = self._has_more(bucket, Prefix, segment_index, position)
+        response = {'Name': Bucket, 'Prefix': Prefix, 'KeyCount': len(contents) + len(common_prefixes),
+                    'MaxKeys': max_keys, 'IsTruncated': truncated}
+        if contents:
+            response['Contents'] = contents
+        if common_prefixes:
+            response['CommonPrefixes'] = common_prefixes
+        if truncated:
+            response['NextContinuationToken'] = f'{segment_index}:{position}'
+        return response
+
+    @staticmethod
+    def _has_more(bucket, prefix, segment_index, position) -> bool:
+        for segment in bucket.segments[segment_index:]:
+            start, end = segment.range(prefix)
+            if max(start, position) < end:
+                return True
+            position = 0
+        return False
+
+class FakeEC2(_FakeClient):
+    service = 'ec2'
+    service_id = 'ec2'
+
+    @_operation('DescribeRegions')
+    def describe_regions(self, AllRegions=False, **kwargs):
+        return {'Regions': [{'RegionName': region, 'Endpoint': f'ec2.{region}.amazonaws.com'}
+                            for region in sorted(self.aws.account.regions)]}
+
+    @_operation('DescribeInstances')
+    def describe_instances(self, MaxResults=1000, NextToken=None, **kwargs):
+        if not 5 <= MaxResults <= 1000:
+            raise ClientError({'Error': {'Code': 'InvalidParameterValue',
+                                         'Message': 'MaxResults must be between 5 and 1000'}}, 'DescribeInstances')
+        region = self.meta.region_name
+        total = self.aws.account.regions.get(region, 0)
+        start = int(NextToken) if NextToken else 0
+        stop = min(start + MaxResults, total)
+        salt = _stable_hash(self.aws.account.seed, region) & 0xffff
+
+        reservations = [{'ReservationId': f'r-{salt:04x}{index:013x}', 'Instances': [self._instance(salt, index)]}
+                        for index in range(start, stop)]
+        response = {'Reservations': reservations}
+        if stop < total:
+            response['NextToken'] = str(stop)
+        return response
+
+    @staticmethod
+    def _instance(salt: int, index: int) -> Dict:
+        state = 'stopped' if index % 10 == 0 else 'pending' if index % 37 == 0 else 'running'
+        return {
+            'InstanceId': f'i-{salt:04x}{index:013x}',
+            'InstanceType': INSTANCE_TYPES[(index + salt) % len(INSTANCE_TYPES)],
+            'State': {'Name': state},
+            'LaunchTime': datetime(2023, 1, 1) + timedelta(hours=index),
+            'Tags': [{'Key': 'Name', 'Value': f"{INSTANCE_ROLES[index % len(INSTANCE_ROLES)]}-{index}"},
+                     {'Key': 'env', 'Value': 'prod' if index % 3 else 'staging'}],
+        }
+
+class FakeSTS(_FakeClient):
+    service = 'sts'
+    service_id = 'sts'
+
+    @_operation('GetCallerIdentity')
+    def get_caller_identity(self, **kwargs):
+        # A conta de gerenciamento: a primeira da organização sintética
+        account = self.aws.account.accounts[0]
+        return {'UserId': 'AIDAFAKE', 'Account': account, 'Arn': f'arn:aws:iam::{account}:user/chatbot'}
+
+class FakeCostExplorer(_FakeClient):
+    service = 'ce'
+    service_id = 'cost-explorer'
+    # Grupos (dias × grupos) por página; acima disso a resposta traz NextPageToken
+    PAGE_GROUPS = 500
+
+    @_operation('GetCostAndUsage')
+    def get_cost_and_usage(self, TimePeriod, Granularity='DAILY', Metrics=('BlendedCost',), GroupBy=(),
+                           Filter=None, NextPageToken=None, **kwargs):
+        if Granularity != 'DAILY':
+            raise ClientError({'Error': {'Code': 'ValidationException',
+                                         'Message': 'Only DAILY granularity is simulated'}}, 'GetCostAndUsage')
+        keys = [group['Key'] for group in GroupBy]
+        if len(keys) > 2:
+            raise ClientError({'Error': {'Code': 'ValidationException',
+                                         'Message': 'GroupBy supports at most 2 dimensions'}}, 'GetCostAndUsage')
+
+        accounts = list(self.aws.account.accounts)
+        if Filter:
+            accounts = [account for account in accounts if account in Filter['Dimensions']['Values']]
+        start = date.fromisoformat(TimePeriod['Start'])
+        end = date.fromisoformat(TimePeriod['End'])
+        groups = self._groups(accounts, keys)
+        days_per_page = max(1, self.PAGE_GROUPS // max(1, len(groups)))
+        first = int(NextPageToken) if NextPageToken else 0
+        last = min(first + days_per_page, (end - start).days)
+
+        metric = Metrics[0]
+        results = []
+        for offset in range(first, last):
+            day = start + timedelta(days=offset)
+            totals = {}
+            for group_keys, series in groups:
+                amount = sum(self.aws.daily_cost(account, service, region, day) for account, service, region in series)
+                if amount:
+                    totals[tuple(group_keys)] = amount
+            result = {'TimePeriod': {'Start': day.isoformat(), 'End': (day + timedelta(days=1)).isoformat()},
+                      'Estimated': day >= self.aws.account.today - timedelta(days=3)}
+            if keys:
+                result['Groups'] = [{'Keys': list(group_keys),
+                                     'Metrics': {metric: {'Amount': f'{amount:.10f}', 'Unit': 'USD'}}}
+                                    for group_keys, amount in totals.items()]
+                result['Total'] = {}
+            else:
+                result['Total'] = {metric: {'Amount': f'{sum(totals.values()):.10f}', 'Unit': 'USD'}}
+            results.append(result)
+
+        response = {'ResultsByTime': results, 'GroupDefinitions': [dict(group) for group in GroupBy]}
+        if last < (end - start).days:
+            response['NextPageToken'] = str(last)
+        return response
+
+    def _groups(self, accounts, keys):
+        """[(chaves do grupo, [(conta, serviço, região)])] para as dimensões pedidas"""
+        grouped = {}
+        for account in accounts:
+            for service, region in self.aws.cost_series(account):
+                values = {'LINKED_ACCOUNT': account, 'SERVICE': service, 'REGION': region}
+                group_keys = tuple(values[key] for key in keys)
+                grouped.setdefault(group_keys, []).append((account, service, region))
+        return sorted(grouped.items())
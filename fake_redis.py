@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Servidor Redis local e mínimo para testes do cache compartilhado
+Fala o protocolo RESP e implementa só o que cache_backends.py usa (GET, SET
+com PX/EX/NX, DEL, SCAN, EVAL do script de liberação de trava, AUTH,
+SELECT...), com expiração por chave. Várias instâncias de AWSServices, em
+threads ou processos, podem compartilhar o mesmo servidor como se fossem
+tasks diferentes atrás do ALB.
+
+Uso:     with FakeRedis() as redis:
+              AWSServices(cache_backend=RedisBackend(RedisClient.from_url(redis.url), Serializer('segredo')))
+Executar: python fake_redis.py --port 6379
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from cache_backends import UNLOCK_SCRIPT
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        server = self.server.fake
+        authenticated = server.password is None
+        db = 0
+        while True:
+            try:
+                command = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if command is None:
+                return
+            name = command[0].decode().upper()
+            server.commands[name] += 1
+            if name == 'QUIT':
+                self.wfile.write(b'+OK\r\n')
+                return
+            if name == 'AUTH':
+                authenticated = command[-1].decode() == server.password
+                reply = 'OK' if authenticated else ValueError('WRONGPASS invalid password')
+            elif not authenticated:
+                reply = ValueError('NOAUTH Authentication required.')
+            elif name == 'SELECT':
+                db = int(command[1])
+                reply = 'OK'
+            else:
+                try:
+                    reply = server.execute(name, command[1:], db)
+                except Exception as e:
+                    reply = ValueError(f'ERR {e}')
+            self.wfile.write(_encode_reply(reply))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Comando inline (ex.: "PING" digitado no telnet)
+            return line.split() or None
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+def _encode_reply(reply) -> bytes:
+    if reply is None:
+        return b'$-1\r\n'
+    if isinstance(reply, ValueError):
+        return b'-%s\r\n' % str(reply).encode()
+    if isinstance(reply, str):
+        return b'+%s\r\n' % reply.encode()
+    if isinstance(reply, int):
+        return b':%d\r\n' % reply
+    if isinstance(reply, bytes):
+        return b'$%d\r\n%s\r\n' % (len(reply), reply)
+    return b'*%d\r\n' % len(reply) + b''.join(_encode_reply(item) for item in reply)
+
+class FakeRedis:
+    """Servidor RESP em uma thread; commands conta os comandos recebidos"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, password: Optional[str] = None,
+                 clock=time.monotonic):
+        self.password = password
+        self._clock = clock
+        self._data: Dict[int, Dict[bytes, Tuple[bytes, Optional[float]]]] = {}
+        self._lock = threading.Lock()
+        self.commands = Counter()
+        self._server = socketserver.ThreadingTCPServer((host, port), _Handler, bind_and_activate=True)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        auth = f':{self.password}@' if self.password else ''
+        return f'redis://{auth}{host}:{port}/0'
+
+    def serve_forever(self):
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def start(self) -> 'FakeRedis':
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), name='fake-redis',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def keys(self, db: int = 0):
+        """Chaves válidas (sem as expiradas) de um banco"""
+        with self._lock:
+            return sorted(key.decode() for key in self._db(db) if self._alive(db, key))
+
+    def _db(self, db: int):
+        return self._data.setdefault(db, {})
+
+    def _alive(self, db: int, key: bytes) -> bool:
+        entry = self._db(db).get(key)
+        if entry is None:
+            return False
+        if entry[1] is not None and entry[1] <= self._clock():
+            del self._db(db)[key]
+            return False
+        return True
+
+    def execute(self, name: str, args, db: int = 0):
+        with self._lock:
+            data = self._db(db)
+            if name == 'PING':
+                return 'PONG'
+            if name == 'GET':
+                return data[args[0]][0] if self._alive(db, args[0]) else None
+            if name == 'SET':
+                return self._set(db, args)
+            if name == 'DEL':
+                removed = [key for key in args if self._alive(db, key)]
+                for key in removed:
+                    del data[key]
+                return len(removed)
+            if name == 'EXISTS':
+                return sum(self._alive(db, key) for key in args)
+            if name == 'DBSIZE':
+                return sum(self._alive(db, key) for key in list(data))
+            if name == 'FLUSHDB':
+                data.clear()
+                return 'OK'
+            if name == 'SCAN':
+                return self._scan(db, args)
+            if name == 'EVAL':
+                return self._eval(db, args)
+        raise ValueError(f"unknown command '{name}'")
+
+    def _set(self, db: int, args):
+        key, value, options = args[0], args[1], [arg.decode().upper() for arg in args[2:]]
+        expires = None
+        if 'PX' in options:
+            expires = self._clock() + int(options[options.index('PX') + 1]) / 1000
+        elif 'EX' in options:
+            expires = self._clock() + int(options[options.index('EX') + 1])
+        exists = self._alive(db, key)
+        if ('NX' in options and exists) or ('XX' in options and not exists):
+            return None
+        self._db(db)[key] = (value, expires)
+        return 'OK'
+
+    def _scan(self, db: int, args):
+        # Um único passo: devolve todas as chaves e o cursor final
+        options = [arg.decode() for arg in args[1:]]
+        pattern = options[options.index('MATCH') + 1] if 'MATCH' in [o.upper() for o in options] else '*'
+        keys = [key for key in list(self._db(db)) if self._alive(db, key) and fnmatch.fnmatchcase(key.decode(), pattern)]
+        return [b'0', keys]
+
+    def _eval(self, db: int, args):
+        if args[0].decode() != UNLOCK_SCRIPT:
+            raise ValueError('only the cache unlock script is supported')
+        key, token = args[2], args[3]
+        if self._alive(db, key) and self._db(db)[key][0] == token:
+            del self._db(db)[key]
+            return 1
+        return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor Redis local para testes do cache compartilhado")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6379)
+    parser.add_argument('--password')
+    args = parser.parse_args(argv)
+
+    server = FakeRedis(args.host, args.port, args.password)
+    print(f"Redis local em {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
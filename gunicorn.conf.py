@@ -0,0 +1,74 @@
+"""
+Configuração do gunicorn para produção
+Substitui o servidor de desenvolvimento do Flask (um processo, debug=True).
+Workers gthread atendem várias requisições por processo enquanto as chamadas
+boto3 esperam a rede; o app é carregado uma vez no master e compartilhado
+pelos workers após o fork (GUNICORN_WARM_UP define onde clientes e templates
+são criados).
+
+Executar: gunicorn -c gunicorn.conf.py
+Modo ASGI: GUNICORN_APP=asgi:application GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+"""
+
+import logging
+import os
+
+logger = logging.getLogger('gunicorn.error')
+
+wsgi_app = os.environ.get('GUNICORN_APP', 'app:app')
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Um processo × várias threads: o trabalho é quase todo espera de rede (boto3), e a
+# fila de tarefas (GET /jobs/<id>), o cache local e as métricas vivem na memória do
+# processo. Com mais workers, cada requisição cai em um deles e /jobs/<id> pode
+# responder 404; escale com mais tasks atrás do ALB (sessões fixas), não com workers
+workers = int(os.environ.get('GUNICORN_WORKERS', '1'))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '16'))
+
+# Importa o app no master antes do fork (boto3 e NumPy ficam para o primeiro uso)
+preload_app = True
+# Clientes boto3 e templates: 'background' aquece cada worker em uma thread sem atrasar
+# o /ready; 'preload' cria tudo no master antes do fork (memória compartilhada, mas
+# ~0.4s a mais até a primeira resposta); 'off' deixa tudo para a primeira requisição
+warm_up = os.environ.get('GUNICORN_WARM_UP', 'background')
+
+# Conexões keep-alive precisam durar mais que o idle timeout do ALB (60s),
+# senão o ALB reaproveita uma conexão que o servidor acabou de fechar (502)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '75'))
+# Requisição travada além disso reinicia o worker; comandos longos viram tarefas (jobs.py)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+# SIGTERM do ECS: conclui as requisições em andamento antes do SIGKILL (stopTimeout, 30s)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '25'))
+
+# Recicla workers periodicamente (com variação para não reiniciarem juntos)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Heartbeat dos workers em memória: o overlay do Docker pode travar em disco lento
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def when_ready(server):
+    """Master pronto (app já importado): aquece clientes e templates antes do fork"""
+    if warm_up == 'preload':
+        import app
+        app.warm_up()
+    logger.info("App pré-carregado: %d worker(s) %s × %d thread(s), aquecimento %s",
+                workers, worker_class, threads, warm_up)
+    if workers > 1:
+        logger.warning("%d workers: tarefas (/jobs/<id>), cache e /metrics ficam separados por processo", workers)
+
+def post_worker_init(worker):
+    """Worker pronto para atender: aquece em segundo plano"""
+    if warm_up == 'background':
+        import app
+        app.warm_up(background=True)
+
+def worker_exit(server, worker):
+    """Encerramento gracioso: cancela as tarefas em background e aguarda um pouco"""
+    import app
+    app.jobs.shutdown(timeout=graceful_timeout / 2)
@@ -10,6 +10,9 @@ resource "aws_lb" "main" {
 
   enable_deletion_protection = false
 
+  # Menor que o keepalive do gunicorn (GUNICORN_KEEPALIVE, 75s)
+  idle_timeout = 60
+
   tags = {
     Name        = "${var.project_name}-alb"
     Environment = var.environment
@@ -24,12 +27,23 @@ resource "aws_lb_target_group" "app" {
   vpc_id      = aws_vpc.main.id
   target_type = "ip"
 
+  # Tempo para concluir requisições em andamento ao desregistrar uma task
+  deregistration_delay = 30
+
+  # Tarefas (/jobs/<id>), cache e métricas ficam na memória de cada task: o cliente
+  # precisa voltar à task que criou a tarefa enquanto acompanha o resultado
+  stickiness {
+    enabled         = true
+    type            = "lb_cookie"
+    cookie_duration = 3600
+  }
+
   health_check {
     enabled             = true
     healthy_threshold   = 2
     interval            = 30
     matcher             = "200"
-    path                = "/"
+    path                = "/ready"
     port                = "traffic-port"
     protocol            = "HTTP"
     timeout             = 5
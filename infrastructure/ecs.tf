@@ -45,9 +45,45 @@ resource "aws_ecs_task_definition" "app" {
         {
           name  = "FLASK_ENV"
           value = "production"
+        },
+        {
+          name  = "GUNICORN_WORKERS"
+          value = "1"
+        },
+        {
+          name  = "GUNICORN_THREADS"
+          value = "16"
+        },
+        {
+          name  = "GUNICORN_KEEPALIVE"
+          value = "75"
+        },
+        {
+          name  = "COST_HISTORY_DB"
+          value = "/data/cost_history.db"
+        },
+        {
+          name  = "COST_HISTORY_JOURNAL"
+          value = "DELETE"
+        },
+        {
+          name  = "COST_BACKFILL"
+          value = "1"
         }
       ]
 
+      # Histórico de custos persistente (efs.tf)
+      mountPoints = [
+        {
+          sourceVolume  = "data"
+          containerPath = "/data"
+          readOnly      = false
+        }
+      ]
+
+      # SIGTERM -> SIGKILL: cobre o graceful_timeout do gunicorn (25s)
+      stopTimeout = 30
+
       logConfiguration = {
         logDriver = "awslogs"
         options = {
@@ -61,6 +97,19 @@ resource "aws_ecs_task_definition" "app" {
     }
   ])
 
+  volume {
+    name = "data"
+
+    efs_volume_configuration {
+      file_system_id     = aws_efs_file_system.data.id
+      transit_encryption = "ENABLED"
+
+      authorization_config {
+        access_point_id = aws_efs_access_point.data.id
+      }
+    }
+  }
+
   tags = {
     Name        = "${var.project_name}-task"
     Environment = var.environment
@@ -87,7 +136,7 @@ resource "aws_ecs_service" "app" {
     container_port   = 5000
   }
 
-  depends_on = [aws_lb_listener.app]
+  depends_on = [aws_lb_listener.app, aws_efs_mount_target.data]
 
   tags = {
     Name        = "${var.project_name}-service"
@@ -0,0 +1,63 @@
+# EFS para o histórico de custos (cost_store.py)
+# O SQLite fica fora do disco efêmero da task: deploys e reinícios não baixam
+# o histórico do Cost Explorer de novo.
+
+resource "aws_efs_file_system" "data" {
+  creation_token = "${var.project_name}-data"
+  encrypted      = true
+
+  tags = {
+    Name        = "${var.project_name}-data"
+    Environment = var.environment
+  }
+}
+
+# Security Group for EFS: NFS apenas a partir das tasks
+resource "aws_security_group" "efs" {
+  name_prefix = "${var.project_name}-efs-"
+  vpc_id      = aws_vpc.main.id
+
+  ingress {
+    from_port       = 2049
+    to_port         = 2049
+    protocol        = "tcp"
+    security_groups = [aws_security_group.ecs.id]
+  }
+
+  tags = {
+    Name        = "${var.project_name}-efs-sg"
+    Environment = var.environment
+  }
+}
+
+resource "aws_efs_mount_target" "data" {
+  count = length(aws_subnet.public)
+
+  file_system_id  = aws_efs_file_system.data.id
+  subnet_id       = aws_subnet.public[count.index].id
+  security_groups = [aws_security_group.efs.id]
+}
+
+# Diretório do app com o usuário do contêiner (useradd app, uid 1000)
+resource "aws_efs_access_point" "data" {
+  file_system_id = aws_efs_file_system.data.id
+
+  posix_user {
+    uid = 1000
+    gid = 1000
+  }
+
+  root_directory {
+    path = "/chatbot"
+    creation_info {
+      owner_uid   = 1000
+      owner_gid   = 1000
+      permissions = "0755"
+    }
+  }
+
+  tags = {
+    Name        = "${var.project_name}-data"
+    Environment = var.environment
+  }
+}
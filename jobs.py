@@ -0,0 +1,242 @@
+"""
+Fila de tarefas em background para operações AWS longas
+Cada tarefa recebe um id, roda em um pool local de threads e expõe status,
+progresso e resultado. Tarefas idênticas em andamento são compartilhadas.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import ERRORS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+class QueueFullError(Exception):
+    """A fila de tarefas atingiu o limite; o cliente deve tentar mais tarde"""
+
+class JobCancelled(BaseException):
+    """Interrompe uma tarefa cancelada a partir do callback de progresso
+
+    Deriva de BaseException para atravessar os `except Exception` que
+    convertem erros AWS em mensagens.
+    """
+
+class Job:
+    """Tarefa em background com progresso e cancelamento cooperativo"""
+
+    MAX_PARTIALS = 50
+
+    def __init__(self, key: str, fn: Callable[['Job'], Any], description: str = ''):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.description = description or key
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.partials = deque(maxlen=self.MAX_PARTIALS)
+        self.status_text = ''
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Requisições aguardando a tarefa (deduplicadas incluídas); ver JobManager.release
+        self.requesters = 1
+        self._fn = fn
+        self._listeners: List[queue.Queue] = []
+        self._events_lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, text: str, status: bool = False):
+        """Callback de progresso: registra texto parcial e interrompe se cancelada"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        with self._events_lock:
+            if status:
+                self.status_text = text
+            else:
+                self.partials.append(text)
+            for listener in self._listeners:
+                listener.put(('status' if status else 'partial', text))
+
+    def subscribe(self) -> queue.Queue:
+        """Fila de eventos (tipo, texto) do progresso, terminada por None quando a tarefa acaba
+
+        Os parciais já registrados vêm primeiro: quem chega a uma tarefa
+        compartilhada não perde o início.
+        """
+        listener = queue.Queue()
+        with self._events_lock:
+            for text in self.partials:
+                listener.put(('partial', text))
+            if self.status_text:
+                listener.put(('status', self.status_text))
+            if self.finished:
+                listener.put(None)
+            else:
+                self._listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener: queue.Queue):
+        with self._events_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def cancel(self):
+        """Solicita o cancelamento; tarefas na fila nem chegam a executar"""
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def run(self):
+        if self._cancel.is_set():
+            self._finish(CANCELLED)
+            return
+        self.status = RUNNING
+        self.started_at = time.time()
+        try:
+            self.result = self._fn(self)
+            self._finish(CANCELLED if self._cancel.is_set() else DONE)
+        except JobCancelled:
+            self._finish(CANCELLED)
+        except Exception as e:
+            logger.exception("Tarefa %s falhou", self.id)
+            ERRORS.inc(1, 'job', type(e).__name__)
+            self.error = str(e)
+            self._finish(FAILED)
+
+    def _finish(self, status):
+        self.status = status
+        self.finished_at = time.time()
+        self._finished.set()
+        with self._events_lock:
+            listeners, self._listeners = self._listeners, []
+        for listener in listeners:
+            listener.put(None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            'id': self.id,
+            'description': self.description,
+            'status': self.status,
+            'progress': {'status': self.status_text, 'partials': list(self.partials)},
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'elapsed': round(end - (self.started_at or end), 3)
+        }
+
+class JobManager:
+    """Pool de workers com fila limitada e deduplicação de tarefas em andamento"""
+
+    def __init__(self, workers: int = None, max_queue: int = None, retention: float = 600):
+        self.workers = workers or int(os.environ.get('JOB_WORKERS', '4'))
+        self.retention = retention
+        self._queue = queue.Queue(maxsize=max_queue or int(os.environ.get('JOB_QUEUE_SIZE', '32')))
+        self._jobs: Dict[str, Job] = {}
+        self._in_flight: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self.deduplicated = 0
+
+    def submit(self, key: str, fn: Callable[[Job], Any], description: str = '') -> Job:
+        """Enfileira fn(job); retorna a tarefa existente se a mesma chave estiver em andamento"""
+        with self._lock:
+            existing = self._in_flight.get(key)
+            if existing is not None and not existing.finished and not existing.cancel_requested:
+                self.deduplicated += 1
+                existing.requesters += 1
+                return existing
+            self._prune()
+            job = Job(key, fn, description)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError("Fila de tarefas cheia. Tente novamente em instantes.")
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            self._ensure_workers()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel()
+        return job
+
+    def release(self, job_id: str) -> Optional[Job]:
+        """Um solicitante desistiu (ex.: o cliente do stream desconectou); cancela se era o último"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.requesters -= 1
+            last = job.requesters <= 0
+        return self.cancel(job_id) if last else job
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def shutdown(self, timeout: float = 10) -> bool:
+        """Cancela as tarefas não concluídas e aguarda até timeout; True se todas terminaram"""
+        with self._lock:
+            unfinished = [job for job in self._jobs.values() if not job.finished]
+        for job in unfinished:
+            job.cancel()
+        deadline = time.monotonic() + timeout
+        for job in unfinished:
+            if not job.wait(max(0.0, deadline - time.monotonic())):
+                logger.warning("Tarefa %s não terminou no encerramento", job.id)
+                return False
+        return True
+
+    def _ensure_workers(self):
+        # Workers são iniciados no primeiro submit, não na importação do app
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'job-worker-{len(self._threads)}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                job.run()
+            finally:
+                with self._lock:
+                    if self._in_flight.get(job.key) is job:
+                        del self._in_flight[job.key]
+                self._queue.task_done()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,133 @@
+"""
+Filtros, ordenação e paginação das listagens do chat
+As listagens (instâncias EC2, buckets S3) são filtradas sobre o snapshot em
+cache e só a página pedida é selecionada com heapq, sem ordenar a listagem
+inteira (O(n log k)): o tamanho da resposta e o tempo de renderização não
+dependem do tamanho da conta.
+
+O cursor guarda a chave de ordenação do último item exibido, então a página
+seguinte continua exatamente dali mesmo que o snapshot seja atualizado entre
+uma página e outra (sem itens repetidos ou pulados por deslocamento).
+"""
+
+import base64
+import binascii
+import heapq
+import json
+import os
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+LISTING_PAGE_SIZE = int(os.environ.get('LISTING_PAGE_SIZE', '50'))
+LISTING_MAX_PAGE_SIZE = int(os.environ.get('LISTING_MAX_PAGE_SIZE', '200'))
+
+INVALID_CURSOR = "Cursor inválido. Refaça a consulta a partir da primeira página."
+
+INSTANCE_STATES = ('pending', 'running', 'shutting-down', 'terminated', 'stopping', 'stopped')
+
+class Order(NamedTuple):
+    """Chave de ordenação única (termina no id) e direção"""
+    key: Callable[[Any], tuple]
+    descending: bool = False
+
+INSTANCE_ORDERS: Dict[str, Order] = {
+    'regiao': Order(lambda instance: (instance.region, instance.id)),
+    'id': Order(lambda instance: (instance.id,)),
+    'tipo': Order(lambda instance: (instance.type, instance.id)),
+    'estado': Order(lambda instance: (instance.state, instance.id)),
+    'nome': Order(lambda instance: (instance.name, instance.id)),
+    'recentes': Order(lambda instance: (instance.launch_time.timestamp(), instance.id), descending=True),
+    'antigas': Order(lambda instance: (instance.launch_time.timestamp(), instance.id)),
+}
+
+BUCKET_ORDERS: Dict[str, Order] = {
+    'nome': Order(lambda bucket: (bucket.name,)),
+    'recentes': Order(lambda bucket: (bucket.created.timestamp(), bucket.name), descending=True),
+    'antigos': Order(lambda bucket: (bucket.created.timestamp(), bucket.name)),
+}
+
+class InstanceFilter(NamedTuple):
+    """Filtros de instâncias EC2; campos vazios não filtram"""
+    state: str = ''
+    # Tipo exato (t3.micro) ou família (t3)
+    type: str = ''
+    # 'chave' (tag presente) ou 'chave=valor'
+    tag: str = ''
+    # Prefixo do nome (tag Name), sem diferenciar maiúsculas
+    name: str = ''
+
+    def matches(self, instance) -> bool:
+        if self.state and instance.state != self.state:
+            return False
+        if self.type and instance.type != self.type and not instance.type.startswith(self.type + '.'):
+            return False
+        if self.tag:
+            key, separator, value = self.tag.partition('=')
+            if not any(tag == key and (not separator or tag_value == value) for tag, tag_value in instance.tags):
+                return False
+        return not self.name or instance.name.lower().startswith(self.name.lower())
+
+class Page(NamedTuple):
+    """Página de uma listagem filtrada; total conta todos os itens que passam pelos filtros"""
+    items: List[Any]
+    total: int
+    number: int
+    size: int
+    order: str
+    next_cursor: Optional[str] = None
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.size))
+
+    @property
+    def first(self) -> int:
+        """Posição (a partir de 1) do primeiro item da página na listagem filtrada"""
+        return (self.number - 1) * self.size + 1 if self.items else 0
+
+def page_size(size: Optional[int] = None) -> int:
+    return max(1, min(size or LISTING_PAGE_SIZE, LISTING_MAX_PAGE_SIZE))
+
+def encode_cursor(order: str, number: int, key: tuple) -> str:
+    data = json.dumps([order, number, list(key)], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+def decode_cursor(cursor: str, order: str) -> Tuple[int, tuple]:
+    """(número da página do cursor, chave do último item); ValueError se inválido"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        cursor_order, number, key = data
+        valid = (isinstance(number, int) and number >= 1 and isinstance(key, list)
+                 and all(isinstance(part, (str, int, float)) for part in key))
+    except (ValueError, TypeError, binascii.Error):
+        valid = False
+    if not valid:
+        raise ValueError(INVALID_CURSOR)
+    if cursor_order != order:
+        raise ValueError(f"Este cursor é da ordem '{cursor_order}'; use --ordem {cursor_order} ou recomece a listagem.")
+    return number, tuple(key)
+
+def select_page(items: Sequence, order: str, orders: Dict[str, Order], size: Optional[int] = None,
+                cursor: Optional[str] = None, number: int = 1) -> Page:
+    """Página number (ou a seguinte ao cursor) de items na ordem dada"""
+    size = page_size(size)
+    key, descending = orders[order]
+    skip = 0
+    candidates = items
+    if cursor:
+        previous, after = decode_cursor(cursor, order)
+        number = previous + 1
+        try:
+            if descending:
+                candidates = [item for item in items if key(item) < after]
+            else:
+                candidates = [item for item in items if key(item) > after]
+        except TypeError:
+            raise ValueError(INVALID_CURSOR)
+    else:
+        skip = (number - 1) * size
+
+    pick = heapq.nlargest if descending else heapq.nsmallest
+    selected = pick(skip + size + 1, candidates, key=key)
+    page_items = selected[skip:skip + size]
+    next_cursor = encode_cursor(order, number, key(page_items[-1])) if len(selected) > skip + size else None
+    return Page(page_items, len(items), number, size, order, next_cursor)
@@ -1,50 +1,161 @@
 #!/usr/bin/env python3
 """
 Servidor MCP (Model Context Protocol) para AWS Chatbot
-Fornece contexto sobre recursos AWS para Amazon Q Developer
+Fornece contexto sobre recursos AWS para Amazon Q Developer usando JSON-RPC 2.0
+sobre stdio (uma mensagem por linha). Os recursos vêm de AWSServices e
+compartilham o seu cache, então pedidos repetidos do assistente não voltam à
+AWS; clientes inscritos recebem notifications/resources/updated quando o
+conteúdo de um recurso muda.
 """
 
 import json
 import asyncio
-from typing import Dict, List, Any
+import hashlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import Dict, List, Any, Callable, Optional
 import logging
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from botocore.exceptions import ClientError
+
+from aws_services import AWSServices
+
+# Configurar logging (stdout é reservado ao protocolo)
+logging.basicConfig(level=logging.INFO, stream=sys.stderr)
 logger = logging.getLogger(__name__)
 
+PROTOCOL_VERSION = "2024-11-05"
+# Intervalo (s) entre verificações dos recursos inscritos; a frequência de
+# consultas à AWS continua sendo a das políticas de cache de AWSServices
+MCP_REFRESH_SECONDS = float(os.environ.get('MCP_REFRESH_SECONDS', '60'))
+# Requisições processadas ao mesmo tempo; acima disso as demais aguardam
+MCP_MAX_CONCURRENCY = int(os.environ.get('MCP_MAX_CONCURRENCY', '16'))
+# Threads para as chamadas boto3 bloqueantes
+MCP_EXECUTOR_WORKERS = int(os.environ.get('MCP_EXECUTOR_WORKERS', '8'))
+# Consultas aceitas por chamada de get_aws_context_batch
+MAX_BATCH_QUERIES = 20
+
+# Códigos de erro JSON-RPC / MCP
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+RESOURCE_NOT_FOUND = -32002
+
+class JSONRPCError(Exception):
+    """Erro devolvido ao cliente na resposta JSON-RPC"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+def cost_context(services: AWSServices, fresh: bool = False) -> Dict[str, Any]:
+    """Resumo de custos a partir da tabela diária em cache"""
+    table = services.get_cost_table(days=30, fresh=fresh)
+    if not len(table):
+        return {"available": False}
+    return {
+        "available": True,
+        "currency": table.currency,
+        "period": {"start": table.start.isoformat(), "end": table.end.isoformat()},
+        "last_30_days": round(table.total(days=30), 2),
+        "top_services": [{"service": service, "amount": round(amount, 2)}
+                         for service, amount in table.totals_by('service', days=30, top=10)],
+        "daily": [{"date": day.isoformat(), "amount": round(amount, 2)} for day, amount in table.daily_totals(days=7)]
+    }
+
+def s3_context(services: AWSServices, fresh: bool = False) -> Dict[str, Any]:
+    """Buckets S3 da conta"""
+    buckets = services.get_s3_buckets(fresh=fresh)
+    return {
+        "count": len(buckets),
+        "buckets": [{"name": bucket['Name'], "created": bucket['CreationDate'].isoformat()} for bucket in buckets]
+    }
+
+def ec2_context(services: AWSServices, fresh: bool = False) -> Dict[str, Any]:
+    """Instâncias EC2 de todas as regiões, com totais por estado"""
+    inventory = services.get_ec2_inventory(fresh=fresh)
+    instances = inventory.instances
+    by_state: Dict[str, int] = {}
+    for instance in instances:
+        by_state[instance.state] = by_state.get(instance.state, 0) + 1
+    return {
+        "count": len(instances),
+        "by_state": dict(sorted(by_state.items())),
+        "regions": [{"region": result.region, "count": len(result.instances), "error": result.error}
+                    for result in inventory.regions],
+        "instances": [dict(instance._asdict(), launch_time=instance.launch_time.isoformat(), tags=dict(instance.tags))
+                      for instance in instances]
+    }
+
+def valid_id(value: Any) -> bool:
+    """Ids JSON-RPC aceitos: string, inteiro ou null (listas e objetos não servem de chave)"""
+    return value is None or (isinstance(value, (str, int)) and not isinstance(value, bool))
+
+def error_message(error: Exception) -> str:
+    if isinstance(error, ClientError):
+        return error.response['Error'].get('Message') or str(error)
+    return str(error)
+
 class MCPServer:
     """Servidor MCP para fornecer contexto AWS"""
-    
-    def __init__(self):
+
+    def __init__(self, services: Optional[AWSServices] = None, refresh_interval: float = MCP_REFRESH_SECONDS,
+                 max_concurrency: int = MCP_MAX_CONCURRENCY, executor_workers: int = MCP_EXECUTOR_WORKERS):
         self.name = "aws-chatbot-mcp"
-        self.version = "1.0.0"
+        self.version = "1.1.0"
         self.resources = {}
         self.tools = {}
-        
+        self.services = services if services is not None else AWSServices()
+        self.refresh_interval = refresh_interval
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix='mcp-aws')
+        # uri -> função que monta o conteúdo a partir de AWSServices
+        self.loaders = {
+            "aws://costs": cost_context,
+            "aws://s3/buckets": s3_context,
+            "aws://ec2/instances": ec2_context
+        }
+        self.resource_types = {"costs": "aws://costs", "s3": "aws://s3/buckets", "ec2": "aws://ec2/instances"}
+        self.subscriptions = set()
+        # uri -> (hash do conteúdo, momento da última mudança)
+        self._versions: Dict[str, tuple] = {}
+        self._send: Optional[Callable[[Dict[str, Any]], Any]] = None
+        self._watcher: Optional[asyncio.Task] = None
+
     async def initialize(self):
         """Inicializar servidor MCP"""
         logger.info(f"Inicializando servidor MCP {self.name} v{self.version}")
-        
+
         # Registrar recursos disponíveis
         self.resources = {
             "aws-costs": {
                 "uri": "aws://costs",
                 "name": "AWS Cost Information",
-                "description": "Informações de custos da conta AWS"
+                "description": "Informações de custos da conta AWS",
+                "mimeType": "application/json"
             },
             "s3-buckets": {
                 "uri": "aws://s3/buckets",
                 "name": "S3 Buckets",
-                "description": "Lista de buckets S3 e seus objetos"
+                "description": "Lista de buckets S3 e seus objetos",
+                "mimeType": "application/json"
             },
             "ec2-instances": {
-                "uri": "aws://ec2/instances", 
+                "uri": "aws://ec2/instances",
                 "name": "EC2 Instances",
-                "description": "Informações sobre instâncias EC2"
+                "description": "Informações sobre instâncias EC2",
+                "mimeType": "application/json"
             }
         }
-        
+
         # Registrar ferramentas disponíveis
         self.tools = {
             "get_aws_context": {
@@ -60,71 +171,313 @@ class MCPServer:
                     },
                     "required": ["resource_type"]
                 }
+            },
+            "get_aws_context_batch": {
+                "name": "get_aws_context_batch",
+                "description": "Obter vários contextos AWS em paralelo em uma única resposta",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "queries": {
+                            "type": "array",
+                            "maxItems": MAX_BATCH_QUERIES,
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "resource_type": {
+                                        "type": "string",
+                                        "enum": ["costs", "s3", "ec2", "all"]
+                                    }
+                                },
+                                "required": ["resource_type"]
+                            }
+                        }
+                    },
+                    "required": ["queries"]
+                }
             }
         }
-        
+
         logger.info("Servidor MCP inicializado com sucesso")
-    
+
     async def list_resources(self) -> List[Dict[str, Any]]:
         """Listar recursos disponíveis"""
         return list(self.resources.values())
-    
+
     async def list_tools(self) -> List[Dict[str, Any]]:
         """Listar ferramentas disponíveis"""
         return list(self.tools.values())
-    
+
+    async def load(self, uri: str, fresh: bool = False) -> Dict[str, Any]:
+        """Dados do recurso via AWSServices (em cache), com last_updated
+
+        As chamadas boto3 são bloqueantes e rodam no executor. Se o conteúdo
+        mudou desde a última leitura, os inscritos no recurso são notificados.
+        """
+        loader = self.loaders.get(uri)
+        if loader is None:
+            raise JSONRPCError(RESOURCE_NOT_FOUND, f"Recurso não encontrado: {uri}")
+
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self.executor, partial(loader, self.services, fresh))
+        digest = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+        previous = self._versions.get(uri)
+        if previous is None or previous[0] != digest:
+            self._versions[uri] = (digest, datetime.now(timezone.utc).isoformat(timespec='seconds'))
+            if previous is not None and uri in self.subscriptions:
+                await self.notify("notifications/resources/updated", {"uri": uri})
+        return dict(data, last_updated=self._versions[uri][1])
+
     async def get_resource(self, uri: str) -> Dict[str, Any]:
         """Obter recurso específico"""
-        for resource in self.resources.values():
-            if resource["uri"] == uri:
-                return {
-                    "uri": uri,
-                    "mimeType": "application/json",
-                    "text": json.dumps({
-                        "context": f"Contexto para {resource['name']}",
-                        "description": resource["description"],
-                        "last_updated": "2024-01-01T00:00:00Z"
-                    })
-                }
-        
-        raise ValueError(f"Recurso não encontrado: {uri}")
-    
+        data = await self.load(uri)
+        return {
+            "uri": uri,
+            "mimeType": "application/json",
+            "text": json.dumps(data, ensure_ascii=False)
+        }
+
+    def _resource_kinds(self, resource_type: Any) -> List[str]:
+        if resource_type == "all":
+            return list(self.resource_types)
+        if resource_type in self.resource_types:
+            return [resource_type]
+        raise JSONRPCError(INVALID_PARAMS, f"resource_type inválido: {resource_type}")
+
+    async def _context(self, kind: str) -> Dict[str, Any]:
+        """Contexto de um tipo de recurso; falhas viram {"error": ...}"""
+        try:
+            return await self.load(self.resource_types[kind])
+        except Exception as e:
+            logger.warning("Falha ao obter contexto %s: %s", kind, e)
+            return {"error": error_message(e)}
+
+    async def get_context(self, resource_type: str) -> Dict[str, Any]:
+        """Contexto de um tipo; "all" consulta todos em paralelo"""
+        kinds = self._resource_kinds(resource_type)
+        results = await asyncio.gather(*(self._context(kind) for kind in kinds))
+        if resource_type != "all":
+            return results[0]
+        return dict(zip(kinds, results))
+
     async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Executar ferramenta"""
         if name == "get_aws_context":
             resource_type = arguments.get("resource_type", "all")
-            
-            context = {
-                "costs": "Contexto de custos AWS disponível",
-                "s3": "Contexto de buckets S3 disponível", 
-                "ec2": "Contexto de instâncias EC2 disponível",
-                "all": "Contexto completo AWS disponível"
-            }
-            
+            payload = await self.get_context(resource_type)
+            return self._tool_result(payload, failed=resource_type != "all" and "error" in payload)
+
+        if name == "get_aws_context_batch":
+            queries = arguments.get("queries")
+            if not isinstance(queries, list) or not queries or len(queries) > MAX_BATCH_QUERIES:
+                raise JSONRPCError(INVALID_PARAMS, f"queries deve ser uma lista de 1 a {MAX_BATCH_QUERIES} consultas")
+            resource_types = [query.get("resource_type") if isinstance(query, dict) else None for query in queries]
+            for resource_type in resource_types:
+                self._resource_kinds(resource_type)
+
+            # Todas as consultas em paralelo: a latência é a da mais lenta, e
+            # consultas repetidas compartilham a mesma chamada pelo cache
+            payloads = await asyncio.gather(*(self.get_context(resource_type) for resource_type in resource_types))
+            results = [{"resource_type": resource_type, "context": payload}
+                       for resource_type, payload in zip(resource_types, payloads)]
+            return self._tool_result({"results": results})
+
+        raise JSONRPCError(INVALID_PARAMS, f"Ferramenta não encontrada: {name}")
+
+    @staticmethod
+    def _tool_result(payload: Dict[str, Any], failed: bool = False) -> Dict[str, Any]:
+        return {
+            "content": [{
+                "type": "text",
+                "text": json.dumps(payload, ensure_ascii=False)
+            }],
+            "isError": failed
+        }
+
+    async def subscribe(self, uri: str):
+        """Inscreve o cliente nas mudanças do recurso"""
+        if uri not in self.loaders:
+            raise JSONRPCError(RESOURCE_NOT_FOUND, f"Recurso não encontrado: {uri}")
+        self.subscriptions.add(uri)
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        """Relê periodicamente os recursos inscritos; load() notifica as mudanças
+
+        Usa o cache (fresh=False): com stale-while-revalidate, uma leitura
+        após o TTL dispara a atualização e a verificação seguinte vê o novo valor.
+        """
+        while self.subscriptions:
+            await asyncio.sleep(self.refresh_interval)
+            for uri in list(self.subscriptions):
+                try:
+                    await self.load(uri)
+                except Exception as e:
+                    logger.warning("Falha ao verificar %s: %s", uri, e)
+
+    async def notify(self, method: str, params: Dict[str, Any]):
+        """Envia uma notificação JSON-RPC ao cliente"""
+        if self._send is not None:
+            await self._send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    async def handle(self, message: Any) -> Optional[Dict[str, Any]]:
+        """Processa uma mensagem JSON-RPC; None para notificações"""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or "method" not in message:
+            request_id = message.get("id") if isinstance(message, dict) else None
+            return self._error(request_id if valid_id(request_id) else None,
+                               INVALID_REQUEST, "Requisição JSON-RPC inválida")
+
+        request_id = message.get("id")
+        if not valid_id(request_id):
+            return self._error(None, INVALID_REQUEST, "id deve ser string, inteiro ou null")
+        is_notification = "id" not in message
+        try:
+            result = await self._dispatch(message["method"], message.get("params") or {})
+        except JSONRPCError as e:
+            return None if is_notification else self._error(request_id, e.code, e.message)
+        except Exception as e:
+            logger.exception("Erro ao processar %s", message["method"])
+            return None if is_notification else self._error(request_id, INTERNAL_ERROR, error_message(e))
+
+        if is_notification:
+            return None
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    async def _dispatch(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if method == "initialize":
             return {
-                "content": [{
-                    "type": "text",
-                    "text": context.get(resource_type, "Contexto não encontrado")
-                }]
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {
+                    "resources": {"subscribe": True, "listChanged": False},
+                    "tools": {"listChanged": False}
+                },
+                "serverInfo": {"name": self.name, "version": self.version}
             }
-        
-        raise ValueError(f"Ferramenta não encontrada: {name}")
+        if method.startswith("notifications/") or method == "ping":
+            return {}
+        if method == "resources/list":
+            return {"resources": await self.list_resources()}
+        if method == "resources/read":
+            return {"contents": [await self.get_resource(self._require(params, "uri"))]}
+        if method == "resources/subscribe":
+            await self.subscribe(self._require(params, "uri"))
+            return {}
+        if method == "resources/unsubscribe":
+            self.subscriptions.discard(self._require(params, "uri"))
+            return {}
+        if method == "tools/list":
+            return {"tools": await self.list_tools()}
+        if method == "tools/call":
+            return await self.call_tool(self._require(params, "name"), params.get("arguments") or {})
+        raise JSONRPCError(METHOD_NOT_FOUND, f"Método não encontrado: {method}")
+
+    @staticmethod
+    def _require(params: Dict[str, Any], name: str):
+        value = params.get(name) if isinstance(params, dict) else None
+        if not isinstance(value, str):
+            raise JSONRPCError(INVALID_PARAMS, f"Parâmetro obrigatório ausente: {name}")
+        return value
+
+    @staticmethod
+    def _error(request_id, code: int, message: str) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+    async def serve(self, reader: asyncio.StreamReader, write: Callable[[bytes], None]):
+        """Atende mensagens lidas de reader (uma por linha) até o fim da entrada
+
+        Cada requisição roda em uma task própria (até max_concurrency ao mesmo
+        tempo), então uma consulta lenta não atrasa as outras; as respostas
+        saem na ordem em que ficam prontas, identificadas pelo id.
+        """
+        lock = asyncio.Lock()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        in_flight: Dict[Any, asyncio.Task] = {}
+
+        async def send(message):
+            data = json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n"
+            async with lock:
+                write(data)
+
+        async def process(message):
+            async with semaphore:
+                response = await self.handle(message)
+            if response is not None:
+                await send(response)
+
+        self._send = send
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    await send(self._error(None, PARSE_ERROR, "JSON inválido"))
+                    continue
+
+                if isinstance(message, dict) and message.get("method") == "notifications/cancelled":
+                    # Requisição cancelada pelo cliente: não há resposta
+                    params = message.get("params")
+                    request_id = params.get("requestId") if isinstance(params, dict) else None
+                    task = in_flight.get(request_id) if valid_id(request_id) else None
+                    if task is not None:
+                        task.cancel()
+                    continue
+
+                task = asyncio.create_task(process(message))
+                request_id = message.get("id") if isinstance(message, dict) else None
+                # Ids inválidos são respondidos por handle com INVALID_REQUEST, sem virar chave
+                if request_id is not None and valid_id(request_id):
+                    in_flight[request_id] = task
+                    task.add_done_callback(lambda _, request_id=request_id: in_flight.pop(request_id, None))
+                else:
+                    in_flight[id(task)] = task
+                    task.add_done_callback(lambda _, key=id(task): in_flight.pop(key, None))
+
+            # Fim da entrada: conclui as requisições em andamento antes de sair
+            if in_flight:
+                await asyncio.gather(*in_flight.values(), return_exceptions=True)
+        finally:
+            self._send = None
+            self.subscriptions.clear()
+            if self._watcher is not None:
+                self._watcher.cancel()
+
+async def stdio_streams():
+    """StreamReader para stdin e função de escrita em stdout"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    def write(data: bytes):
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    return reader, write
 
 # Configuração do servidor
 async def main():
     """Função principal do servidor MCP"""
     server = MCPServer()
     await server.initialize()
-    
-    logger.info("Servidor MCP rodando...")
+
+    logger.info("Servidor MCP rodando em stdio...")
     logger.info("Para usar com Amazon Q Developer, configure o arquivo mcp_config.json")
-    
-    # Manter servidor rodando
+
+    reader, write = await stdio_streams()
     try:
-        while True:
-            await asyncio.sleep(1)
-    except KeyboardInterrupt:
-        logger.info("Servidor MCP finalizado")
+        await server.serve(reader, write)
+    finally:
+        server.executor.shutdown(wait=False)
+    logger.info("Servidor MCP finalizado")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,316 @@
+"""
+Métricas e rastreamento por requisição em formato Prometheus
+Contadores, gauges e histogramas em memória do processo, spans de tempo
+por fase e o trace da requisição atual (usado no cabeçalho Server-Timing).
+Cada observação custa um lock e uma busca binária, então a
+instrumentação pode ficar ligada em produção.
+"""
+
+import bisect
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limites (s) dos histogramas de latência: de chamadas em cache a comandos longos
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Requisições acima deste tempo (ms) são registradas no log com o detalhamento por fase
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', '2000'))
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+class Counter(_Metric):
+    """Contador monotônico; inc(1, 'valor do label', ...)"""
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f'{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}'
+                                for labels, value in items]
+
+class Gauge(_Metric):
+    """Valor lido no momento da coleta por uma função"""
+    kind = 'gauge'
+
+    def __init__(self, name, help, fn: Callable[[], float]):
+        super().__init__(name, help)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            logger.exception("Falha ao coletar o gauge %s", self.name)
+            return []
+        return self.header() + [f'{self.name} {_format_value(value)}']
+
+class CounterFunc(Gauge):
+    """Contador mantido por outro objeto (ex.: SingleFlight.stats()) e lido na coleta"""
+    kind = 'counter'
+
+class Histogram(_Metric):
+    """Histograma com limites fixos; observe(segundos, 'valor do label', ...)"""
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por faixa (não cumulativa, + faixa +Inf), soma]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = self.header()
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = _format_labels(self.labels, labels, f'le="{_format_value(float(bound))}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            suffix = _format_labels(self.labels, labels)
+            lines.append(f'{self.name}_sum{suffix} {_format_value(total)}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return lines
+
+class Registry:
+    """Conjunto de métricas expostas em /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, fn) -> Gauge:
+        """Registra (ou substitui) um gauge calculado na coleta"""
+        gauge = Gauge(name, help, fn)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def counter_func(self, name, help, fn) -> CounterFunc:
+        """Registra (ou substitui) um contador lido na coleta"""
+        counter = CounterFunc(name, help, fn)
+        with self._lock:
+            self._metrics[name] = counter
+        return counter
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus (version 0.0.4)"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+HTTP_REQUESTS = registry.counter('chatbot_http_requests_total', 'Requisições HTTP por rota e status',
+                                 ('method', 'route', 'status'))
+HTTP_SECONDS = registry.histogram('chatbot_http_request_seconds', 'Tempo total da requisição HTTP (inclui o Flask)',
+                                  ('method', 'route'))
+PHASE_SECONDS = registry.histogram('chatbot_phase_seconds', 'Tempo por fase do processamento', ('phase',))
+COMMAND_SECONDS = registry.histogram('chatbot_command_seconds', 'Tempo de execução por comando', ('command',))
+AWS_CALLS = registry.counter('chatbot_aws_calls_total', 'Chamadas de API AWS por resultado (ok ou código de erro)',
+                             ('service', 'operation', 'result'))
+AWS_SECONDS = registry.histogram('chatbot_aws_call_seconds', 'Tempo por chamada de API AWS, incluindo retries',
+                                 ('service', 'operation'))
+CACHE_REQUESTS = registry.counter('chatbot_cache_requests_total', 'Leituras do cache por operação e resultado',
+                                  ('operation', 'result'))
+ERRORS = registry.counter('chatbot_errors_total', 'Erros por origem e tipo', ('source', 'type'))
+
+class Trace:
+    """Tempos acumulados por fase de uma requisição"""
+
+    __slots__ = ('name', 'started', 'phases')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        # fase -> [ocorrências, segundos]
+        self.phases: Dict[str, list] = {}
+
+    def add(self, phase: str, seconds: float):
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Valor do cabeçalho Server-Timing (visível no DevTools do navegador)"""
+        return ', '.join(f'{phase.replace(".", "-")};dur={seconds * 1000:.1f}'
+                         for phase, (_, seconds) in self.phases.items())
+
+    def summary(self) -> str:
+        return ', '.join(f'{phase}={seconds * 1000:.0f}ms' + (f' ({count}x)' if count > 1 else '')
+                         for phase, (count, seconds) in self.phases.items())
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar('trace', default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+def start_trace(name: str) -> Tuple[Trace, contextvars.Token]:
+    """Inicia o trace da requisição no contexto atual"""
+    trace = Trace(name)
+    return trace, _current_trace.set(trace)
+
+def finish_trace(trace: Trace, token: contextvars.Token):
+    """Encerra o trace; requisições lentas vão para o log com o tempo de cada fase"""
+    _current_trace.reset(token)
+    elapsed_ms = trace.elapsed * 1000
+    if elapsed_ms >= SLOW_REQUEST_MS:
+        logger.warning("Requisição lenta (%s): %.0fms [%s]", trace.name, elapsed_ms, trace.summary())
+
+def record(phase: str, seconds: float):
+    """Registra a duração de uma fase no histograma e no trace atual"""
+    PHASE_SECONDS.observe(seconds, phase)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(phase, seconds)
+
+class span:
+    """Mede um bloco: `with span('route'): ...`"""
+
+    __slots__ = ('phase', '_started')
+
+    def __init__(self, phase: str):
+        self.phase = phase
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.phase, time.perf_counter() - self._started)
+        return False
+
+def traced(phase: str):
+    """Decorador que mede cada chamada da função como uma fase"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(phase, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+def instrument_methods(prefix: str):
+    """Decorador de classe: mede os métodos públicos como fases '<prefix>.<método>'"""
+    def decorator(cls):
+        for name, attribute in list(vars(cls).items()):
+            if not name.startswith('_') and inspect.isfunction(attribute):
+                setattr(cls, name, traced(f'{prefix}.{name}')(attribute))
+        return cls
+    return decorator
+
+def _before_aws_call(context=None, **kwargs):
+    if context is not None:
+        context['metrics_started'] = time.perf_counter()
+
+def _after_aws_call(event_name, context=None, http_response=None, parsed=None, exception=None, **kwargs):
+    started = context.get('metrics_started') if context is not None else None
+    _, service, operation = event_name.split('.', 2)
+    if exception is not None:
+        result = type(exception).__name__
+    elif http_response is not None and http_response.status_code >= 300:
+        result = (parsed or {}).get('Error', {}).get('Code') or str(http_response.status_code)
+    else:
+        result = 'ok'
+    AWS_CALLS.inc(1, service, operation, result)
+    if started is not None:
+        seconds = time.perf_counter() - started
+        AWS_SECONDS.observe(seconds, service, operation)
+        record('aws', seconds)
+
+def instrument_client(client):
+    """Registra contagem e tempo das chamadas nos eventos do botocore do cliente
+
+    O tempo começa em before-parameter-build (antes da validação e da
+    serialização) e termina em after-call, emitido também para respostas de
+    erro (antes do ClientError), ou em after-call-error nas falhas de rede;
+    inclui os retries.
+    """
+    events = getattr(getattr(client, 'meta', None), 'events', None)
+    if events is not None:
+        events.register('before-parameter-build', _before_aws_call)
+        events.register('after-call', _after_aws_call)
+        events.register('after-call-error', _after_aws_call)
+    return client
@@ -0,0 +1,19 @@
+"""
+Paginação genérica para APIs AWS baseadas em token
+"""
+
+def paginate(operation, request_token, response_token=None, **kwargs):
+    """Percorre as páginas de uma operação boto3, produzindo uma resposta por vez
+
+    Só a página atual fica em memória. Usa o mesmo laço para S3
+    (ContinuationToken/NextContinuationToken), EC2 (NextToken) e
+    Cost Explorer (NextPageToken).
+    """
+    response_token = response_token or request_token
+    while True:
+        page = operation(**kwargs)
+        yield page
+        token = page.get(response_token)
+        if not token:
+            return
+        kwargs[request_token] = token
@@ -0,0 +1,272 @@
+"""
+Renderização dos resultados dos comandos
+Converte os registros de results.py (e as contagens S3) em markdown, o
+formato do chat, em texto simples ou em dados JSON. Cada renderizador monta
+uma lista de linhas e faz um único join: listagens grandes são renderizadas
+em tempo linear.
+
+Uso: render(services.list_ec2_instances(), 'json')
+"""
+
+import re
+import shlex
+from functools import singledispatch
+from typing import Any, Dict, List, Union
+
+from ec2_inventory import Instance
+from listing import LISTING_PAGE_SIZE, Page
+from results import (BucketPage, CostAnomalies, CostBreakdown, CostEstimate, CostForecast, DailyCosts, Failure,
+                     InstancePage, Notice)
+from s3_inventory import ROOT_PREFIX, S3ObjectStats, format_bytes
+
+FORMATS = ('markdown', 'text', 'json')
+
+COST_DIMENSION_LABELS = {'service': 'serviço', 'region': 'região', 'account': 'conta'}
+
+STATE_ICONS = {'running': '🟢', 'stopped': '🔴'}
+
+# Prefixos listados na contagem de objetos S3
+S3_TOP_PREFIXES = 10
+
+# Emojis (com o seletor de variação e o espaço seguinte) removidos no texto simples
+_EMOJI = re.compile(r'[\U0001F000-\U0001FFFF\u2600-\u27BF\u2B00-\u2BFF\u23E9-\u23FF\uFE0F]+ ?')
+
+def render(result, format: str = 'markdown') -> Union[str, Dict[str, Any]]:
+    """Resultado no formato pedido: texto para markdown/text, dict para json"""
+    if format == 'markdown':
+        return to_markdown(result)
+    if format == 'text':
+        return to_text(to_markdown(result))
+    if format == 'json':
+        kind = 'message' if isinstance(result, str) else type(result).__name__
+        return dict(type=kind, **to_data(result))
+    raise ValueError(f"Formato inválido: {format} (use {', '.join(FORMATS)})")
+
+def to_text(markdown: str) -> str:
+    """Markdown do chat como texto simples: sem negrito, crases e emojis"""
+    return _EMOJI.sub('', markdown.replace('**', '').replace('`', ''))
+
+def money(currency: str, amount: float) -> str:
+    return f"{currency} ${amount:.2f}"
+
+def page_footer(page: Page, command: str, args: List[str], default_order: str) -> List[str]:
+    """Posição da página e o comando da próxima, com os mesmos filtros e o cursor"""
+    if page.pages == 1 and page.number == 1:
+        return []
+    footer = f"\n📄 Página {page.number} de {page.pages}"
+    if page.next_cursor:
+        args = list(args)
+        if page.order != default_order:
+            args += ['--ordem', page.order]
+        if page.size != LISTING_PAGE_SIZE:
+            args += ['--limite', str(page.size)]
+        command_line = ' '.join([command] + [shlex.quote(arg) for arg in args + ['--cursor', page.next_cursor]])
+        footer += f" · próxima: `{command_line}`"
+    return [footer]
+
+def page_range(page: Page, noun: str) -> str:
+    if page.pages == 1 and page.number == 1:
+        return f"{page.total} {noun}"
+    return f"{page.first}-{page.first + len(page.items) - 1} de {page.total}"
+
+# Markdown
+
+@singledispatch
+def to_markdown(result) -> str:
+    return str(result)
+
+@to_markdown.register
+def _(result: Notice) -> str:
+    return f"{result.icon} {result.text}" if result.icon else result.text
+
+@to_markdown.register
+def _(result: Failure) -> str:
+    return f"❌ {result.text}"
+
+@to_markdown.register
+def _(result: CostEstimate) -> str:
+    return f"💰 **Custos dos últimos {result.days} dias:** {money(result.currency, result.total)}"
+
+@to_markdown.register
+def _(result: CostBreakdown) -> str:
+    if not result.items:
+        return f"📊 Nenhum custo registrado nos últimos {result.days} dias."
+    total, shown, currency = result.total, result.shown, result.currency
+    lines = [f"📊 **Custos por {COST_DIMENSION_LABELS[result.dimension]} (últimos {result.days} dias):**\n"]
+    for name, amount in shown:
+        share = amount / total * 100 if total else 0
+        lines.append(f"• {name}: {money(currency, amount)} ({share:.1f}%)")
+    if len(result.items) > len(shown):
+        rest = total - sum(amount for _, amount in shown)
+        lines.append(f"• ... e mais {len(result.items) - len(shown)}: {money(currency, rest)}")
+    lines.append(f"\n💰 **Total:** {money(currency, total)}")
+    return "\n".join(lines)
+
+@to_markdown.register
+def _(result: DailyCosts) -> str:
+    if not result.days:
+        return "📊 Nenhum custo registrado no período."
+    currency = result.currency
+    lines = [f"📅 **Custos diários (últimos {len(result.days)} dias):**\n"]
+    for day, amount in result.days:
+        lines.append(f"• {day.strftime('%d/%m/%Y')}: {money(currency, amount)}")
+    total = result.total
+    lines.append(f"\n💰 **Total:** {money(currency, total)} (média de {money(currency, total / len(result.days))}/dia)")
+    return "\n".join(lines)
+
+@to_markdown.register
+def _(result: CostForecast) -> str:
+    currency = result.currency
+    lines = [f"🔮 **Previsão de custos (próximos {result.days} dias, método {result.method}):** "
+             f"{money(currency, result.total)}",
+             f"Média diária: {money(currency, result.current_daily)} nos últimos 7 dias → "
+             f"{money(currency, result.total / result.days)} prevista\n"]
+    for name, amount in result.services[:result.top]:
+        lines.append(f"• {name}: {money(currency, amount)}")
+    return "\n".join(lines)
+
+@to_markdown.register
+def _(result: CostAnomalies) -> str:
+    if not result.anomalies:
+        return f"✅ Nenhuma anomalia de custo nos últimos {result.days} dias."
+    currency = result.currency
+    lines = [f"🚨 **Anomalias de custo (últimos {result.days} dias):**\n"]
+    for anomaly in result.anomalies[:result.top]:
+        lines.append(f"• {anomaly.day.strftime('%d/%m/%Y')} - {anomaly.label}: {money(currency, anomaly.amount)} "
+                     f"(esperado {money(currency, anomaly.expected)}, z={anomaly.score:.1f})")
+    if len(result.anomalies) > result.top:
+        lines.append(f"• ... e mais {len(result.anomalies) - result.top} anomalia(s)")
+    return "\n".join(lines)
+
+@to_markdown.register
+def _(stats: S3ObjectStats) -> str:
+    label = f"{stats.bucket}/{stats.prefix}" if stats.prefix else stats.bucket
+    if not stats.count:
+        return f"📁 **Bucket '{label}':** Vazio (0 arquivos)"
+
+    lines = [f"📁 **Bucket '{label}':** {stats.count} arquivo(s) encontrado(s) "
+             f"({format_bytes(stats.total_bytes)})"]
+
+    lines.append("\n**Por classe de armazenamento:**")
+    for name, (count, size) in sorted(stats.by_storage_class.items(), key=lambda item: (-item[1][1], item[0])):
+        lines.append(f"• {name}: {count} arquivo(s), {format_bytes(size)}")
+
+    if len(stats.by_prefix) > 1 or ROOT_PREFIX not in stats.by_prefix:
+        lines.append("\n**Por prefixo:**")
+        ranked = sorted(stats.by_prefix.items(), key=lambda item: (-item[1][1], item[0]))
+        for name, (count, size) in ranked[:S3_TOP_PREFIXES]:
+            lines.append(f"• {name or '(raiz)'}: {count} arquivo(s), {format_bytes(size)}")
+        if len(ranked) > S3_TOP_PREFIXES:
+            lines.append(f"• ... e mais {len(ranked) - S3_TOP_PREFIXES} prefixo(s)")
+
+    return "\n".join(lines)
+
+@to_markdown.register
+def _(result: InstancePage) -> str:
+    page, filters = result.page, result.filters
+    described = [filters.state, filters.type and f"tipo {filters.type}", filters.tag and f"tag {filters.tag}",
+                 filters.name and f"nome iniciando com '{filters.name}'"]
+    label = ', '.join(part for part in described if part)
+    lines = []
+    if not page.items:
+        lines.append(f"🖥️ Nenhuma instância EC2 encontrada{f' ({label})' if label else ''}.")
+    else:
+        lines.append(f"🖥️ **Instâncias EC2{f' ({label})' if label else ''}:** {page_range(page, 'instância(s)')}\n")
+        for instance in page.items:
+            icon = STATE_ICONS.get(instance.state, '🟡')
+            name = f" · {instance.name}" if instance.name else ''
+            lines.append(f"{icon} **{instance.id}** ({instance.type}) - {instance.state} · {instance.region}{name}")
+
+    args = [filters.state] if filters.state else []
+    for flag, value in (('tipo', filters.type), ('tag', filters.tag), ('nome', filters.name)):
+        if value:
+            args += [f'--{flag}', value]
+    lines += page_footer(page, 'ec2 instancias', args, 'regiao')
+    if result.failed:
+        lines.append("⚠️ Falha em: " + ", ".join(result.failed))
+    return "\n".join(lines)
+
+@to_markdown.register
+def _(result: BucketPage) -> str:
+    page = result.page
+    label = f" com prefixo '{result.prefix}'" if result.prefix else ''
+    if not page.items:
+        return f"📦 Nenhum bucket S3 encontrado{label}."
+    lines = [f"🗂️ **Seus buckets S3{label}:** {page_range(page, 'bucket(s)')}\n"]
+    for name, created in page.items:
+        lines.append(f"• {name} (criado em {created.strftime('%d/%m/%Y')})")
+    lines += page_footer(page, 's3 buckets', [result.prefix] if result.prefix else [], 'nome')
+    return "\n".join(lines)
+
+# JSON
+
+def rounded(value: float) -> float:
+    return round(float(value), 2)
+
+@singledispatch
+def to_data(result) -> Dict[str, Any]:
+    return {'text': to_text(str(result))}
+
+@to_data.register
+def _(result: Notice) -> Dict[str, Any]:
+    return {'text': result.text}
+
+@to_data.register
+def _(result: Failure) -> Dict[str, Any]:
+    return {'error': result.text}
+
+@to_data.register
+def _(result: CostEstimate) -> Dict[str, Any]:
+    return {'days': result.days, 'currency': result.currency, 'total': rounded(result.total)}
+
+@to_data.register
+def _(result: CostBreakdown) -> Dict[str, Any]:
+    return {'dimension': result.dimension, 'days': result.days, 'currency': result.currency,
+            'total': rounded(result.total), 'count': len(result.items),
+            'items': [{'name': name, 'amount': rounded(value)} for name, value in result.shown]}
+
+@to_data.register
+def _(result: DailyCosts) -> Dict[str, Any]:
+    return {'currency': result.currency, 'total': rounded(result.total),
+            'days': [{'day': day.isoformat(), 'amount': rounded(value)} for day, value in result.days]}
+
+@to_data.register
+def _(result: CostForecast) -> Dict[str, Any]:
+    return {'days': result.days, 'method': result.method, 'currency': result.currency,
+            'total': rounded(result.total), 'current_daily': rounded(result.current_daily),
+            'forecast_daily': rounded(result.total / result.days),
+            'services': [{'name': name, 'amount': rounded(value)} for name, value in result.services[:result.top]]}
+
+@to_data.register
+def _(result: CostAnomalies) -> Dict[str, Any]:
+    return {'days': result.days, 'currency': result.currency, 'count': len(result.anomalies),
+            'anomalies': [{'day': anomaly.day.isoformat(), 'label': anomaly.label, 'amount': rounded(anomaly.amount),
+                           'expected': rounded(anomaly.expected), 'score': round(anomaly.score, 2)}
+                          for anomaly in result.anomalies[:result.top]]}
+
+@to_data.register
+def _(stats: S3ObjectStats) -> Dict[str, Any]:
+    def groups(totals):
+        return {name: {'count': count, 'bytes': size} for name, (count, size) in sorted(totals.items())}
+
+    return {'bucket': stats.bucket, 'prefix': stats.prefix, 'count': stats.count, 'total_bytes': stats.total_bytes,
+            'pages': stats.pages, 'by_storage_class': groups(stats.by_storage_class),
+            'by_prefix': groups(stats.by_prefix)}
+
+def instance_data(instance: Instance) -> Dict[str, Any]:
+    return {'id': instance.id, 'type': instance.type, 'state': instance.state, 'region': instance.region,
+            'name': instance.name, 'tags': dict(instance.tags), 'launch_time': instance.launch_time.isoformat()}
+
+def page_data(page: Page) -> Dict[str, Any]:
+    return {'total': page.total, 'page': page.number, 'pages': page.pages, 'size': page.size, 'order': page.order,
+            'next_cursor': page.next_cursor}
+
+@to_data.register
+def _(result: InstancePage) -> Dict[str, Any]:
+    return dict(page_data(result.page), filters=result.filters._asdict(), failed=result.failed,
+                instances=[instance_data(instance) for instance in result.page.items])
+
+@to_data.register
+def _(result: BucketPage) -> Dict[str, Any]:
+    return dict(page_data(result.page), prefix=result.prefix,
+                buckets=[{'name': name, 'created': created.isoformat()} for name, created in result.page.items])
@@ -0,0 +1,100 @@
+"""
+Resultados tipados dos comandos
+AWSServices devolve estes registros em vez de texto pronto; renderers.py os
+converte em markdown (o chat), texto simples ou JSON. Registros são tuplas
+nomeadas (sem __dict__ por instância), então listagens grandes ocupam pouco
+e podem ser cacheadas, filtradas e renderizadas de novo em outro formato.
+
+Contagens S3 (s3_inventory.S3ObjectStats) já são registros e são
+renderizadas diretamente; as listagens S3/EC2 chegam como páginas (listing.py).
+"""
+
+from datetime import date, datetime
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
+
+from listing import InstanceFilter, Page
+
+# cost_forecast importa o NumPy, carregado só na primeira consulta de custos
+if TYPE_CHECKING:
+    from cost_forecast import Anomaly
+
+class Notice(NamedTuple):
+    """Resposta sem dados (ex.: histórico insuficiente)"""
+    text: str
+    icon: str = ''
+
+class Failure(NamedTuple):
+    """Erro exibido ao usuário"""
+    text: str
+
+class CostEstimate(NamedTuple):
+    """Custo total de um período"""
+    total: float
+    currency: str
+    days: int = 30
+
+class CostShare(NamedTuple):
+    """Custo de um serviço, região ou conta"""
+    name: str
+    amount: float
+
+class CostBreakdown(NamedTuple):
+    """Custos agrupados por uma dimensão, do maior para o menor"""
+    dimension: str
+    days: int
+    currency: str
+    items: List[CostShare]
+    top: Optional[int] = None
+
+    @property
+    def total(self) -> float:
+        return sum(item.amount for item in self.items)
+
+    @property
+    def shown(self) -> List[CostShare]:
+        return self.items[:self.top] if self.top else self.items
+
+class DailyCost(NamedTuple):
+    day: date
+    amount: float
+
+class DailyCosts(NamedTuple):
+    """Custo total de cada dia, do mais antigo para o mais recente"""
+    currency: str
+    days: List[DailyCost]
+
+    @property
+    def total(self) -> float:
+        return sum(day.amount for day in self.days)
+
+class CostForecast(NamedTuple):
+    """Previsão dos próximos dias; services ordenados pelo custo previsto"""
+    days: int
+    method: str
+    currency: str
+    total: float
+    current_daily: float
+    services: List[CostShare]
+    top: int = 5
+
+class CostAnomalies(NamedTuple):
+    """Anomalias de custo, das mais graves para as menos graves"""
+    days: int
+    currency: str
+    anomalies: List['Anomaly']
+    top: int = 10
+
+class Bucket(NamedTuple):
+    name: str
+    created: datetime
+
+class BucketPage(NamedTuple):
+    """Página de buckets S3 (Bucket) filtrados pelo prefixo do nome"""
+    page: Page
+    prefix: str = ''
+
+class InstancePage(NamedTuple):
+    """Página de instâncias EC2 (ec2_inventory.Instance) e regiões que falharam"""
+    page: Page
+    filters: InstanceFilter
+    failed: List[str]
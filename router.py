@@ -0,0 +1,212 @@
+"""
+Roteador de comandos do chat
+Os comandos se registram com suas frases, argumentos e opções; todas as
+frases são compiladas em uma única expressão regular ancorada no início da
+mensagem, então o despacho não depende da ordem nem do número de comandos.
+"""
+
+import re
+import shlex
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics import COMMAND_SECONDS, record, span
+
+class CommandError(ValueError):
+    """Erro de uso de um comando; a mensagem é exibida ao usuário"""
+
+@dataclass(frozen=True)
+class Arg:
+    """Argumento posicional de um comando"""
+    name: str
+    help: str = ''
+    type: Callable[[str], Any] = str
+    required: bool = False
+    default: Any = None
+    label: str = ''
+
+    @property
+    def display(self) -> str:
+        return self.label or self.name
+
+@dataclass(frozen=True)
+class Flag:
+    """Opção '--nome'; sem type é booleana, com type recebe um valor"""
+    name: str
+    help: str = ''
+    type: Optional[Callable[[str], Any]] = None
+    default: Any = None
+
+    @property
+    def dest(self) -> str:
+        return self.name.replace('-', '_')
+
+@dataclass
+class Command:
+    """Comando registrado"""
+    phrases: Tuple[str, ...]
+    handler: Callable[..., Any]
+    help: str = ''
+    args: Tuple[Arg, ...] = ()
+    flags: Tuple[Flag, ...] = ()
+    example: str = ''
+    # Handlers com stream=True recebem progress(texto, status=False) para resultados parciais
+    stream: bool = False
+    # Comandos que podem exceder o idle timeout do ALB rodam como tarefas (jobs.py)
+    background: bool = False
+    _flags_by_name: Dict[str, Flag] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._flags_by_name = {flag.name: flag for flag in self.flags}
+
+    @property
+    def name(self) -> str:
+        return self.phrases[0]
+
+    @property
+    def usage(self) -> str:
+        parts = [self.name]
+        for arg in self.args:
+            parts.append(arg.display if arg.required else f"[{arg.display}]")
+        return ' '.join(parts)
+
+    def parse(self, rest: str) -> Dict[str, Any]:
+        """Converte o texto após a frase do comando em argumentos nomeados"""
+        try:
+            tokens = shlex.split(rest)
+        except ValueError:
+            tokens = rest.split()
+
+        values: Dict[str, Any] = {}
+        positional: List[str] = []
+        tokens = iter(tokens)
+        for token in tokens:
+            if not token.startswith('--'):
+                positional.append(token)
+                continue
+            name, _, inline = token[2:].partition('=')
+            flag = self._flags_by_name.get(name.lower())
+            if flag is None:
+                raise CommandError(f"Opção desconhecida '--{name}' para '{self.name}'.")
+            if flag.type is None:
+                values[flag.dest] = True
+                continue
+            raw = inline or next(tokens, None)
+            if raw is None:
+                raise CommandError(f"A opção '--{flag.name}' precisa de um valor.")
+            values[flag.dest] = self._convert(flag.type, raw, f"--{flag.name}")
+
+        if len(positional) > len(self.args):
+            raise CommandError(f"Argumentos demais para '{self.name}'. Uso: '{self.usage}'")
+        for index, arg in enumerate(self.args):
+            if index < len(positional):
+                values[arg.name] = self._convert(arg.type, positional[index], arg.display)
+            elif arg.required:
+                example = self.example or self.usage
+                raise CommandError(f"Por favor, especifique {arg.help or arg.display}. Exemplo: '{example}'")
+            else:
+                values[arg.name] = arg.default
+        for flag in self.flags:
+            values.setdefault(flag.dest, False if flag.type is None else flag.default)
+        return values
+
+    @staticmethod
+    def _convert(converter, raw, label):
+        try:
+            return converter(raw)
+        except CommandError:
+            raise
+        except (TypeError, ValueError):
+            raise CommandError(f"Valor inválido para {label}: '{raw}'")
+
+class CommandRouter:
+    """Registro de comandos com despacho por uma única regex compilada"""
+
+    def __init__(self):
+        self._commands: List[Command] = []
+        self._by_phrase: Dict[str, Command] = {}
+        self._pattern = None
+
+    def command(self, *phrases, help='', args=(), flags=(), example='', stream=False, background=False):
+        """Decorador que registra um handler handler(services, **argumentos)"""
+        def decorator(handler):
+            self.register(Command(tuple(phrases), handler, help, tuple(args), tuple(flags),
+                                  example, stream, background))
+            return handler
+        return decorator
+
+    def register(self, command: Command):
+        for phrase in command.phrases:
+            phrase = self._normalize(phrase)
+            if phrase in self._by_phrase:
+                raise ValueError(f"Frase de comando duplicada: '{phrase}'")
+            self._by_phrase[phrase] = command
+        self._commands.append(command)
+        self._pattern = None
+
+    @property
+    def commands(self) -> List[Command]:
+        return list(self._commands)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return ' '.join(text.split())
+
+    def _compiled(self):
+        if self._pattern is None:
+            # Frases mais longas primeiro: 'custos top' precisa vencer 'custos'
+            phrases = sorted(self._by_phrase, key=len, reverse=True)
+            alternation = '|'.join(re.escape(phrase) for phrase in phrases)
+            self._pattern = re.compile(rf'(?P<phrase>{alternation})(?:\s+(?P<rest>.*))?$', re.DOTALL)
+        return self._pattern
+
+    def match(self, message: str) -> Optional[Tuple[Command, str]]:
+        """Identifica o comando no início da mensagem e o texto restante"""
+        normalized = self._normalize(message)
+        match = self._compiled().match(normalized.lower())
+        if match is None:
+            return None
+        # Os argumentos mantêm a capitalização original (ex.: prefixos S3)
+        rest = normalized[match.end('phrase'):].strip()
+        return self._by_phrase[match.group('phrase')], rest
+
+    def job_key(self, message: str) -> Optional[str]:
+        """Chave canônica (comando + argumentos) de um comando em background, ou None"""
+        found = self.match(message)
+        if found is None or not found[0].background:
+            return None
+        command, rest = found
+        try:
+            arguments = command.parse(rest)
+        except CommandError:
+            return None
+        return command.name + ''.join(f" {name}={arguments[name]!r}" for name in sorted(arguments))
+
+    def dispatch(self, message: str, services, progress=None) -> Any:
+        """Executa o comando da mensagem; CommandError se não reconhecido ou mal formado"""
+        with span('route'):
+            found = self.match(message)
+            if found is None:
+                raise CommandError("Comando não reconhecido. Digite 'ajuda' para ver os comandos disponíveis.")
+            command, rest = found
+            arguments = command.parse(rest)
+        if progress is not None and command.stream:
+            arguments['progress'] = progress
+        started = time.perf_counter()
+        try:
+            return command.handler(services, **arguments)
+        finally:
+            elapsed = time.perf_counter() - started
+            COMMAND_SECONDS.observe(elapsed, command.name)
+            record('command', elapsed)
+
+    def help_text(self) -> str:
+        """Texto de ajuda gerado a partir dos comandos registrados"""
+        lines = ["🤖 **Comandos disponíveis:**", ""]
+        for command in self._commands:
+            lines.append(f"• `{command.usage}` - {command.help}")
+            for flag in command.flags:
+                value = f" {flag.dest.upper()}" if flag.type else ''
+                lines.append(f"    `--{flag.name}{value}` {flag.help}")
+        return "\n".join(lines)
@@ -21,7 +21,11 @@ def run_tests():
     print("📋 Executando testes unitários...")
     result_unit = subprocess.run([
         sys.executable, '-m', 'pytest', 
-        'tests/test_app.py', 'tests/test_aws_services.py',
+        'tests/test_app.py', 'tests/test_aws_services.py', 'tests/test_asgi.py', 'tests/test_router.py', 'tests/test_jobs.py',
+        'tests/test_cost_explorer.py', 'tests/test_cost_forecast.py',
+        'tests/test_cost_calculator.py', 'tests/test_capacity_planner.py', 'tests/test_fake_aws.py',
+        'tests/test_metrics.py', 'tests/test_mcp_server.py', 'tests/test_startup_profile.py',
+        'tests/test_cache_backends.py', 'tests/test_renderers.py', 'tests/test_listing.py',
         '-v', '--tb=short'
     ], capture_output=True, text=True)
     
@@ -33,7 +37,7 @@ def run_tests():
     print("\n🔗 Executando testes de integração...")
     result_integration = subprocess.run([
         sys.executable, '-m', 'pytest', 
-        'tests/test_integration.py',
+        'tests/test_integration.py', 'tests/test_load_test.py',
         '-v', '--tb=short'
     ], capture_output=True, text=True)
     
@@ -0,0 +1,129 @@
+"""
+Contagem de objetos S3 em streaming para buckets muito grandes
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from pagination import paginate
+
+ROOT_PREFIX = ''
+
+# Limite de listagens simultâneas por bucket, para não ser limitado (throttling) pelo S3
+DEFAULT_MAX_WORKERS = int(os.environ.get('S3_LIST_MAX_WORKERS', '8'))
+MAX_WORKERS_CAP = 32
+
+@dataclass
+class S3ObjectStats:
+    """Agregados de uma listagem S3: apenas contadores, nunca as chaves"""
+    bucket: str
+    prefix: str = ''
+    count: int = 0
+    total_bytes: int = 0
+    pages: int = 0
+    # classe de armazenamento / prefixo de primeiro nível -> [objetos, bytes]
+    by_storage_class: Dict[str, List[int]] = field(default_factory=dict)
+    by_prefix: Dict[str, List[int]] = field(default_factory=dict)
+    
+    def add_page(self, contents):
+        """Acumula os objetos de uma página de list_objects_v2"""
+        offset = len(self.prefix)
+        for obj in contents:
+            size = obj.get('Size', 0)
+            self.count += 1
+            self.total_bytes += size
+            
+            bucket = self.by_storage_class.setdefault(obj.get('StorageClass', 'STANDARD'), [0, 0])
+            bucket[0] += 1
+            bucket[1] += size
+            
+            key = obj['Key']
+            slash = key.find('/', offset)
+            top = key[offset:slash + 1] if slash != -1 else ROOT_PREFIX
+            bucket = self.by_prefix.setdefault(top, [0, 0])
+            bucket[0] += 1
+            bucket[1] += size
+        self.pages += 1
+    
+    def merge(self, other):
+        """Incorpora agregados parciais de outra listagem do mesmo bucket"""
+        self.count += other.count
+        self.total_bytes += other.total_bytes
+        self.pages += other.pages
+        for source, target in ((other.by_storage_class, self.by_storage_class),
+                               (other.by_prefix, self.by_prefix)):
+            for name, (count, size) in source.items():
+                bucket = target.setdefault(name, [0, 0])
+                bucket[0] += count
+                bucket[1] += size
+        return self
+
+def count_objects(s3_client, bucket: str, prefix: Optional[str] = None,
+                  progress: Optional[Callable[[S3ObjectStats], None]] = None) -> S3ObjectStats:
+    """Conta objetos e bytes percorrendo todas as páginas em memória constante"""
+    stats = S3ObjectStats(bucket=bucket, prefix=prefix or '')
+    kwargs = {'Bucket': bucket}
+    if prefix:
+        kwargs['Prefix'] = prefix
+    
+    for page in paginate(s3_client.list_objects_v2, 'ContinuationToken',
+                         'NextContinuationToken', **kwargs):
+        stats.add_page(page.get('Contents', ()))
+        if progress:
+            progress(stats)
+    return stats
+
+def discover_prefixes(s3_client, bucket: str, prefix: Optional[str] = None):
+    """Lista os prefixos de primeiro nível (Delimiter='/') e conta os objetos soltos"""
+    root = S3ObjectStats(bucket=bucket, prefix=prefix or '')
+    shards = []
+    kwargs = {'Bucket': bucket, 'Delimiter': '/'}
+    if prefix:
+        kwargs['Prefix'] = prefix
+    
+    for page in paginate(s3_client.list_objects_v2, 'ContinuationToken',
+                         'NextContinuationToken', **kwargs):
+        root.add_page(page.get('Contents', ()))
+        shards.extend(common['Prefix'] for common in page.get('CommonPrefixes', ()))
+    return root, shards
+
+def count_objects_parallel(s3_client, bucket: str, prefix: Optional[str] = None,
+                           max_workers: Optional[int] = None,
+                           progress: Optional[Callable[[S3ObjectStats], None]] = None) -> S3ObjectStats:
+    """Conta objetos listando cada prefixo de primeiro nível em paralelo
+
+    O resultado é idêntico ao de count_objects; só o tempo total muda.
+    Clientes boto3 são thread-safe, então o mesmo cliente é compartilhado.
+    """
+    stats, shards = discover_prefixes(s3_client, bucket, prefix)
+    if not shards:
+        return stats
+    
+    workers = min(max_workers or DEFAULT_MAX_WORKERS, MAX_WORKERS_CAP, len(shards))
+    offset = len(stats.prefix)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='s3-shard') as pool:
+        futures = {pool.submit(count_objects, s3_client, bucket, shard): shard for shard in shards}
+        try:
+            for future in as_completed(futures):
+                shard_stats = future.result()
+                # Cada shard é um único prefixo de primeiro nível do ponto de vista do resultado
+                shard_stats.by_prefix = {futures[future][offset:]: [shard_stats.count, shard_stats.total_bytes]}
+                stats.merge(shard_stats)
+                if progress:
+                    progress(stats)
+        except BaseException:
+            # Falha ou cancelamento: não inicia os shards que ainda estão na fila
+            for future in futures:
+                future.cancel()
+            raise
+    return stats
+
+def format_bytes(size: float) -> str:
+    """Formata bytes em unidade legível (B, KB, MB, ...)"""
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
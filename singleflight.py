@@ -0,0 +1,81 @@
+"""
+Coalescência de chamadas idênticas simultâneas (single-flight)
+Enquanto uma chamada com a mesma chave está em andamento, as demais esperam
+por ela e recebem o mesmo resultado. Nada é reaproveitado depois que a
+chamada termina, então não há risco de servir dados antigos.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class SingleFlight:
+    """Executa fn() uma única vez por chave entre chamadas concorrentes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Executa fn() ou aguarda a execução em andamento com a mesma chave"""
+        with self._lock:
+            self.calls += 1
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _Call()
+                    self._calls[key] = call
+                    self.executions += 1
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                return self._run(key, call, fn)
+
+            call.done.wait()
+            if call.error is None:
+                return call.value
+            if isinstance(call.error, Exception):
+                raise call.error
+            # O líder foi interrompido por algo próprio dele (ex.: tarefa cancelada);
+            # quem esperava tenta de novo em vez de herdar a interrupção
+            with self._lock:
+                self.coalesced -= 1
+
+    def _run(self, key, call, fn):
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores: chamadas recebidas, executadas de fato e coalescidas"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls)
+            }
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Perfil de inicialização do app
+Mede, sempre em processos novos, o custo de importação por pacote
+(python -X importtime), o custo de cada etapa de inicialização (importar o
+app, primeiro /ready, primeiro /, criação dos clientes boto3) e o tempo até
+a primeira resposta saudável do /ready com o gunicorn ou o uvicorn.
+
+Executar:
+    python startup_profile.py
+    python startup_profile.py --serve gunicorn --runs 5
+    python startup_profile.py --json > startup.json
+"""
+
+import argparse
+import http.client
+import importlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SERVERS = {
+    'gunicorn': lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+    'uvicorn': lambda port: [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port), '--log-level',
+                             'warning'],
+}
+
+def child_env() -> Dict[str, str]:
+    # Criar clientes não chama a AWS, mas EC2 exige uma região
+    env = dict(os.environ)
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    return env
+
+def parse_importtime(output: str) -> Dict[str, float]:
+    """Tempo próprio (ms) de importação por pacote de primeiro nível, do maior para o menor"""
+    totals = defaultdict(float)
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(own) / 1000
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+def import_profile(module: str = 'app') -> Dict[str, float]:
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=ROOT,
+                            env=child_env(), capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+def measure_phases() -> List[dict]:
+    """Etapas da inicialização no processo atual (deve ser um processo novo)"""
+    phases = []
+
+    def timed(phase, fn):
+        start = time.perf_counter()
+        error = None
+        try:
+            fn()
+        except Exception as e:
+            error = str(e)
+        phases.append({'phase': phase, 'ms': round((time.perf_counter() - start) * 1000, 1), 'error': error})
+
+    timed('import app', lambda: importlib.import_module('app'))
+    chat_app = sys.modules['app']
+    client = chat_app.app.test_client()
+    timed('GET /ready', lambda: client.get('/ready'))
+    timed('GET /', lambda: client.get('/'))
+    for service in ('s3', 'ec2', 'ce'):
+        timed(f'cliente {service}', lambda: chat_app.aws_services.clients.get(service))
+    return phases
+
+def init_profile() -> List[dict]:
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--phases'], cwd=ROOT, env=child_env(),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+def time_to_ready(server: str, path: str = '/ready', timeout: float = 30) -> float:
+    """Milissegundos entre iniciar o servidor e a primeira resposta 200 em path"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    env = dict(child_env(), GUNICORN_ACCESS_LOG='')
+    start = time.perf_counter()
+    process = subprocess.Popen(SERVERS[server](port), cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"O servidor '{server}' terminou ao iniciar (código {process.returncode})")
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+                connection.request('GET', path)
+                if connection.getresponse().status == 200:
+                    return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"O servidor '{server}' não respondeu em {timeout:.0f}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def profile(serve: Optional[str] = None, runs: int = 3, path: str = '/ready', top: int = 10) -> dict:
+    imports = import_profile()
+    report = {
+        'import_ms': round(sum(imports.values()), 1),
+        'imports': {name: round(ms, 1) for name, ms in list(imports.items())[:top]},
+        'phases': init_profile(),
+    }
+    if serve:
+        samples = [time_to_ready(serve, path) for _ in range(runs)]
+        report['ready'] = {'server': serve, 'path': path, 'runs': runs,
+                           'median_ms': round(statistics.median(samples), 1),
+                           'samples_ms': [round(sample, 1) for sample in samples]}
+    return report
+
+def format_report(report: dict) -> str:
+    lines = [f"Importação (python -X importtime -c 'import app'): {report['import_ms']:.0f} ms"]
+    lines += [f"  {name:<24} {ms:8.1f} ms" for name, ms in report['imports'].items()]
+    lines.append("Inicialização:")
+    for phase in report['phases']:
+        suffix = f"  ❌ {phase['error']}" if phase['error'] else ''
+        lines.append(f"  {phase['phase']:<24} {phase['ms']:8.1f} ms{suffix}")
+    if 'ready' in report:
+        ready = report['ready']
+        lines.append(f"Primeira resposta de {ready['path']} ({ready['server']}, {ready['runs']} execuções): "
+                     f"mediana {ready['median_ms']:.0f} ms")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de inicialização do app")
+    parser.add_argument('--serve', choices=sorted(SERVERS), help='mede também o tempo até o primeiro /ready')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--path', default='/ready', help='rota usada como health check')
+    parser.add_argument('--top', type=int, default=10, help='pacotes listados na importação')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--phases', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.phases:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(measure_phases()))
+        return 0
+
+    report = profile(args.serve, args.runs, args.path, args.top)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const messageInput = document.getElementById('messageInput');
     const sendButton = document.getElementById('sendButton');
     const chatMessages = document.getElementById('chatMessages');
+    // Navegadores sem streams de fetch usam o endpoint /chat tradicional
+    const supportsStreaming = typeof ReadableStream !== 'undefined' && typeof TextDecoder !== 'undefined';
+    const JOB_POLL_INTERVAL_MS = 1500;
 
     // Enviar mensagem ao pressionar Enter
     messageInput.addEventListener('keypress', function(e) {
@@ -14,6 +17,14 @@ document.addEventListener('DOMContentLoaded', function() {
     // Enviar mensagem ao clicar no botão
     sendButton.addEventListener('click', sendMessage);
 
+    // Comandos sugeridos nas respostas (ex.: a próxima página de uma listagem) são clicáveis
+    chatMessages.addEventListener('click', function(e) {
+        const command = e.target.closest('code.command');
+        if (!command || sendButton.disabled) return;
+        messageInput.value = command.textContent;
+        sendMessage();
+    });
+
     function sendMessage() {
         const message = messageInput.value.trim();
         
@@ -28,7 +39,22 @@ document.addEventListener('DOMContentLoaded', function() {
         sendButton.innerHTML = '<div class="loading"></div>';
 
         // Enviar para o servidor
-        fetch('/chat', {
+        const request = supportsStreaming ? streamMessage(message) : postMessage(message);
+        request
+        .catch(error => {
+            console.error('Erro:', error);
+            addMessage('❌ Erro de conexão. Tente novamente.', 'bot');
+        })
+        .finally(() => {
+            // Reabilitar botão
+            sendButton.disabled = false;
+            sendButton.innerHTML = 'Enviar';
+            messageInput.focus();
+        });
+    }
+
+    function postMessage(message) {
+        return fetch('/chat', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -38,18 +64,103 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             // Adicionar resposta do bot
+            const messageContent = addMessage(data.response, 'bot');
+            // Operações longas retornam o id de uma tarefa em background
+            if (data.job_id) {
+                return pollJob(data.job_id, messageContent);
+            }
+        });
+    }
+
+    function pollJob(jobId, messageContent) {
+        return new Promise((resolve, reject) => {
+            function poll() {
+                fetch(`/jobs/${jobId}`)
+                .then(response => response.json())
+                .then(job => {
+                    if (job.error && !job.status) {
+                        renderContent(messageContent, `❌ ${job.error}`, 'bot');
+                        resolve();
+                    } else if (job.response !== undefined) {
+                        renderContent(messageContent, job.response, 'bot');
+                        resolve();
+                    } else {
+                        const lines = job.progress.partials.concat(job.progress.status ? [job.progress.status] : []);
+                        if (lines.length) {
+                            renderContent(messageContent, lines.join('\n'), 'bot');
+                        }
+                        setTimeout(poll, JOB_POLL_INTERVAL_MS);
+                    }
+                })
+                .catch(reject);
+            }
+            poll();
+        });
+    }
+
+    // Recebe eventos SSE de /chat/stream e atualiza a mesma mensagem conforme chegam
+    async function streamMessage(message) {
+        const response = await fetch('/chat/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ message: message })
+        });
+
+        if (!response.ok || !response.body) {
+            const data = await response.json();
             addMessage(data.response, 'bot');
-        })
-        .catch(error => {
-            console.error('Erro:', error);
-            addMessage('❌ Erro de conexão. Tente novamente.', 'bot');
-        })
-        .finally(() => {
-            // Reabilitar botão
-            sendButton.disabled = false;
-            sendButton.innerHTML = 'Enviar';
-            messageInput.focus();
+            return;
+        }
+
+        const messageContent = addMessage('⏳ Processando...', 'bot');
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const partials = [];
+        let status = '';
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const event = parseEvent(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+                if (!event) continue;
+
+                if (event.type === 'result') {
+                    renderContent(messageContent, event.data.response, 'bot');
+                    continue;
+                }
+                if (event.type === 'partial') {
+                    partials.push(event.data.text);
+                } else if (event.type === 'status') {
+                    status = event.data.text;
+                } else {
+                    continue;
+                }
+                renderContent(messageContent, partials.concat(status ? [status] : []).join('\n'), 'bot');
+            }
+        }
+    }
+
+    function parseEvent(frame) {
+        let type = 'message';
+        const data = [];
+        frame.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                type = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                data.push(line.slice(5).trim());
+            }
         });
+        // Comentários (keep-alive) não têm dados
+        if (!data.length) return null;
+        return { type: type, data: JSON.parse(data.join('\n')) };
     }
 
     function addMessage(content, sender) {
@@ -58,24 +169,38 @@ document.addEventListener('DOMContentLoaded', function() {
         
         const messageContent = document.createElement('div');
         messageContent.className = 'message-content';
+        renderContent(messageContent, content, sender);
         
+        messageDiv.appendChild(messageContent);
+        chatMessages.appendChild(messageDiv);
+        
+        // Scroll para a última mensagem
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+        return messageContent;
+    }
+
+    const COMMAND_PATTERN = /^(ec2 instancias|s3 buckets) .*--cursor /;
+
+    function escapeHtml(text) {
+        return text.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;')
+            .replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+    }
+
+    function renderContent(messageContent, content, sender) {
         if (sender === 'bot') {
-            // Processar markdown básico para mensagens do bot
-            content = content
+            // Processar markdown básico para mensagens do bot; nomes e tags vêm da conta AWS e são escapados
+            content = escapeHtml(content)
+                .replace(/`([^`]+)`/g, (match, code) => COMMAND_PATTERN.test(code)
+                    ? `<code class="command" title="Executar">${code}</code>` : `<code>${code}</code>`)
                 .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
                 .replace(/\*(.*?)\*/g, '<em>$1</em>');
             messageContent.innerHTML = content;
         } else {
             messageContent.textContent = content;
         }
-        
-        messageDiv.appendChild(messageContent);
-        chatMessages.appendChild(messageDiv);
-        
-        // Scroll para a última mensagem
         chatMessages.scrollTop = chatMessages.scrollHeight;
     }
 
     // Focar no input ao carregar a página
     messageInput.focus();
-});
\ No newline at end of file
+});
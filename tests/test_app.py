@@ -3,11 +3,26 @@ import json
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import threading
 
 # Adicionar o diretório pai ao path para importar os módulos
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app
+from app import app, jobs
+from commands import router
+from ec2_inventory import RegionResult
+from jobs import QueueFullError
+from listing import BUCKET_ORDERS, select_page
+from results import BucketPage
+
+def parse_sse(data):
+    """Converter corpo SSE em lista de (evento, dados)"""
+    events = []
+    for frame in data.decode('utf-8').strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in frame.split('\n') if not line.startswith(':'))
+        if lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
 
 class TestFlaskApp(unittest.TestCase):
     
@@ -75,6 +90,32 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(data['response'], "🖥️ Instâncias: i-123456")
         mock_aws_services.list_ec2_instances.assert_called_once()
     
+    @patch('app.aws_services')
+    def test_chat_route_fresh_flag(self, mock_aws_services):
+        """Testar que '--fresh' ignora o cache"""
+        mock_aws_services.get_cost_estimate.return_value = "💰 Custos: $10.50"
+        
+        response = self.app.post('/chat',
+                                json={'message': 'custos --fresh'},
+                                content_type='application/json')
+        
+        self.assertEqual(response.status_code, 200)
+        mock_aws_services.get_cost_estimate.assert_called_once_with(fresh=True)
+    
+    @patch('app.aws_services')
+    def test_chat_route_formats(self, mock_aws_services):
+        """Testar o campo format: o mesmo resultado em markdown, texto e JSON"""
+        mock_aws_services.list_s3_buckets.return_value = BucketPage(select_page([], 'nome', BUCKET_ORDERS))
+        
+        def ask(format):
+            return self.app.post('/chat', json={'message': 's3 buckets', 'format': format})
+        
+        self.assertEqual(json.loads(ask('markdown').data)['response'], "📦 Nenhum bucket S3 encontrado.")
+        self.assertEqual(json.loads(ask('text').data)['response'], "Nenhum bucket S3 encontrado.")
+        data = json.loads(ask('json').data)['response']
+        self.assertEqual((data['type'], data['total'], data['buckets']), ('BucketPage', 0, []))
+        self.assertEqual(ask('html').status_code, 400)
+    
     def test_chat_route_empty_message(self):
         """Testar mensagem vazia"""
         response = self.app.post('/chat',
@@ -94,6 +135,193 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertIn('Comando não reconhecido', data['response'])
+    
+    def test_ready_route(self):
+        """Testar readiness sem tocar na AWS"""
+        with patch('app.aws_services') as mock_aws_services:
+            mock_aws_services.clients.__len__.return_value = 0
+            response = self.app.get('/ready')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), {'status': 'ready', 'aws_clients': 0})
+        mock_aws_services.clients.get.assert_not_called()
+    
+    @patch('app.aws_services')
+    def test_warm_up_in_background(self, mock_aws_services):
+        """Testar aquecimento em uma thread"""
+        import app as chat_app
+        
+        chat_app.warm_up(background=True).join(5)
+        
+        self.assertEqual(mock_aws_services.clients.get.call_count, 3)
+    
+    @patch('app.aws_services')
+    def test_warm_up(self, mock_aws_services):
+        """Testar pré-carregamento de clientes e templates mesmo com falha em um cliente"""
+        import app as chat_app
+        mock_aws_services.clients.get.side_effect = [object(), RuntimeError('sem região'), object()]
+        
+        with patch.object(app.jinja_env, 'get_template', wraps=app.jinja_env.get_template) as get_template:
+            chat_app.warm_up()
+        
+        self.assertEqual([c.args[0] for c in mock_aws_services.clients.get.call_args_list], ['s3', 'ec2', 'ce'])
+        get_template.assert_called_once_with('index.html')
+
+class TestBackgroundJobs(unittest.TestCase):
+    
+    def setUp(self):
+        """Configurar o cliente de teste e uma chamada AWS lenta"""
+        self.app = app.test_client()
+        self.app.testing = True
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        patcher = patch('app.CHAT_INLINE_WAIT', 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    @patch('app.aws_services')
+    def test_slow_command_returns_job_id(self, mock_aws_services):
+        """Testar que comandos longos retornam 202 com id da tarefa"""
+        def count_s3_objects(bucket, prefix, parallel, progress):
+            self.release.wait(5)
+            return "📁 pronto"
+        mock_aws_services.count_s3_objects.side_effect = count_s3_objects
+        
+        response = self.app.post('/chat', json={'message': 's3 arquivos bucket-lento'})
+        
+        self.assertEqual(response.status_code, 202)
+        job_id = json.loads(response.data)['job_id']
+        
+        # Requisição idêntica compartilha a mesma tarefa
+        again = self.app.post('/chat', json={'message': 's3 arquivos bucket-lento'})
+        self.assertEqual(json.loads(again.data)['job_id'], job_id)
+        
+        self.release.set()
+        jobs.get(job_id).wait(2)
+        status = json.loads(self.app.get(f'/jobs/{job_id}').data)
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual(status['response'], "📁 pronto")
+        mock_aws_services.count_s3_objects.assert_called_once()
+    
+    @patch('app.aws_services')
+    def test_cancel_job(self, mock_aws_services):
+        """Testar cancelamento de tarefa via DELETE /jobs/<id>"""
+        def list_ec2_instances(on_region, **kwargs):
+            self.release.wait(5)
+            on_region(RegionResult('us-east-1'))
+            return "nunca"
+        mock_aws_services.list_ec2_instances.side_effect = list_ec2_instances
+        
+        job_id = json.loads(self.app.post('/chat', json={'message': 'ec2 instancias'}).data)['job_id']
+        response = self.app.delete(f'/jobs/{job_id}')
+        self.release.set()
+        jobs.get(job_id).wait(2)
+        
+        self.assertEqual(response.status_code, 202)
+        status = json.loads(self.app.get(f'/jobs/{job_id}').data)
+        self.assertEqual(status['status'], 'cancelled')
+        self.assertIn('cancelada', status['response'])
+    
+    def test_unknown_job(self):
+        """Testar tarefa inexistente"""
+        self.assertEqual(self.app.get('/jobs/inexistente').status_code, 404)
+        self.assertEqual(self.app.delete('/jobs/inexistente').status_code, 404)
+
+class TestChatStream(unittest.TestCase):
+    
+    def setUp(self):
+        """Configurar o cliente de teste"""
+        self.app = app.test_client()
+        self.app.testing = True
+    
+    @patch('app.aws_services')
+    def test_stream_region_events(self, mock_aws_services):
+        """Testar eventos parciais por região e evento final"""
+        def list_ec2_instances(on_region, **kwargs):
+            on_region(RegionResult('us-east-1', instances=[{'id': 'i-1'}], elapsed=0.1))
+            on_region(RegionResult('eu-west-1', error='AccessDenied'))
+            return "🖥️ resultado final"
+        mock_aws_services.list_ec2_instances.side_effect = list_ec2_instances
+        
+        response = self.app.post('/chat/stream', json={'message': 'ec2 instancias'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.mimetype.startswith('text/event-stream'))
+        events = parse_sse(response.data)
+        self.assertEqual([name for name, _ in events], ['start', 'partial', 'partial', 'result'])
+        self.assertIn('us-east-1', events[1][1]['text'])
+        self.assertIn('falhou', events[2][1]['text'])
+        self.assertEqual(events[-1][1]['response'], "🖥️ resultado final")
+    
+    @patch('app.aws_services')
+    def test_stream_s3_status_events(self, mock_aws_services):
+        """Testar eventos de status durante a contagem S3"""
+        def count_s3_objects(bucket, prefix, parallel, progress):
+            progress(MagicMock(count=1000, total_bytes=2048, pages=1))
+            return "📁 pronto"
+        mock_aws_services.count_s3_objects.side_effect = count_s3_objects
+        
+        response = self.app.post('/chat/stream', json={'message': 's3 arquivos bucket'})
+        
+        events = parse_sse(response.data)
+        self.assertEqual(events[1][0], 'status')
+        self.assertIn('1000 arquivo(s)', events[1][1]['text'])
+        self.assertEqual(events[-1], ('result', {'response': "📁 pronto"}))
+    
+    @patch('app.aws_services')
+    def test_stream_first_event_before_aws_call(self, mock_aws_services):
+        """Testar que o evento inicial é enviado antes da chamada AWS terminar"""
+        release = threading.Event()
+        mock_aws_services.get_cost_estimate.side_effect = lambda fresh: release.wait(5) and "💰 ok"
+        
+        response = self.app.post('/chat/stream', json={'message': 'custos'}, buffered=False)
+        chunks = iter(response.response)
+        first = next(chunks)
+        
+        self.assertIn(b'event: start', first)
+        self.assertFalse(release.is_set())
+        release.set()
+        rest = b''.join(chunks)
+        self.assertIn('💰 ok'.encode('utf-8'), rest)
+    
+    @patch('app.aws_services')
+    def test_stream_disconnect_cancels_job(self, mock_aws_services):
+        """Testar que o stream roda como tarefa e é cancelado quando o cliente desconecta"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        def list_ec2_instances(on_region, **kwargs):
+            on_region(RegionResult('us-east-1', elapsed=0.1))
+            release.wait(5)
+            on_region(RegionResult('sa-east-1'))
+            return "nunca"
+        mock_aws_services.list_ec2_instances.side_effect = list_ec2_instances
+        
+        message = 'ec2 instancias --nome desconecta'
+        response = self.app.post('/chat/stream', json={'message': message}, buffered=False)
+        chunks = iter(response.response)
+        self.assertIn(b'event: start', next(chunks))
+        self.assertIn(b'us-east-1', next(chunks))
+        job = jobs._in_flight[router.job_key(message)]
+        response.close()
+        release.set()
+        
+        self.assertTrue(job.wait(2))
+        self.assertEqual(job.status, 'cancelled')
+    
+    @patch('app.jobs')
+    def test_stream_queue_full(self, mock_jobs):
+        """Testar 503 no stream com a fila de tarefas cheia"""
+        mock_jobs.submit.side_effect = QueueFullError("Fila de tarefas cheia.")
+        
+        response = self.app.post('/chat/stream', json={'message': 'ec2 instancias'})
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+    
+    def test_stream_invalid_json(self):
+        """Testar JSON inválido no stream"""
+        response = self.app.post('/chat/stream', data='invalid', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,200 @@
+import unittest
+import asyncio
+import json
+import sys
+import os
+import threading
+import time
+from unittest.mock import patch
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as chat_app
+from app import app
+from commands import router
+from asgi import ChatASGIApp
+import metrics
+
+async def asgi_request(application, method, path, body=b'', disconnect=None):
+    """Executar uma requisição ASGI e retornar (status, corpo)
+
+    disconnect (asyncio.Event), se dado, faz o cliente desconectar quando for sinalizado.
+    """
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '', 'headers': [(b'content-type', b'application/json')],
+        'client': ('127.0.0.1', 1234), 'server': ('testserver', 80)
+    }
+    sent = []
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            if disconnect is not None:
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+            await asyncio.sleep(3600)
+        received = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    status = next(m['status'] for m in sent if m['type'] == 'http.response.start')
+    content = b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+    return status, content
+
+class TestASGIApp(unittest.TestCase):
+
+    def setUp(self):
+        """Configurar aplicação ASGI"""
+        self.application = ChatASGIApp(app, max_concurrency=4, executor_workers=4, queue_timeout=0.05)
+
+    def tearDown(self):
+        self.application.executor.shutdown(wait=True)
+        self.application.stream_executor.shutdown(wait=True)
+
+    def run_request(self, *args):
+        return asyncio.run(asgi_request(self.application, *args))
+
+    @patch('app.aws_services')
+    def test_chat_command(self, mock_aws_services):
+        """Testar /chat assíncrono"""
+        mock_aws_services.list_s3_buckets.return_value = "🗂️ Buckets: bucket1"
+
+        status, body = self.run_request('POST', '/chat', json.dumps({'message': 's3 buckets'}).encode())
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['response'], "🗂️ Buckets: bucket1")
+
+    @patch('app.aws_services')
+    def test_chat_format(self, mock_aws_services):
+        """Testar o campo format no /chat assíncrono"""
+        mock_aws_services.list_s3_buckets.return_value = "🗂️ **Buckets:** bucket1"
+
+        status, body = self.run_request('POST', '/chat', json.dumps({'message': 's3 buckets', 'format': 'text'}).encode())
+        invalid, _ = self.run_request('POST', '/chat', json.dumps({'message': 's3 buckets', 'format': 'x'}).encode())
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['response'], "Buckets: bucket1")
+        self.assertEqual(invalid, 400)
+
+    def test_chat_invalid_json(self):
+        """Testar JSON inválido no /chat assíncrono"""
+        status, _ = self.run_request('POST', '/chat', b'invalid json')
+        self.assertEqual(status, 400)
+
+    def test_other_routes_delegate_to_flask(self):
+        """Testar que rotas não assíncronas são atendidas pelo Flask"""
+        status, body = self.run_request('GET', '/')
+        self.assertEqual(status, 200)
+        self.assertIn(b'AWS Chatbot', body)
+
+    @patch('app.aws_services')
+    def test_chat_metrics(self, mock_aws_services):
+        """Testar que o trace chega ao executor e as métricas saem em /metrics"""
+        mock_aws_services.list_s3_buckets.return_value = "🗂️ Buckets: bucket1"
+        commands = metrics.COMMAND_SECONDS.count('s3 buckets')
+        requests = metrics.HTTP_REQUESTS.value('POST', '/chat', '200')
+
+        with patch('metrics.finish_trace', wraps=metrics.finish_trace) as finish_trace:
+            self.run_request('POST', '/chat', json.dumps({'message': 's3 buckets'}).encode())
+        status, body = self.run_request('GET', '/metrics')
+
+        trace = finish_trace.call_args[0][0]
+        self.assertIn('command', trace.phases)
+        self.assertIn('serialize', trace.phases)
+        self.assertEqual(metrics.COMMAND_SECONDS.count('s3 buckets'), commands + 1)
+        self.assertEqual(metrics.HTTP_REQUESTS.value('POST', '/chat', '200'), requests + 1)
+        self.assertEqual(status, 200)
+        self.assertIn(b'chatbot_asgi_in_flight', body)
+
+    @patch('app.aws_services')
+    def test_slow_calls_run_concurrently(self, mock_aws_services):
+        """Testar que chamadas AWS lentas não bloqueiam outras requisições"""
+        mock_aws_services.list_ec2_instances.side_effect = lambda **kwargs: time.sleep(0.2) or "ok"
+        payload = json.dumps({'message': 'ec2 instancias'}).encode()
+
+        async def scenario():
+            start = time.perf_counter()
+            results = await asyncio.gather(*[
+                asgi_request(self.application, 'POST', '/chat', payload) for _ in range(4)
+            ])
+            return results, time.perf_counter() - start
+
+        results, elapsed = asyncio.run(scenario())
+
+        self.assertTrue(all(status == 200 for status, _ in results))
+        self.assertLess(elapsed, 0.6)
+
+    @patch('app.aws_services')
+    def test_concurrency_limit_returns_503(self, mock_aws_services):
+        """Testar resposta 503 quando o limite de concorrência é excedido"""
+        mock_aws_services.list_ec2_instances.side_effect = lambda **kwargs: time.sleep(0.3) or "ok"
+        payload = json.dumps({'message': 'ec2 instancias'}).encode()
+
+        async def scenario():
+            return await asyncio.gather(*[
+                asgi_request(self.application, 'POST', '/chat', payload) for _ in range(5)
+            ])
+
+        statuses = sorted(status for status, _ in asyncio.run(scenario()))
+
+        self.assertEqual(statuses, [200, 200, 200, 200, 503])
+
+    @patch('app.aws_services')
+    def test_stream_does_not_block_other_routes(self, mock_aws_services):
+        """Testar que /ready responde enquanto um /chat/stream está aberto"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        mock_aws_services.count_s3_objects.side_effect = lambda *args, **kwargs: release.wait(5) and "contado"
+        payload = json.dumps({'message': 's3 arquivos bucket-lento'}).encode()
+
+        async def scenario():
+            stream = asyncio.ensure_future(asgi_request(self.application, 'POST', '/chat/stream', payload))
+            await asyncio.sleep(0.1)
+            start = time.perf_counter()
+            ready = await asyncio.wait_for(asgi_request(self.application, 'GET', '/ready'), 2)
+            elapsed = time.perf_counter() - start
+            release.set()
+            return ready, elapsed, await stream
+
+        (ready, _), elapsed, (status, body) = asyncio.run(scenario())
+
+        self.assertEqual(ready, 200)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(status, 200)
+        self.assertTrue(body.startswith(b'event: start'))
+        self.assertIn('event: result\ndata: {"response": "contado"}', body.decode())
+
+    @patch('app.STREAM_HEARTBEAT_SECONDS', 0.05)
+    @patch('app.aws_services')
+    def test_stream_disconnect_cancels_job(self, mock_aws_services):
+        """Testar que a tarefa do stream é cancelada quando o cliente desconecta"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        mock_aws_services.count_s3_objects.side_effect = lambda *args, **kwargs: release.wait(5) and "contado"
+        message = 's3 arquivos bucket-desconectado'
+
+        async def scenario():
+            disconnect = asyncio.Event()
+            stream = asyncio.ensure_future(asgi_request(self.application, 'POST', '/chat/stream',
+                                                        json.dumps({'message': message}).encode(), disconnect))
+            await asyncio.sleep(0.1)
+            job = chat_app.jobs._in_flight[router.job_key(message)]
+            disconnect.set()
+            await stream
+            return job
+
+        start = time.perf_counter()
+        job = asyncio.run(scenario())
+
+        self.assertTrue(job.cancel_requested)
+        self.assertLess(time.perf_counter() - start, 2)
+
+if __name__ == '__main__':
+    unittest.main()
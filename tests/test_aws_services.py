@@ -2,44 +2,58 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import threading
+import time
+from datetime import date, timedelta
 from botocore.exceptions import ClientError, NoCredentialsError
 
 # Adicionar o diretório pai ao path para importar os módulos
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from aws_services import AWSServices
+from aws_clients import ClientPool
+from aws_services import CACHE_PARTIAL_TTL, COST_TABLE_DAYS, AWSServices, TTLCache
+from cost_store import CostStore
+from ec2_inventory import EC2Inventory, RegionResult
+from renderers import render
+from singleflight import SingleFlight
 
 class TestAWSServices(unittest.TestCase):
     
-    @patch('aws_services.boto3')
-    def setUp(self, mock_boto3):
+    def setUp(self):
         """Configurar mocks para os clientes AWS"""
         self.mock_s3_client = MagicMock()
         self.mock_ec2_client = MagicMock()
         self.mock_ce_client = MagicMock()
+        self.regional_ec2_clients = {}
         
-        mock_boto3.client.side_effect = lambda service: {
-            's3': self.mock_s3_client,
-            'ec2': self.mock_ec2_client,
-            'ce': self.mock_ce_client
-        }[service]
+        def factory(service, region):
+            if region is not None:
+                return self.regional_ec2_clients[region]
+            return {
+                's3': self.mock_s3_client,
+                'ec2': self.mock_ec2_client,
+                'ce': self.mock_ce_client
+            }[service]
         
-        self.aws_services = AWSServices()
+        self.aws_services = AWSServices(clients=ClientPool(factory=factory), cost_store=CostStore(':memory:'))
+    
+    def mock_daily_costs(self, amount):
+        """Simular o Cost Explorer diário: uma conta e um serviço com o mesmo custo todo dia"""
+        def get_cost_and_usage(**kwargs):
+            start = date.fromisoformat(kwargs['TimePeriod']['Start'])
+            end = date.fromisoformat(kwargs['TimePeriod']['End'])
+            keys = ['111'] if kwargs['GroupBy'][0]['Key'] == 'LINKED_ACCOUNT' else ['Amazon EC2', 'us-east-1']
+            group = {'Keys': keys, 'Metrics': {'BlendedCost': {'Amount': str(amount), 'Unit': 'USD'}}}
+            return {'ResultsByTime': [{'TimePeriod': {'Start': (start + timedelta(days=offset)).isoformat()},
+                                       'Groups': [group]} for offset in range((end - start).days)]}
+        
+        self.mock_ce_client.get_cost_and_usage.side_effect = get_cost_and_usage
     
     def test_get_cost_estimate_success(self):
         """Testar estimativa de custos com sucesso"""
-        self.mock_ce_client.get_cost_and_usage.return_value = {
-            'ResultsByTime': [{
-                'Total': {
-                    'BlendedCost': {
-                        'Amount': '25.50',
-                        'Unit': 'USD'
-                    }
-                }
-            }]
-        }
+        self.mock_daily_costs('0.85')
         
-        result = self.aws_services.get_cost_estimate()
+        result = render(self.aws_services.get_cost_estimate())
         self.assertIn('$25.50', result)
         self.assertIn('💰', result)
     
@@ -49,7 +63,7 @@ class TestAWSServices(unittest.TestCase):
             'ResultsByTime': []
         }
         
-        result = self.aws_services.get_cost_estimate()
+        result = render(self.aws_services.get_cost_estimate())
         self.assertIn('Não foi possível obter', result)
     
     def test_get_cost_estimate_client_error(self):
@@ -58,7 +72,7 @@ class TestAWSServices(unittest.TestCase):
             {'Error': {'Message': 'Access denied'}}, 'GetCostAndUsage'
         )
         
-        result = self.aws_services.get_cost_estimate()
+        result = render(self.aws_services.get_cost_estimate())
         self.assertIn('❌ Erro ao obter custos', result)
         self.assertIn('Access denied', result)
     
@@ -75,7 +89,7 @@ class TestAWSServices(unittest.TestCase):
         for bucket in self.mock_s3_client.list_buckets.return_value['Buckets']:
             bucket['CreationDate'].strftime.return_value = '01/01/2024'
         
-        result = self.aws_services.list_s3_buckets()
+        result = render(self.aws_services.list_s3_buckets())
         self.assertIn('bucket1', result)
         self.assertIn('bucket2', result)
         self.assertIn('🗂️', result)
@@ -84,7 +98,7 @@ class TestAWSServices(unittest.TestCase):
         """Testar listagem de buckets S3 vazia"""
         self.mock_s3_client.list_buckets.return_value = {'Buckets': []}
         
-        result = self.aws_services.list_s3_buckets()
+        result = render(self.aws_services.list_s3_buckets())
         self.assertIn('Nenhum bucket S3 encontrado', result)
     
     def test_count_s3_objects_success(self):
@@ -93,7 +107,7 @@ class TestAWSServices(unittest.TestCase):
             'Contents': [{'Key': 'file1'}, {'Key': 'file2'}]
         }
         
-        result = self.aws_services.count_s3_objects('test-bucket')
+        result = render(self.aws_services.count_s3_objects('test-bucket'))
         self.assertIn('2 arquivo(s)', result)
         self.assertIn('test-bucket', result)
     
@@ -101,7 +115,7 @@ class TestAWSServices(unittest.TestCase):
         """Testar contagem de objetos em bucket vazio"""
         self.mock_s3_client.list_objects_v2.return_value = {}
         
-        result = self.aws_services.count_s3_objects('empty-bucket')
+        result = render(self.aws_services.count_s3_objects('empty-bucket'))
         self.assertIn('Vazio (0 arquivos)', result)
     
     def test_count_s3_objects_bucket_not_found(self):
@@ -110,9 +124,77 @@ class TestAWSServices(unittest.TestCase):
             {'Error': {'Code': 'NoSuchBucket'}}, 'ListObjectsV2'
         )
         
-        result = self.aws_services.count_s3_objects('nonexistent-bucket')
+        result = render(self.aws_services.count_s3_objects('nonexistent-bucket'))
         self.assertIn('não encontrado', result)
     
+    def test_count_s3_objects_paginates(self):
+        """Testar contagem percorrendo várias páginas com bytes e classes"""
+        self.mock_s3_client.list_objects_v2.side_effect = [
+            {
+                'Contents': [
+                    {'Key': 'logs/a', 'Size': 1024, 'StorageClass': 'STANDARD'},
+                    {'Key': 'logs/b', 'Size': 1024, 'StorageClass': 'GLACIER'}
+                ],
+                'IsTruncated': True,
+                'NextContinuationToken': 'token-1'
+            },
+            {
+                'Contents': [{'Key': 'raiz.txt', 'Size': 2048, 'StorageClass': 'STANDARD'}],
+                'IsTruncated': False
+            }
+        ]
+        progress = MagicMock()
+        
+        result = render(self.aws_services.count_s3_objects('big-bucket', progress=progress))
+        
+        self.assertIn('3 arquivo(s)', result)
+        self.assertIn('4.0 KB', result)
+        self.assertIn('GLACIER: 1 arquivo(s)', result)
+        self.assertIn('logs/: 2 arquivo(s)', result)
+        self.assertEqual(progress.call_count, 2)
+        second_call = self.mock_s3_client.list_objects_v2.call_args_list[1]
+        self.assertEqual(second_call.kwargs['ContinuationToken'], 'token-1')
+    
+    def test_count_s3_objects_with_prefix(self):
+        """Testar filtro por prefixo"""
+        self.mock_s3_client.list_objects_v2.return_value = {
+            'Contents': [{'Key': 'logs/2024/a', 'Size': 10}]
+        }
+        
+        result = render(self.aws_services.count_s3_objects('test-bucket', prefix='logs/'))
+        
+        self.assertIn("test-bucket/logs/", result)
+        self.assertIn('2024/: 1 arquivo(s)', result)
+        self.mock_s3_client.list_objects_v2.assert_called_once_with(Bucket='test-bucket', Prefix='logs/')
+    
+    def test_count_s3_objects_parallel_matches_serial(self):
+        """Testar que a listagem paralela por prefixo soma o mesmo que a serial"""
+        keys = ['raiz.txt'] + [f'{p}/arquivo-{i}' for p in ('a', 'b', 'c') for i in range(5)]
+        
+        def list_objects_v2(Bucket, Prefix='', Delimiter=None, ContinuationToken=None):
+            matching = [k for k in keys if k.startswith(Prefix)]
+            if Delimiter:
+                prefixes = sorted({k[:k.index('/', len(Prefix)) + 1] for k in matching
+                                   if '/' in k[len(Prefix):]})
+                contents = [k for k in matching if '/' not in k[len(Prefix):]]
+                return {'Contents': [{'Key': k, 'Size': 1} for k in contents],
+                        'CommonPrefixes': [{'Prefix': p} for p in prefixes]}
+            start = int(ContinuationToken or 0)
+            page = matching[start:start + 2]
+            response = {'Contents': [{'Key': k, 'Size': 1} for k in page]}
+            if start + 2 < len(matching):
+                response['NextContinuationToken'] = str(start + 2)
+            return response
+        
+        self.mock_s3_client.list_objects_v2.side_effect = list_objects_v2
+        
+        serial = render(self.aws_services.count_s3_objects('bucket'))
+        parallel = render(self.aws_services.count_s3_objects('bucket', parallel=True, max_workers=3))
+        
+        self.assertEqual(serial, parallel)
+        self.assertIn('16 arquivo(s)', parallel)
+        self.assertIn('b/: 5 arquivo(s)', parallel)
+    
     def test_list_ec2_instances_success(self):
         """Testar listagem de instâncias EC2 com sucesso"""
         self.mock_ec2_client.describe_instances.return_value = {
@@ -126,28 +208,378 @@ class TestAWSServices(unittest.TestCase):
             }]
         }
         
-        result = self.aws_services.list_ec2_instances()
+        result = render(self.aws_services.list_ec2_instances())
         self.assertIn('i-123456789', result)
         self.assertIn('t3.micro', result)
         self.assertIn('running', result)
         self.assertIn('🟢', result)  # Emoji verde para running
     
+    def test_list_ec2_instances_multi_region(self):
+        """Testar inventário paginado em várias regiões tolerando falhas"""
+        def instance(instance_id):
+            return {'InstanceId': instance_id, 'InstanceType': 't3.micro',
+                    'State': {'Name': 'running'}, 'LaunchTime': MagicMock()}
+        
+        self.mock_ec2_client.meta.region_name = 'us-east-1'
+        self.mock_ec2_client.describe_regions.return_value = {
+            'Regions': [{'RegionName': 'us-east-1'}, {'RegionName': 'sa-east-1'}, {'RegionName': 'eu-west-1'}]
+        }
+        self.mock_ec2_client.describe_instances.side_effect = [
+            {'Reservations': [{'Instances': [instance('i-page1')]}], 'NextToken': 'next'},
+            {'Reservations': [{'Instances': [instance('i-page2')]}]}
+        ]
+        sa_client = MagicMock()
+        sa_client.describe_instances.return_value = {'Reservations': [{'Instances': [instance('i-sa')]}]}
+        eu_client = MagicMock()
+        eu_client.describe_instances.side_effect = ClientError(
+            {'Error': {'Message': 'UnauthorizedOperation'}}, 'DescribeInstances'
+        )
+        self.regional_ec2_clients.update({'sa-east-1': sa_client, 'eu-west-1': eu_client})
+        
+        result = render(self.aws_services.list_ec2_instances())
+        
+        for instance_id in ('i-page1', 'i-page2', 'i-sa'):
+            self.assertIn(instance_id, result)
+        self.assertIn('running · sa-east-1', result)
+        self.assertIn('3 instância(s)', result)
+        self.assertIn('Falha em: eu-west-1', result)
+        self.assertEqual(self.mock_ec2_client.describe_instances.call_args_list[1].kwargs['NextToken'], 'next')
+    
     def test_list_ec2_instances_empty(self):
         """Testar listagem de instâncias EC2 vazia"""
         self.mock_ec2_client.describe_instances.return_value = {'Reservations': []}
         
-        result = self.aws_services.list_ec2_instances()
+        result = render(self.aws_services.list_ec2_instances())
         self.assertIn('Nenhuma instância EC2 encontrada', result)
     
-    @patch('aws_services.boto3')
-    def test_init_no_credentials(self, mock_boto3):
-        """Testar inicialização sem credenciais"""
-        mock_boto3.client.side_effect = NoCredentialsError()
+    def test_init_no_credentials(self):
+        """Testar criação de cliente sem credenciais"""
+        def factory(service, region):
+            raise NoCredentialsError()
+        
+        aws_services = AWSServices(clients=ClientPool(factory=factory))
         
         with self.assertRaises(Exception) as context:
-            AWSServices()
+            aws_services.s3_client
         
         self.assertIn('Credenciais AWS não configuradas', str(context.exception))
+        self.assertIn('Credenciais AWS não configuradas', render(aws_services.list_s3_buckets()))
+    
+    def test_get_cost_estimate_cached(self):
+        """Testar que chamadas repetidas de custos usam o cache"""
+        self.mock_daily_costs('1.00')
+        
+        first = render(self.aws_services.get_cost_estimate())
+        second = render(self.aws_services.get_cost_estimate())
+        
+        self.assertEqual(first, second)
+        # Uma consulta por LINKED_ACCOUNT e uma por conta
+        self.assertEqual(self.mock_ce_client.get_cost_and_usage.call_count, 2)
+    
+    def test_get_cost_estimate_fresh_bypasses_cache(self):
+        """Testar que fresh=True consulta a AWS novamente, apenas nos dias mutáveis"""
+        self.mock_daily_costs('1.00')
+        
+        render(self.aws_services.get_cost_estimate())
+        result = render(self.aws_services.get_cost_estimate(fresh=True))
+        
+        self.assertIn('$30.00', result)
+        self.assertEqual(self.mock_ce_client.get_cost_and_usage.call_count, 4)
+        period = self.mock_ce_client.get_cost_and_usage.call_args.kwargs['TimePeriod']
+        self.assertEqual((date.fromisoformat(period['End']) - date.fromisoformat(period['Start'])).days, 3)
+
+    def test_cost_sync_covers_only_requested_window(self):
+        """Testar que a requisição sincroniza só a janela pedida e o resto vem do backfill"""
+        self.mock_daily_costs('1.00')
+
+        def synced_days():
+            periods = [call.kwargs['TimePeriod'] for call in self.mock_ce_client.get_cost_and_usage.call_args_list
+                       if call.kwargs['GroupBy'][0]['Key'] == 'LINKED_ACCOUNT']
+            return len({date.fromisoformat(p['Start']) + timedelta(days=offset) for p in periods
+                        for offset in range((date.fromisoformat(p['End']) - date.fromisoformat(p['Start'])).days)})
+
+        render(self.aws_services.get_cost_estimate())
+        self.assertEqual(synced_days(), 30)
+        self.assertIn('últimos 90 dias', render(self.aws_services.cost_breakdown('service', days=90)))
+        self.assertEqual(synced_days(), 90)
+
+        end = date.today()
+        self.aws_services._backfill_cost_history(end - timedelta(days=COST_TABLE_DAYS), end - timedelta(days=90)).join(5)
+        self.assertEqual(synced_days(), COST_TABLE_DAYS)
+        self.assertIn(f'últimos {COST_TABLE_DAYS} dias', render(self.aws_services.cost_breakdown('service', days=1000)))
+        self.assertEqual(synced_days(), COST_TABLE_DAYS)
+
+    def test_errors_are_not_cached(self):
+        """Testar que erros da AWS não ficam armazenados no cache"""
+        self.mock_s3_client.list_buckets.side_effect = [
+            ClientError({'Error': {'Message': 'Throttling'}}, 'ListBuckets'),
+            {'Buckets': []}
+        ]
+        
+        self.assertIn('Throttling', render(self.aws_services.list_s3_buckets()))
+        self.assertIn('Nenhum bucket S3 encontrado', render(self.aws_services.list_s3_buckets()))
+
+    def test_failed_regions_are_not_cached(self):
+        """Testar que falha em todas as regiões não é cacheada e falha parcial expira logo"""
+        self.mock_ec2_client.meta.region_name = 'us-east-1'
+        self.mock_ec2_client.describe_instances.side_effect = [
+            ClientError({'Error': {'Message': 'RequestLimitExceeded'}}, 'DescribeInstances'),
+            {'Reservations': []}
+        ]
+
+        self.assertIn('Erro ao listar instâncias: ', render(self.aws_services.list_ec2_instances()))
+        self.assertIn('Nenhuma instância EC2 encontrada', render(self.aws_services.list_ec2_instances()))
+        self.assertEqual(self.mock_ec2_client.describe_instances.call_count, 2)
+
+        partial = EC2Inventory([RegionResult('us-east-1'), RegionResult('eu-west-1', error='RequestLimitExceeded')])
+        self.assertEqual(self.aws_services._inventory_policy(partial), (CACHE_PARTIAL_TTL, 0))
+        self.assertIsNone(self.aws_services._inventory_policy(EC2Inventory([RegionResult('us-east-1')])))
+
+    def test_background_refresh_does_not_report_to_request(self):
+        """Testar que a recarga em background do inventário não chama o progresso da requisição"""
+        self.mock_ec2_client.meta.region_name = 'us-east-1'
+        self.mock_ec2_client.describe_instances.return_value = {'Reservations': []}
+        self.aws_services.cache_policies['list_ec2_instances'] = (0, 100)
+        reported = []
+
+        self.aws_services.list_ec2_instances(on_region=reported.append)
+        self.assertEqual(len(reported), 1)
+
+        # Valor stale: a requisição responde com ele e a recarga segue depois dela
+        self.aws_services.list_ec2_instances(on_region=reported.append)
+        for _ in range(100):
+            if not self.aws_services.cache._refreshing:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(self.mock_ec2_client.describe_instances.call_count, 2)
+        self.assertEqual(len(reported), 1)
+
+    def test_concurrent_counts_are_coalesced(self):
+        """Testar que contagens simultâneas do mesmo bucket fazem uma única listagem"""
+        started = threading.Event()
+        release = threading.Event()
+        
+        def list_objects_v2(**kwargs):
+            started.set()
+            release.wait(2)
+            return {'Contents': [{'Key': 'a', 'Size': 1}]}
+        
+        self.mock_s3_client.list_objects_v2.side_effect = list_objects_v2
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(render(self.aws_services.count_s3_objects('b'))))
+                   for _ in range(5)]
+        threads[0].start()
+        started.wait(2)
+        for thread in threads[1:]:
+            thread.start()
+        for _ in range(100):
+            if self.aws_services.flight.coalesced == 4:
+                break
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.mock_s3_client.list_objects_v2.call_count, 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.aws_services.flight.stats()['coalesced'], 4)
+
+class TestSingleFlight(unittest.TestCase):
+    
+    def setUp(self):
+        """Configurar single-flight"""
+        self.flight = SingleFlight()
+    
+    def run_concurrently(self, fn, count=6, key='k'):
+        results, errors = [], []
+        
+        def call():
+            try:
+                results.append(self.flight.do(key, fn))
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """Testar que chamadas concorrentes executam fn uma vez"""
+        executions = []
+        
+        def fn():
+            executions.append(1)
+            time.sleep(0.1)
+            return 'resultado'
+        
+        results, _ = self.run_concurrently(fn)
+        
+        self.assertEqual(results, ['resultado'] * 6)
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(self.flight.stats(), {'calls': 6, 'executions': 1, 'coalesced': 5, 'in_flight': 0})
+    
+    def test_errors_propagate_to_waiters(self):
+        """Testar que erros do líder chegam a quem esperava"""
+        def fn():
+            time.sleep(0.1)
+            raise ValueError('falhou')
+        
+        results, errors = self.run_concurrently(fn, count=3)
+        
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 3)
+    
+    def test_sequential_calls_are_not_reused(self):
+        """Testar que resultados não são reaproveitados após a chamada terminar"""
+        values = iter([1, 2])
+        
+        self.assertEqual(self.flight.do('k', lambda: next(values)), 1)
+        self.assertEqual(self.flight.do('k', lambda: next(values)), 2)
+        self.assertEqual(self.flight.coalesced, 0)
+    
+    def test_leader_interruption_is_not_inherited(self):
+        """Testar que uma interrupção do líder (BaseException) não é herdada"""
+        class Interrupted(BaseException):
+            pass
+        
+        leader_started = threading.Event()
+        release = threading.Event()
+        
+        def leader():
+            leader_started.set()
+            release.wait(2)
+            raise Interrupted()
+        
+        leader_thread = threading.Thread(target=lambda: self.assertRaises(Interrupted, self.flight.do, 'k', leader))
+        leader_thread.start()
+        leader_started.wait(2)
+        waiter_result = []
+        waiter = threading.Thread(target=lambda: waiter_result.append(self.flight.do('k', lambda: 'ok')))
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        leader_thread.join()
+        waiter.join()
+        
+        self.assertEqual(waiter_result, ['ok'])
+
+class TestClientPool(unittest.TestCase):
+    
+    def test_clients_created_lazily_and_reused(self):
+        """Testar que cada (serviço, região) cria um único cliente no primeiro uso"""
+        factory = MagicMock(side_effect=lambda service, region: MagicMock())
+        pool = ClientPool(factory=factory)
+        
+        self.assertEqual(len(pool), 0)
+        self.assertIs(pool.get('s3'), pool.get('s3'))
+        self.assertIsNot(pool.get('ec2', 'us-east-1'), pool.get('ec2', 'sa-east-1'))
+        self.assertEqual(factory.call_count, 3)
+    
+    def test_concurrent_get_creates_one_client(self):
+        """Testar criação única com acessos concorrentes"""
+        factory = MagicMock(side_effect=lambda service, region: time.sleep(0.01) or MagicMock())
+        pool = ClientPool(factory=factory)
+        
+        threads = [threading.Thread(target=pool.get, args=('s3',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        factory.assert_called_once()
+    
+    @patch('boto3.session.Session')
+    def test_default_factory_uses_tuned_config(self, mock_session):
+        """Testar que o cliente padrão usa retries adaptativos e pool configurado"""
+        pool = ClientPool()
+        pool.get('ec2', 'sa-east-1')
+        
+        session = mock_session.return_value
+        _, kwargs = session.client.call_args
+        self.assertEqual(kwargs['region_name'], 'sa-east-1')
+        self.assertEqual(kwargs['config'].retries['mode'], 'adaptive')
+        self.assertEqual(kwargs['config'].max_pool_connections, 50)
+
+class TestTTLCache(unittest.TestCase):
+    
+    def setUp(self):
+        """Configurar cache com relógio controlado"""
+        self.now = 0.0
+        self.cache = TTLCache(max_entries=2, clock=lambda: self.now)
+    
+    def test_hit_within_ttl(self):
+        """Testar que valores dentro do TTL não recarregam"""
+        loader = MagicMock(return_value='v1')
+        
+        self.assertEqual(self.cache.get_or_load('k', loader, ttl=10), 'v1')
+        self.now = 5
+        self.assertEqual(self.cache.get_or_load('k', loader, ttl=10), 'v1')
+        
+        loader.assert_called_once()
+        self.assertEqual(self.cache.hits, 1)
+    
+    def test_expired_entry_reloads(self):
+        """Testar que entradas expiradas sem janela stale recarregam"""
+        loader = MagicMock(side_effect=['v1', 'v2'])
+        
+        self.cache.get_or_load('k', loader, ttl=10)
+        self.now = 11
+        
+        self.assertEqual(self.cache.get_or_load('k', loader, ttl=10), 'v2')
+    
+    def test_stale_while_revalidate(self):
+        """Testar que valores stale são servidos enquanto atualizam em background"""
+        refreshed = threading.Event()
+        
+        def loader():
+            refreshed.set()
+            return 'v2'
+        
+        self.cache.set('k', 'v1', ttl=10, stale_ttl=100)
+        self.now = 20
+        
+        self.assertEqual(self.cache.get_or_load('k', loader, ttl=10, stale_ttl=100), 'v1')
+        self.assertTrue(refreshed.wait(2))
+        for _ in range(100):
+            if not self.cache._refreshing:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.cache.get_or_load('k', loader, ttl=10, stale_ttl=100), 'v2')
+        self.assertEqual(self.cache.stale_hits, 1)
+    
+    def test_lru_eviction(self):
+        """Testar remoção da entrada menos usada recentemente"""
+        self.cache.set('a', 1, ttl=10)
+        self.cache.set('b', 2, ttl=10)
+        self.cache.get_or_load('a', MagicMock(), ttl=10)
+        self.cache.set('c', 3, ttl=10)
+        
+        self.assertEqual(len(self.cache), 2)
+        loader = MagicMock(return_value='novo')
+        self.assertEqual(self.cache.get_or_load('b', loader, ttl=10), 'novo')
+        loader.assert_called_once()
+    
+    def test_concurrent_misses_load_once(self):
+        """Testar que misses simultâneos não disparam várias cargas"""
+        cache = TTLCache()
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'v'
+        
+        threads = [threading.Thread(target=cache.get_or_load, args=('k', loader, 60)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(calls), 1)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,289 @@
+import unittest
+import hashlib
+import hmac
+import json
+import threading
+import sys
+import os
+import time
+from datetime import date, datetime, timezone
+from unittest.mock import MagicMock, patch
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_clients import ClientPool
+from aws_services import AWSServices, TTLCache
+from cache_backends import (CacheBackendError, CacheEntry, MemoryBackend, RedisBackend, RedisClient, Serializer,
+                            backend_from_env)
+from cost_explorer import CostTable
+from cost_store import CostStore
+from ec2_inventory import EC2Inventory, Instance, RegionResult
+from fake_aws import FakeAccount, FakeAWS
+from fake_redis import FakeRedis
+from renderers import render
+import metrics
+
+class TestSerializer(unittest.TestCase):
+
+    def test_round_trip_of_cached_results(self):
+        """Testar serialização de CostTable e EC2Inventory"""
+        table = CostTable.from_rows(date(2024, 1, 1), date(2024, 1, 3),
+                                    [('2024-01-01', 'Amazon S3', 'us-east-1', '111', 1.5),
+                                     ('2024-01-02', 'Amazon EC2', 'sa-east-1', '111', 2.0)], 'USD')
+        inventory = EC2Inventory([RegionResult('us-east-1', [{'id': 'i-1'}], 0.1), RegionResult('eu-west-1',
+                                                                                                error='AccessDenied')])
+        serializer = Serializer('segredo')
+
+        cached_table = serializer.loads(serializer.dumps(CacheEntry(table, 10, 20, 0))).value
+        cached_inventory = serializer.loads(serializer.dumps(CacheEntry(inventory, 10, 20, 0))).value
+
+        self.assertEqual(cached_table.total(), 3.5)
+        self.assertEqual(cached_table.totals_by('region'), table.totals_by('region'))
+        self.assertEqual(cached_inventory, inventory)
+        self.assertEqual(cached_inventory.failed[0].region, 'eu-west-1')
+    
+    def test_round_trip_of_boto3_values(self):
+        """Testar datetime com fuso, tuplas e instâncias do inventário"""
+        launched = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        inventory = EC2Inventory([RegionResult('us-east-1', [Instance('i-1', 't3.micro', 'running', launched,
+                                                                      'us-east-1', tags=(('env', 'prod'),))])])
+        buckets = [{'Name': 'logs', 'CreationDate': launched}]
+        serializer = Serializer('segredo')
+
+        self.assertEqual(serializer.loads(serializer.dumps(CacheEntry(buckets, 10, 20, 0))).value, buckets)
+        cached = serializer.loads(serializer.dumps(CacheEntry(inventory, 10, 20, 0))).value
+        self.assertEqual(cached, inventory)
+        self.assertIsInstance(cached.instances[0], Instance)
+    
+    def test_values_are_json_not_pickle(self):
+        """Testar que o valor gravado é JSON e que tipos fora da lista não são aceitos"""
+        serializer = Serializer('segredo')
+        data = serializer.dumps(CacheEntry({'a': (1, 2)}, 10, 20, 0))
+
+        self.assertEqual(json.loads(data[32:]), [{'a': {'$t': 'tuple', 'v': [1, 2]}}, 10, 20, 0])
+        with self.assertRaises(CacheBackendError):
+            serializer.dumps(CacheEntry(object(), 10, 20, 0))
+        forged = json.dumps([{'$t': 'os', 'v': {}}, 10, 20, 0]).encode()
+        signed = hmac.new(b'segredo', forged, hashlib.sha256).digest() + forged
+        with self.assertRaisesRegex(CacheBackendError, 'não permitido'):
+            serializer.loads(signed)
+
+    def test_rejects_tampered_or_unsigned_values(self):
+        """Testar que valores sem a assinatura correta não são desserializados"""
+        data = Serializer('segredo').dumps(CacheEntry('v', 10, 20, 0))
+
+        with self.assertRaises(CacheBackendError):
+            Serializer('outro').loads(data)
+        with self.assertRaises(CacheBackendError):
+            Serializer('segredo').loads(b'["v", 10, 20, 0]')
+        with self.assertRaises(ValueError):
+            Serializer('')
+
+class TestRedisBackend(unittest.TestCase):
+
+    def setUp(self):
+        """Servidor Redis local com senha"""
+        self.redis = FakeRedis(password='s3nha').start()
+        self.addCleanup(self.redis.stop)
+        self.client = RedisClient.from_url(self.redis.url.replace('/0', '/2'))
+        self.addCleanup(self.client.close)
+        self.backend = RedisBackend(self.client, Serializer('segredo'))
+
+    def test_get_set_and_expiry(self):
+        """Testar que a chave expira junto com a janela stale"""
+        now = time.time()
+        self.backend.set('ns:a', CacheEntry({'x': 1}, now + 10, now + 0.1, now))
+        self.backend.set('ns:expirado', CacheEntry('v', now - 2, now - 1, now - 3))
+
+        self.assertEqual(self.backend.get('ns:a').value, {'x': 1})
+        self.assertEqual(self.redis.keys(db=2), ['ns:a'])
+        time.sleep(0.15)
+        self.assertIsNone(self.backend.get('ns:a'))
+
+    def test_lock_is_exclusive_and_owned(self):
+        """Testar trava com NX e liberação só pelo dono"""
+        token = self.backend.acquire('ns:k:lock', ttl=5)
+
+        self.assertIsNotNone(token)
+        self.assertIsNone(self.backend.acquire('ns:k:lock', ttl=5))
+        self.backend.release('ns:k:lock', 'token-de-outro')
+        self.assertIsNone(self.backend.acquire('ns:k:lock', ttl=5))
+        self.backend.release('ns:k:lock', token)
+        self.assertIsNotNone(self.backend.acquire('ns:k:lock', ttl=5))
+
+    def test_clear_by_prefix(self):
+        """Testar limpeza restrita ao namespace"""
+        now = time.time()
+        for key in ('a:1', 'a:2', 'b:1'):
+            self.backend.set(key, CacheEntry(key, now + 10, now + 10, now))
+
+        self.backend.clear('a:')
+
+        self.assertEqual(self.redis.keys(db=2), ['b:1'])
+
+    def test_wrong_password(self):
+        """Testar erro de autenticação como CacheBackendError"""
+        client = RedisClient.from_url(self.redis.url.replace('s3nha', 'errada'))
+
+        with self.assertRaises(CacheBackendError):
+            RedisBackend(client, Serializer('segredo')).get('a')
+
+    def test_backend_from_env(self):
+        """Testar seleção do backend por CACHE_BACKEND"""
+        with patch('cache_backends.CACHE_BACKEND', 'memory'):
+            self.assertIsNone(backend_from_env())
+        with patch('cache_backends.CACHE_BACKEND', 'redis'), \
+                patch('cache_backends.CACHE_REDIS_URL', self.redis.url):
+            # Sem segredo o Redis não é usado: o app não sobe
+            with patch('cache_backends.CACHE_SECRET', ''), self.assertRaises(ValueError):
+                backend_from_env()
+            with patch('cache_backends.CACHE_SECRET', 'segredo'):
+                self.assertIsInstance(backend_from_env(), RedisBackend)
+
+class TestSharedTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        """Dois caches (duas tasks) com o mesmo backend e relógio controlado"""
+        self.now = 1000.0
+        clock = lambda: self.now
+        shared = MemoryBackend(clock=clock)
+        self.task_a = TTLCache(clock=clock, shared=shared, namespace='ns')
+        self.task_b = TTLCache(clock=clock, shared=shared, namespace='ns')
+        self.task_b.poll_interval = 0.01
+
+    def test_other_task_reads_shared_value(self):
+        """Testar que a segunda task não chama o loader"""
+        loader = MagicMock(return_value='v1')
+
+        self.task_a.get_or_load(('op', 'x'), loader, ttl=10)
+        self.assertEqual(self.task_b.get_or_load(('op', 'x'), loader, ttl=10), 'v1')
+        self.assertEqual(self.task_b.get_or_load(('op', 'x'), loader, ttl=10), 'v1')
+
+        loader.assert_called_once()
+        self.assertEqual((self.task_b.shared_hits, self.task_b.hits), (1, 1))
+
+    def test_refresh_under_lock_is_waited_for(self):
+        """Testar que fresh=True aguarda a recarga em andamento em outra task"""
+        started, release = threading.Event(), threading.Event()
+
+        def slow_loader():
+            started.set()
+            release.wait(2)
+            return 'novo'
+
+        refresh = threading.Thread(target=self.task_a.get_or_load, args=(('op',), slow_loader, 10),
+                                   kwargs={'fresh': True})
+        refresh.start()
+        started.wait(2)
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(
+            self.task_b.get_or_load(('op',), lambda: 'duplicado', 10, fresh=True)))
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        refresh.join()
+        waiter.join()
+
+        self.assertEqual(result, ['novo'])
+
+    def test_fresh_read_does_not_join_abandoned_refresh(self):
+        """Testar fresh=True durante uma recarga em background que desiste da trava de outra task"""
+        entered, gate = threading.Event(), threading.Event()
+
+        class GatedBackend(MemoryBackend):
+            def get(self, key):
+                if threading.current_thread().name.startswith('cache-refresh'):
+                    entered.set()
+                    gate.wait(2)
+                return super().get(key)
+
+        cache = TTLCache(clock=lambda: self.now, shared=GatedBackend(clock=lambda: self.now), namespace='ns',
+                         lock_wait=0.2)
+        cache.poll_interval = 0.01
+        cache.set(('op',), 'v1', ttl=10, stale_ttl=100)
+        self.now += 20
+        self.assertIsNotNone(cache.shared.acquire('ns:op:lock', ttl=60))
+
+        self.assertEqual(cache.get_or_load(('op',), lambda: 'v2', 10, 100), 'v1')
+        self.assertTrue(entered.wait(2))
+        result = []
+        reader = threading.Thread(target=lambda: result.append(
+            cache.get_or_load(('op',), lambda: 'v2', 10, 100, fresh=True)))
+        reader.start()
+        time.sleep(0.05)
+        gate.set()
+        reader.join(2)
+
+        self.assertEqual(result, ['v2'])
+
+    def test_stale_refresh_runs_once_across_tasks(self):
+        """Testar que só uma task recarrega um valor stale"""
+        self.task_a.set(('op',), 'v1', ttl=10, stale_ttl=100)
+        self.task_b.get_or_load(('op',), lambda: 'v1', ttl=10, stale_ttl=100)
+        self.now += 20
+        calls, release = [], threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(2)
+            return 'v2'
+
+        self.assertEqual(self.task_a.get_or_load(('op',), loader, 10, 100), 'v1')
+        self.assertEqual(self.task_b.get_or_load(('op',), loader, 10, 100), 'v1')
+        release.set()
+        for cache in (self.task_a, self.task_b):
+            for _ in range(200):
+                if not cache._refreshing:
+                    break
+                time.sleep(0.01)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.task_b.get_or_load(('op',), loader, 10, 100), 'v2')
+
+class TestScaleOut(unittest.TestCase):
+
+    def test_tasks_share_aws_calls(self):
+        """Testar que N tasks com Redis fazem as mesmas chamadas AWS que uma só"""
+        fake = FakeAWS(FakeAccount(buckets={'logs': 10}, regions={'us-east-1': 5, 'sa-east-1': 2}, cost_days=60),
+                       latency=0.005)
+        with FakeRedis() as redis:
+            tasks = [AWSServices(clients=ClientPool(factory=fake.client), cost_store=CostStore(':memory:'),
+                                 cache_backend=RedisBackend(RedisClient.from_url(redis.url), Serializer('segredo')))
+                     for _ in range(4)]
+            results = []
+
+            def handle(task):
+                results.append((task.list_s3_buckets(), task.list_ec2_instances(), task.get_cost_estimate()))
+
+            threads = [threading.Thread(target=handle, args=(task,)) for task in tasks]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            single = FakeAWS(fake.account)
+            AWSServices(clients=ClientPool(factory=single.client), cost_store=CostStore(':memory:')).get_cost_estimate()
+
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(fake.calls['s3.ListBuckets'], 1)
+        self.assertEqual(fake.calls['ec2.DescribeInstances'], 2)
+        self.assertEqual(fake.calls['ce.GetCostAndUsage'], single.calls['ce.GetCostAndUsage'])
+        self.assertIn('chatbot:v4:111111111111:us-east-1:list_s3_buckets', redis.keys())
+
+    def test_unavailable_redis_falls_back_to_local_cache(self):
+        """Testar que o app continua respondendo com o Redis fora do ar"""
+        redis = FakeRedis().start()
+        redis.stop()
+        fake = FakeAWS(FakeAccount(buckets={'logs': 10}))
+        services = AWSServices(clients=ClientPool(factory=fake.client), cost_store=CostStore(':memory:'),
+                               cache_backend=RedisBackend(RedisClient.from_url(redis.url), Serializer('segredo')))
+        errors = metrics.ERRORS.value('cache', 'CacheBackendError')
+
+        self.assertIn('logs', render(services.list_s3_buckets()))
+        self.assertIn('logs', render(services.list_s3_buckets()))
+        self.assertEqual(fake.calls['s3.ListBuckets'], 1)
+        self.assertEqual(metrics.ERRORS.value('cache', 'CacheBackendError'), errors + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import sys
+import os
+import io
+import json
+import tempfile
+from contextlib import redirect_stdout
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity_planner import TaskSize, format_plans, load_benchmarks, main, plan_capacity
+from cost_calculator import AWSCostCalculator, PriceTable
+
+RESULTS = {'results': [
+    {'cpu': 256, 'memory': 512, 'throughput_rps': 50, 'latency_ms': {'p50': 40, 'p99': 400}},
+    {'cpu': 512, 'memory': 1024, 'throughput_rps': 120, 'latency_ms': {'p50': 25, 'p99': 200}},
+    {'cpu': 1024, 'memory': 2048, 'throughput_rps': 260, 'latency_ms': {'p50': 15, 'p99': 120}},
+]}
+
+class TestCapacityPlanner(unittest.TestCase):
+
+    def setUp(self):
+        """Tamanhos medidos e preços simples (1 vCPU-hora = $1, GB-hora = $0.1)"""
+        self.sizes = [TaskSize(256, 512, 70, 400), TaskSize(512, 1024, 120, 200), TaskSize(1024, 2048, 260, 120)]
+        self.calculator = AWSCostCalculator(prices=PriceTable(hours_per_month=1, fargate_vcpu_hour=1.0,
+                                                              fargate_gb_hour=0.1))
+
+    def test_cheapest_feasible_first(self):
+        """Testar ranking pelo custo entre as configurações que atendem à meta"""
+        plans = plan_capacity(self.sizes, target_rps=200, max_p99_ms=500, calculator=self.calculator,
+                              headroom=0)
+
+        best = plans[0]
+        self.assertEqual((best.size.cpu, best.tasks), (256, 3))
+        self.assertAlmostEqual(best.monthly_cost, 3 * (0.25 + 0.05))
+        self.assertEqual(best.capacity_rps, 210)
+        self.assertEqual(best.items[0].service, 'ECS Fargate')
+        costs = [plan.monthly_cost for plan in plans]
+        self.assertEqual(costs, sorted(costs))
+        for plan in plans:
+            self.assertGreaterEqual(plan.capacity_rps, 200)
+
+    def test_latency_and_headroom_constraints(self):
+        """Testar filtro de p99 e reserva de capacidade"""
+        plans = plan_capacity(self.sizes, target_rps=200, max_p99_ms=250, calculator=self.calculator,
+                              headroom=0.5)
+
+        self.assertNotIn(256, {plan.size.cpu for plan in plans})
+        # Empate de custo com 4 x 512: menos tasks primeiro
+        self.assertEqual((plans[0].size.cpu, plans[0].tasks), (1024, 2))
+        self.assertAlmostEqual(plans[0].utilization, 200 / 520)
+
+    def test_no_feasible_configuration(self):
+        """Testar meta impossível"""
+        plans = plan_capacity(self.sizes, target_rps=10000, max_p99_ms=100, calculator=self.calculator)
+
+        self.assertEqual(plans, [])
+        self.assertIn('Nenhuma configuração atende', format_plans(plans, 10000, 100))
+
+    def test_cli_reads_benchmark_results(self):
+        """Testar leitura do JSON do benchmark e saída em tabela"""
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as results_file:
+            json.dump(RESULTS, results_file)
+        self.addCleanup(os.remove, results_file.name)
+
+        self.assertEqual(load_benchmarks(results_file.name)[1], TaskSize(512, 1024, 120, 200))
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main([results_file.name, '--rps', '100', '--p99', '300', '--min-tasks', '2', '--top', '3'])
+        table = output.getvalue()
+        self.assertIn('| 1 | 512 | 1024 | 2 |', table)
+        self.assertIn('desired_count = 2', table)
+
+    def test_results_without_task_size_are_skipped(self):
+        """Testar que execuções do load_test.py sem --cpu/--memory são ignoradas com aviso"""
+        results = {'results': [dict(RESULTS['results'][0], cpu=None, memory=None), RESULTS['results'][1]]}
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as results_file:
+            json.dump(results, results_file)
+        self.addCleanup(os.remove, results_file.name)
+
+        with self.assertLogs('capacity_planner', 'WARNING') as logs:
+            sizes = load_benchmarks(results_file.name)
+
+        self.assertEqual(sizes, [TaskSize(512, 1024, 120, 200)])
+        self.assertIn('sem cpu/memory', logs.output[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import numpy as np
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cost_calculator import AWSCostCalculator, CostItem, PriceTable, Scenario, SCENARIOS, markdown_report
+
+class TestPriceTable(unittest.TestCase):
+
+    def test_load_overrides_defaults(self):
+        """Testar carga de tabela de preços em JSON"""
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as price_file:
+            json.dump({'fargate_vcpu_hour': 0.05, 'instance_hour': {'db.r6g.large': 0.2}}, price_file)
+        self.addCleanup(os.remove, price_file.name)
+
+        prices = PriceTable.load(price_file.name)
+        self.assertEqual(prices.fargate_vcpu_hour, 0.05)
+        self.assertEqual(prices.fargate_gb_hour, PriceTable().fargate_gb_hour)
+        self.assertEqual(prices.instance_hour['db.r6g.large'], 0.2)
+        self.assertIn('db.t3.micro', prices.instance_hour)
+
+    def test_unknown_fields_rejected(self):
+        """Testar que campos desconhecidos são rejeitados"""
+        with self.assertRaises(ValueError):
+            PriceTable.from_dict({'fargate_cpu': 1})
+
+class TestAWSCostCalculator(unittest.TestCase):
+
+    def setUp(self):
+        """Calculadora com preços simples para contas exatas"""
+        self.prices = PriceTable(hours_per_month=100, fargate_vcpu_hour=1.0, fargate_gb_hour=0.1,
+                                 alb_hour=0.5, alb_lcu_hour=0.2, data_transfer_gb=0.1, data_transfer_free_gb=10)
+        self.calculator = AWSCostCalculator(prices=self.prices)
+
+    def test_scenario_costs_from_parameters(self):
+        """Testar itens de custo calculados a partir dos parâmetros"""
+        scenario = Scenario('teste', 'Teste', tasks=2, vcpu=0.5, memory_gb=1, load_balancers=1, alb_lcu=2,
+                            data_transfer_gb=5)
+        items = {item.service: item for item in self.calculator.scenario_costs(scenario)}
+
+        self.assertEqual(items['ECS Fargate'].monthly_cost, 120.0)
+        self.assertEqual(items['Application Load Balancer'].monthly_cost, 90.0)
+        # Dentro da franquia de transferência e sem logs: sem item
+        self.assertNotIn('Data Transfer', items)
+        self.assertNotIn('CloudWatch Logs', items)
+
+    def test_instances_and_extras(self):
+        """Testar instâncias gerenciadas e itens fixos"""
+        scenario = Scenario('teste', 'Teste', instances=(('RDS', 'db.t3.micro', 2, 'Multi-AZ'),),
+                            extras=(CostItem('CloudFront', 'CDN', 10.0),))
+        items = self.calculator.scenario_costs(scenario)
+
+        self.assertEqual([item.service for item in items], ['RDS', 'CloudFront'])
+        self.assertAlmostEqual(items[0].monthly_cost, 0.017 * 100 * 2)
+        with self.assertRaises(ValueError):
+            self.calculator.instance_cost('db.x1.huge')
+
+    def test_batch_sweep_matches_scalar(self):
+        """Testar varredura vetorizada com broadcasting"""
+        tasks = np.arange(1, 11)[:, None]
+        vcpu = np.array([0.25, 0.5, 1, 2, 4])[None, :]
+        costs = AWSCostCalculator().batch_costs(tasks=tasks, vcpu=vcpu, memory_gb=vcpu * 2,
+                                                load_balancers=1, alb_lcu=3)
+
+        self.assertEqual(costs['total'].shape, (10, 5))
+        scalar = AWSCostCalculator().scenario_costs(Scenario('x', 'x', tasks=3, vcpu=1, memory_gb=2,
+                                                             load_balancers=1, alb_lcu=3))
+        self.assertAlmostEqual(costs['total'][2, 2], sum(item.monthly_cost for item in scalar), places=1)
+
+        with self.assertRaises(ValueError):
+            self.calculator.batch_costs(cpu=1)
+
+    def test_report_covers_all_scenarios(self):
+        """Testar relatório com todos os cenários e totais consistentes"""
+        report = AWSCostCalculator().generate_cost_report()
+
+        self.assertEqual(list(report['scenarios']), list(SCENARIOS))
+        self.assertEqual(report['scenarios']['development']['monthly_total'], 0)
+        for scenario in report['scenarios'].values():
+            self.assertAlmostEqual(scenario['monthly_total'],
+                                   sum(item['monthly_cost'] for item in scenario['items']))
+            self.assertAlmostEqual(scenario['annual_total'], scenario['monthly_total'] * 12)
+        self.assertLess(report['scenarios']['production_basic']['monthly_total'],
+                        report['scenarios']['production_scaled']['monthly_total'])
+
+    def test_cost_analysis_matches_report(self):
+        """Testar que as tabelas do COST_ANALYSIS.md são as geradas pela tabela de preços padrão"""
+        report = AWSCostCalculator(prices=PriceTable()).generate_cost_report()
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'COST_ANALYSIS.md')
+        with open(path, encoding='utf-8') as analysis_file:
+            document = analysis_file.read()
+
+        start = document.index('<!-- início: python cost_calculator.py --markdown -->\n')
+        end = document.index('<!-- fim: python cost_calculator.py --markdown -->')
+        generated = document[document.index('\n', start) + 1:end]
+        self.assertEqual(generated, markdown_report(report))
+        self.assertIn('**Custo mensal: $33.27**', generated)
+
+if __name__ == '__main__':
+    unittest.main()
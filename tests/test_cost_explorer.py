@@ -0,0 +1,206 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import tempfile
+from datetime import date, timedelta
+from botocore.exceptions import ClientError
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_clients import ClientPool
+from aws_services import AWSServices
+from commands import router
+from cost_explorer import CostTable, fetch_cost_table
+from cost_store import CostStore
+from renderers import render
+
+START = date(2024, 1, 1)
+END = date(2024, 1, 11)
+
+ROWS = [
+    ('2024-01-01', 'Amazon EC2', 'us-east-1', '111', 10.0),
+    ('2024-01-01', 'Amazon S3', 'us-east-1', '111', 1.0),
+    ('2024-01-05', 'Amazon EC2', 'sa-east-1', '222', 5.0),
+    ('2024-01-09', 'AWS Lambda', 'us-east-1', '111', 2.0),
+    ('2024-01-10', 'Amazon S3', 'sa-east-1', '222', 3.0),
+    ('2024-01-10', 'Amazon EC2', 'us-east-1', '111', 4.0),
+]
+
+def ce_group(keys, amount):
+    return {'Keys': keys, 'Metrics': {'BlendedCost': {'Amount': str(amount), 'Unit': 'USD'}}}
+
+def ce_page(day, groups, token=None):
+    page = {'ResultsByTime': [{'TimePeriod': {'Start': day}, 'Groups': groups}]}
+    if token:
+        page['NextPageToken'] = token
+    return page
+
+class TestCostTable(unittest.TestCase):
+
+    def setUp(self):
+        """Montar tabela com dez dias de custos"""
+        self.table = CostTable.from_rows(START, END, ROWS)
+
+    def test_columns_are_dictionary_encoded(self):
+        """Testar colunas codificadas e dicionários sem repetição"""
+        self.assertEqual(len(self.table), 6)
+        self.assertEqual(self.table.dictionaries['service'], ['Amazon EC2', 'Amazon S3', 'AWS Lambda'])
+        self.assertEqual(self.table.codes['service'].tolist(), [0, 1, 0, 2, 1, 0])
+        self.assertEqual(self.table.codes['day'].tolist(), [0, 0, 4, 8, 9, 9])
+        self.assertEqual(self.table.num_days, 10)
+
+    def test_totals_by_dimension(self):
+        """Testar agregação por serviço, região e conta"""
+        self.assertEqual(self.table.totals_by('service'),
+                         [('Amazon EC2', 19.0), ('Amazon S3', 4.0), ('AWS Lambda', 2.0)])
+        self.assertEqual(self.table.totals_by('region'), [('us-east-1', 17.0), ('sa-east-1', 8.0)])
+        self.assertEqual(self.table.totals_by('account', top=1), [('111', 17.0)])
+
+    def test_window_of_last_days(self):
+        """Testar janela dos últimos N dias"""
+        self.assertEqual(self.table.totals_by('service', days=2),
+                         [('Amazon EC2', 4.0), ('Amazon S3', 3.0), ('AWS Lambda', 2.0)])
+        self.assertEqual(self.table.total(days=2), 9.0)
+        self.assertEqual(self.table.total(), 25.0)
+
+    def test_daily_totals_include_days_without_cost(self):
+        """Testar totais diários contínuos, com zero nos dias sem custo"""
+        daily = self.table.daily_totals(days=3)
+        self.assertEqual(daily, [(date(2024, 1, 8), 0.0), (date(2024, 1, 9), 2.0), (date(2024, 1, 10), 7.0)])
+        self.assertEqual(len(self.table.daily_totals()), 10)
+
+class TestFetchCostTable(unittest.TestCase):
+
+    def test_fetch_groups_per_account_and_follows_pages(self):
+        """Testar consulta por conta vinculada e paginação por NextPageToken"""
+        ce_client = MagicMock()
+        ce_client.get_cost_and_usage.side_effect = [
+            ce_page('2024-01-01', [ce_group(['111'], 11), ce_group(['222'], 0.5)]),
+            ce_page('2024-01-01', [ce_group(['Amazon EC2', 'us-east-1'], 10)], token='next'),
+            ce_page('2024-01-02', [ce_group(['Amazon S3', 'us-east-1'], 1), ce_group(['Tax', ''], 0)]),
+            ce_page('2024-01-01', [ce_group(['Amazon EC2', 'sa-east-1'], 0.5)]),
+        ]
+
+        table = fetch_cost_table(ce_client, START, END)
+
+        self.assertEqual(ce_client.get_cost_and_usage.call_count, 4)
+        calls = ce_client.get_cost_and_usage.call_args_list
+        self.assertEqual(calls[0].kwargs['Granularity'], 'DAILY')
+        self.assertEqual(calls[0].kwargs['GroupBy'], [{'Type': 'DIMENSION', 'Key': 'LINKED_ACCOUNT'}])
+        self.assertEqual(calls[1].kwargs['Filter'], {'Dimensions': {'Key': 'LINKED_ACCOUNT', 'Values': ['111']}})
+        self.assertEqual(calls[2].kwargs['NextPageToken'], 'next')
+        # Linhas com valor zero não ocupam a tabela
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.totals_by('account'), [('111', 11.0), ('222', 0.5)])
+
+class TestCostStore(unittest.TestCase):
+
+    def setUp(self):
+        """Criar histórico em arquivo temporário e Cost Explorer simulado"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'costs.db')
+        self.ce_client = MagicMock()
+
+        def get_cost_and_usage(**kwargs):
+            start = date.fromisoformat(kwargs['TimePeriod']['Start'])
+            end = date.fromisoformat(kwargs['TimePeriod']['End'])
+            days = [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days)]
+            if kwargs['GroupBy'][0]['Key'] == 'LINKED_ACCOUNT':
+                return {'ResultsByTime': [{'TimePeriod': {'Start': day}, 'Groups': [ce_group(['111'], 2)]} for day in days]}
+            return {'ResultsByTime': [{'TimePeriod': {'Start': day},
+                                       'Groups': [ce_group(['Amazon EC2', 'us-east-1'], 1.5),
+                                                  ce_group(['Amazon S3', 'us-east-1'], 0.5)]} for day in days]}
+
+        self.ce_client.get_cost_and_usage.side_effect = get_cost_and_usage
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def fetched_periods(self):
+        return [(call.kwargs['TimePeriod']['Start'], call.kwargs['TimePeriod']['End'])
+                for call in self.ce_client.get_cost_and_usage.call_args_list]
+
+    def test_sync_fetches_only_missing_and_mutable_days(self):
+        """Testar sincronização incremental: dias ausentes e os últimos 3 dias"""
+        store = CostStore(self.path, mutable_days=3)
+        self.assertEqual(store.sync(self.ce_client, START, END, today=END), 10)
+        self.ce_client.get_cost_and_usage.reset_mock()
+
+        self.assertEqual(store.sync(self.ce_client, START, END, today=END), 3)
+        self.assertEqual(set(self.fetched_periods()), {('2024-01-08', '2024-01-11')})
+
+        table = store.load(START, END)
+        self.assertEqual(len(table), 20)
+        self.assertEqual(table.totals_by('service'), [('Amazon EC2', 15.0), ('Amazon S3', 5.0)])
+
+    def test_history_survives_restart(self):
+        """Testar que um novo processo reaproveita o histórico em disco"""
+        store = CostStore(self.path, mutable_days=3)
+        store.sync(self.ce_client, START, END, today=END)
+        store.close()
+        self.ce_client.get_cost_and_usage.reset_mock()
+
+        restarted = CostStore(self.path, mutable_days=3)
+        later = END + timedelta(days=2)
+        restarted.sync(self.ce_client, START, later, today=later)
+
+        # Apenas os 2 dias novos e os dias ainda mutáveis
+        self.assertEqual(set(self.fetched_periods()), {('2024-01-10', '2024-01-13')})
+        self.assertEqual(restarted.load(START, later).total(), 24.0)
+
+    def test_stale_ranges_merge_consecutive_days(self):
+        """Testar intervalos contíguos a buscar"""
+        store = CostStore(':memory:', mutable_days=1)
+        store.replace_days(date(2024, 1, 3), date(2024, 1, 6), [('2024-01-04', 'S3', 'us-east-1', '111', 1.0)])
+
+        self.assertEqual(store.stale_ranges(START, END, today=END), [
+            (date(2024, 1, 1), date(2024, 1, 3)),
+            (date(2024, 1, 6), date(2024, 1, 11))
+        ])
+        self.assertEqual(store.load(START, END).total(), 1.0)
+
+class TestCostQueries(unittest.TestCase):
+
+    def setUp(self):
+        """Configurar AWSServices com tabela de custos simulada"""
+        self.mock_ce_client = MagicMock()
+        self.aws_services = AWSServices(clients=ClientPool(factory=lambda service, region: self.mock_ce_client),
+                                        cost_store=CostStore(':memory:'))
+        self.fetch = MagicMock(return_value=CostTable.from_rows(START, END, ROWS))
+        self.aws_services._fetch_cost_table = self.fetch
+
+    def test_queries_share_one_fetch(self):
+        """Testar que várias perguntas usam a mesma busca ao Cost Explorer"""
+        top = render(self.aws_services.cost_breakdown('service', days=30, top=1))
+        by_region = render(self.aws_services.cost_breakdown('region'))
+        daily = render(self.aws_services.daily_costs(days=2))
+
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertIn('Amazon EC2: USD $19.00 (76.0%)', top)
+        self.assertIn('... e mais 2: USD $6.00', top)
+        self.assertIn('últimos 10 dias', top)
+        self.assertIn('sa-east-1: USD $8.00', by_region)
+        self.assertIn('10/01/2024: USD $7.00', daily)
+        self.assertIn('Total:** USD $9.00', daily)
+
+    def test_errors_are_reported(self):
+        """Testar erro do Cost Explorer nas consultas locais"""
+        self.fetch.side_effect = ClientError({'Error': {'Message': 'Access denied'}}, 'GetCostAndUsage')
+
+        result = render(self.aws_services.cost_breakdown('account'))
+        self.assertIn('❌ Erro ao obter custos', result)
+
+    def test_chat_commands(self):
+        """Testar comandos de custos no roteador"""
+        services = MagicMock()
+        router.dispatch('custos top 3 --dias 7', services)
+        services.cost_breakdown.assert_called_with('service', days=7, top=3, fresh=False)
+        router.dispatch('custos regiões', services)
+        services.cost_breakdown.assert_called_with('region', days=30, fresh=False)
+        router.dispatch('custos diarios --fresh', services)
+        services.daily_costs.assert_called_with(days=7, fresh=True)
+
+if __name__ == '__main__':
+    unittest.main()
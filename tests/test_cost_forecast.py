@@ -0,0 +1,168 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+from datetime import date, timedelta
+import numpy as np
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_clients import ClientPool
+from aws_services import COST_ANOMALY_WINDOW, COST_TABLE_DAYS, AWSServices
+from commands import FORECAST_MAX_DAYS, router
+from cost_explorer import CostTable
+from cost_forecast import (anomaly_scores, detect_anomalies, holt_forecast, linear_forecast, rolling_mean,
+                           series_matrix, weekday_adjust)
+from cost_store import CostStore
+from renderers import render
+from router import CommandError
+
+# Segunda-feira
+START = date(2024, 1, 1)
+DAYS = 56
+
+def build_table(spike=None):
+    """EC2 com custo maior nos dias úteis, S3 constante e Lambda crescente"""
+    rows = []
+    for offset in range(DAYS):
+        day = START + timedelta(days=offset)
+        iso = day.isoformat()
+        rows.append((iso, 'Amazon EC2', 'us-east-1', '111', 10.0 if day.weekday() < 5 else 2.0))
+        rows.append((iso, 'Amazon S3', 'sa-east-1', '111', 1.0))
+        rows.append((iso, 'AWS Lambda', 'us-east-1', '111', 0.5 + offset * 0.1))
+    if spike:
+        rows.append(spike)
+    return CostTable.from_rows(START, START + timedelta(days=DAYS), rows)
+
+class TestSeriesMath(unittest.TestCase):
+
+    def test_series_matrix_groups_dimensions(self):
+        """Testar matriz séries × dias com rótulos combinados"""
+        labels, matrix = series_matrix(build_table())
+
+        self.assertEqual(labels, ['Amazon EC2 (us-east-1)', 'Amazon S3 (sa-east-1)', 'AWS Lambda (us-east-1)'])
+        self.assertEqual(matrix.shape, (3, DAYS))
+        self.assertEqual(matrix[1].sum(), DAYS)
+
+        labels, matrix = series_matrix(build_table(), by=('region',))
+        self.assertEqual(labels, ['us-east-1', 'sa-east-1'])
+
+    def test_rolling_mean(self):
+        """Testar média móvel com janela parcial no início"""
+        matrix = np.array([[1.0, 2.0, 3.0, 4.0]])
+        np.testing.assert_allclose(rolling_mean(matrix, 2), [[1.0, 1.5, 2.5, 3.5]])
+
+    def test_weekday_adjust_removes_weekly_pattern(self):
+        """Testar remoção da sazonalidade semanal"""
+        _, matrix = series_matrix(build_table())
+        weekdays = np.arange(DAYS) % 7
+        adjusted = weekday_adjust(matrix, weekdays)
+
+        self.assertAlmostEqual(adjusted[0].std(), 0.0)
+
+    def test_forecasts_follow_trend(self):
+        """Testar previsões linear e Holt para séries constantes e crescentes"""
+        _, matrix = series_matrix(build_table(), by=('service',))
+
+        linear = linear_forecast(matrix, 3)
+        np.testing.assert_allclose(linear[1], [1.0, 1.0, 1.0])
+        np.testing.assert_allclose(linear[2], [0.5 + DAYS * 0.1 + step * 0.1 for step in range(3)])
+
+        holt = holt_forecast(matrix, 3)
+        self.assertEqual(holt.shape, (3, 3))
+        self.assertAlmostEqual(holt[1, 0], 1.0)
+        self.assertTrue(holt[2, 2] > holt[2, 0] > matrix[2, -2])
+
+    def test_anomaly_detection(self):
+        """Testar que só o pico é anômalo, e não a queda de fim de semana"""
+        self.assertEqual(detect_anomalies(*series_matrix(build_table()), START), [])
+
+        spike_day = (START + timedelta(days=DAYS - 2)).isoformat()
+        table = build_table(spike=(spike_day, 'Amazon S3', 'sa-east-1', '111', 25.0))
+        anomalies = detect_anomalies(*series_matrix(table), START)
+
+        self.assertEqual(len(anomalies), 1)
+        self.assertEqual(anomalies[0].label, 'Amazon S3 (sa-east-1)')
+        self.assertEqual(anomalies[0].day.isoformat(), spike_day)
+        self.assertAlmostEqual(anomalies[0].expected, 1.0)
+
+    def test_anomalies_need_full_baseline(self):
+        """Testar que só dias com a janela completa de histórico são avaliados"""
+        # Custo estável com fim de semana mais caro: sem linha de base, o padrão semanal vira anomalia
+        weekdays = np.arange(120) % 7
+        matrix = np.tile(10.0 + 5.0 * (weekdays >= 5), (3, 1))
+
+        scores, expected = anomaly_scores(matrix, weekdays, window=28, days=120)
+
+        self.assertEqual(scores.shape, (3, 120 - 28))
+        self.assertEqual(expected.shape, scores.shape)
+        self.assertEqual(anomaly_scores(matrix[:, :20], weekdays[:20], window=28)[0].shape, (3, 0))
+        self.assertEqual(detect_anomalies(['a', 'b', 'c'], matrix, START, days=120), [])
+
+    def test_many_series_batched(self):
+        """Testar milhares de séries em uma única chamada"""
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(10.0, 1.0, size=(5000, 365))
+        matrix[17, -1] = 500.0
+        weekdays = np.arange(365) % 7
+
+        anomalies = detect_anomalies([f"serie-{index}" for index in range(5000)], matrix, START,
+                                     threshold=10.0)
+        self.assertEqual([anomaly.label for anomaly in anomalies], ['serie-17'])
+        self.assertEqual(holt_forecast(matrix, 30).shape, (5000, 30))
+        self.assertEqual(weekday_adjust(matrix, weekdays).shape, matrix.shape)
+
+class TestForecastCommands(unittest.TestCase):
+
+    def setUp(self):
+        """Configurar AWSServices com tabela de custos simulada"""
+        self.aws_services = AWSServices(clients=ClientPool(factory=lambda service, region: MagicMock()),
+                                        cost_store=CostStore(':memory:'))
+
+    def test_forecast_message(self):
+        """Testar resposta de previsão por serviço"""
+        self.aws_services._fetch_cost_table = MagicMock(return_value=build_table())
+        result = render(self.aws_services.cost_forecast(days=10, method='linear'))
+
+        self.assertIn('próximos 10 dias, método linear', result)
+        self.assertIn('• Amazon S3: USD $10.00', result)
+
+    def test_anomalies_message(self):
+        """Testar resposta de anomalias com e sem picos"""
+        self.aws_services._fetch_cost_table = MagicMock(return_value=build_table())
+        self.assertIn('Nenhuma anomalia', render(self.aws_services.cost_anomalies()))
+
+        spike_day = START + timedelta(days=DAYS - 1)
+        self.aws_services._fetch_cost_table.return_value = build_table(
+            spike=(spike_day.isoformat(), 'Amazon EC2', 'us-east-1', '111', 90.0))
+        result = render(self.aws_services.cost_anomalies(fresh=True))
+        self.assertIn(f"{spike_day.strftime('%d/%m/%Y')} - Amazon EC2 (us-east-1): USD $92.00", result)
+
+    def test_chat_commands(self):
+        """Testar comandos de previsão e anomalias no roteador"""
+        services = MagicMock()
+        router.dispatch('custos previsão --metodo LINEAR', services)
+        services.cost_forecast.assert_called_once_with(days=30, method='linear', fresh=False)
+        router.dispatch('custos anomalias --dias 14', services)
+        services.cost_anomalies.assert_called_once_with(days=14, fresh=False)
+    
+    def test_day_windows_are_bounded(self):
+        """Testar que horizontes e janelas acima do limite são recusados antes de chegar à AWS"""
+        services = MagicMock()
+        router.dispatch(f'custos previsao --dias {FORECAST_MAX_DAYS}', services)
+        with self.assertRaisesRegex(CommandError, f'máximo permitido \\({FORECAST_MAX_DAYS}\\)'):
+            router.dispatch('custos previsao --dias 20000000', services)
+        with self.assertRaises(CommandError):
+            router.dispatch(f'custos diarios --dias {COST_TABLE_DAYS + 1}', services)
+        # Anomalias: cada dia avaliado precisa de COST_ANOMALY_WINDOW dias anteriores na tabela
+        router.dispatch(f'custos anomalias --dias {COST_TABLE_DAYS - COST_ANOMALY_WINDOW}', services)
+        with self.assertRaises(CommandError):
+            router.dispatch(f'custos anomalias --dias {COST_TABLE_DAYS - COST_ANOMALY_WINDOW + 1}', services)
+        
+        services.cost_forecast.assert_called_once_with(days=FORECAST_MAX_DAYS, method='holt', fresh=False)
+        services.daily_costs.assert_not_called()
+        services.cost_anomalies.assert_called_once_with(days=COST_TABLE_DAYS - COST_ANOMALY_WINDOW, fresh=False)
+
+if __name__ == '__main__':
+    unittest.main()
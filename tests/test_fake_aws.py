@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+from datetime import date, timedelta
+from botocore.exceptions import ClientError
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_clients import ClientPool
+from aws_services import AWSServices
+from cost_explorer import fetch_cost_table
+from cost_store import CostStore
+from ec2_inventory import describe_region
+from fake_aws import FakeAccount, FakeAWS
+from listing import InstanceFilter
+from pagination import paginate
+from renderers import render
+from s3_inventory import count_objects, count_objects_parallel
+
+TODAY = date(2024, 6, 1)
+
+class TestFakeAWS(unittest.TestCase):
+
+    def setUp(self):
+        """Conta pequena para os testes serem rápidos"""
+        self.account = FakeAccount(buckets={'logs': 25_000, 'empty': 0}, prefixes=4,
+                                   regions={'us-east-1': 1200, 'sa-east-1': 30}, cost_days=60, today=TODAY)
+        self.fake = FakeAWS(self.account)
+
+    def test_s3_pagination_matches_expected_count(self):
+        """Testar paginação do list_objects_v2 com chaves ordenadas e sem repetição"""
+        s3 = self.fake.client('s3')
+        keys = [obj['Key'] for page in paginate(s3.list_objects_v2, 'ContinuationToken', 'NextContinuationToken',
+                                                Bucket='logs')
+                for obj in page.get('Contents', ())]
+
+        self.assertEqual(len(keys), 25_000)
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertEqual(self.fake.calls['s3.ListObjectsV2'], 25)
+        self.assertEqual(count_objects(s3, 'logs', prefix='part-01/').count,
+                         self.fake.expected_objects('logs', 'part-01/'))
+        self.assertEqual(count_objects(s3, 'empty').count, 0)
+
+    def test_s3_delimiter_and_parallel_count(self):
+        """Testar CommonPrefixes e contagem paralela idêntica à sequencial"""
+        s3 = self.fake.client('s3')
+        prefixes = [common['Prefix'] for page in paginate(s3.list_objects_v2, 'ContinuationToken',
+                                                          'NextContinuationToken', Bucket='logs', Delimiter='/')
+                    for common in page.get('CommonPrefixes', ())]
+        sequential = count_objects(s3, 'logs')
+        parallel = count_objects_parallel(s3, 'logs')
+
+        self.assertEqual(prefixes, ['part-00/', 'part-01/', 'part-02/', 'part-03/'])
+        self.assertEqual((parallel.count, parallel.total_bytes), (sequential.count, sequential.total_bytes))
+        self.assertEqual(parallel.by_storage_class, sequential.by_storage_class)
+
+    def test_s3_missing_bucket(self):
+        """Testar erro NoSuchBucket"""
+        with self.assertRaises(ClientError) as error:
+            self.fake.client('s3').list_objects_v2(Bucket='nao-existe')
+        self.assertEqual(error.exception.response['Error']['Code'], 'NoSuchBucket')
+
+    def test_ec2_pagination_per_region(self):
+        """Testar describe_instances paginado e limites de MaxResults"""
+        ec2 = self.fake.client('ec2', 'us-east-1')
+        result = describe_region(ec2, 'us-east-1')
+
+        self.assertEqual(len(result.instances), 1200)
+        self.assertEqual(len({instance.id for instance in result.instances}), 1200)
+        self.assertEqual(self.fake.calls['ec2.DescribeInstances'], 2)
+        self.assertEqual(len(describe_region(self.fake.client('ec2', 'eu-west-1'), 'eu-west-1').instances), 0)
+        with self.assertRaises(ClientError):
+            ec2.describe_instances(MaxResults=2000)
+
+    def test_cost_explorer_totals_and_limits(self):
+        """Testar custos paginados, filtro por conta e limite de dois GroupBy"""
+        ce = self.fake.client('ce')
+        table = fetch_cost_table(ce, TODAY - timedelta(days=30), TODAY)
+        expected = sum(self.fake.daily_cost(account, service, region, TODAY - timedelta(days=offset))
+                       for account in self.account.accounts
+                       for service, region in self.fake.cost_series(account)
+                       for offset in range(1, 31))
+
+        self.assertAlmostEqual(table.total(30), expected, places=4)
+        self.assertEqual(set(table.dictionaries['account']), set(self.account.accounts))
+        self.assertGreater(self.fake.calls['ce.GetCostAndUsage'], 1 + len(self.account.accounts))
+        with self.assertRaises(ClientError):
+            ce.get_cost_and_usage(TimePeriod={'Start': '2024-05-01', 'End': '2024-05-02'}, Granularity='DAILY',
+                                  Metrics=['BlendedCost'],
+                                  GroupBy=[{'Type': 'DIMENSION', 'Key': key}
+                                           for key in ('SERVICE', 'REGION', 'LINKED_ACCOUNT')])
+
+    def test_deterministic_by_seed(self):
+        """Testar que o mesmo seed gera os mesmos dados"""
+        first = self.fake.client('s3').list_objects_v2(Bucket='logs', MaxKeys=5)
+        second = FakeAWS(self.account).client('s3').list_objects_v2(Bucket='logs', MaxKeys=5)
+        other = FakeAWS(FakeAccount(buckets={'logs': 25_000}, prefixes=4, seed=1)).client('s3')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual([obj['Size'] for obj in first['Contents']],
+                            [obj['Size'] for obj in other.list_objects_v2(Bucket='logs', MaxKeys=5)['Contents']])
+
+    def test_injected_throttling(self):
+        """Testar erros de throttling injetados e contabilizados"""
+        fake = FakeAWS(self.account, throttle_rate=1.0)
+        services = AWSServices(clients=ClientPool(factory=fake.client), cost_store=CostStore(':memory:'))
+
+        self.assertIn('Rate exceeded', render(services.list_s3_buckets()))
+        with self.assertRaises(ClientError) as error:
+            fake.client('ec2').describe_regions()
+        self.assertEqual(error.exception.response['Error']['Code'], 'RequestLimitExceeded')
+        self.assertEqual(fake.throttled, fake.calls)
+
+    def test_aws_services_end_to_end(self):
+        """Testar AWSServices inteiro contra a AWS local"""
+        account = FakeAccount(buckets={'logs': 3000}, prefixes=2, regions={'us-east-1': 40, 'sa-east-1': 10},
+                              cost_days=120)
+        fake = FakeAWS(account)
+        services = AWSServices(clients=ClientPool(factory=fake.client), cost_store=CostStore(':memory:'))
+
+        self.assertIn('logs', render(services.list_s3_buckets()))
+        self.assertIn('**Instâncias EC2:** 50 instância(s)', render(services.list_ec2_instances()))
+        self.assertIn('· us-east-1 · web-0', render(services.list_ec2_instances(InstanceFilter(name='WEB-'))))
+        self.assertIn('💰 **Custos dos últimos 30 dias:** USD $', render(services.get_cost_estimate()))
+        self.assertIn('Custos por serviço', render(services.cost_breakdown('service', top=3)))
+
+if __name__ == '__main__':
+    unittest.main()
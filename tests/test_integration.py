@@ -2,12 +2,14 @@ import unittest
 import json
 import sys
 import os
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 # Adicionar o diretório pai ao path para importar os módulos
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import app
+from aws_clients import ClientPool
+from aws_services import AWSServices
 
 class TestIntegration(unittest.TestCase):
     """Testes de integração end-to-end"""
@@ -17,14 +19,17 @@ class TestIntegration(unittest.TestCase):
         self.app = app.test_client()
         self.app.testing = True
     
-    @patch('aws_services.boto3')
-    def test_full_chat_workflow(self, mock_boto3):
+    def test_full_chat_workflow(self):
         """Testar fluxo completo de chat"""
         # Mock dos clientes AWS
-        mock_s3_client = mock_boto3.client.return_value
+        mock_s3_client = MagicMock()
         mock_s3_client.list_buckets.return_value = {
-            'Buckets': [{'Name': 'test-bucket', 'CreationDate': '2024-01-01'}]
+            'Buckets': [{'Name': 'test-bucket', 'CreationDate': MagicMock()}]
         }
+        services = AWSServices(clients=ClientPool(factory=lambda service, region: mock_s3_client))
+        patcher = patch('app.aws_services', services)
+        patcher.start()
+        self.addCleanup(patcher.stop)
         
         # 1. Acessar página principal
         response = self.app.get('/')
@@ -43,6 +48,8 @@ class TestIntegration(unittest.TestCase):
                                 json={'message': 's3 buckets'},
                                 content_type='application/json')
         self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertIn('test-bucket', data['response'])
     
     def test_error_handling(self):
         """Testar tratamento de erros"""
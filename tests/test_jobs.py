@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import threading
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobs import CANCELLED, DONE, FAILED, JobManager, QueueFullError
+
+class TestJobManager(unittest.TestCase):
+    
+    def setUp(self):
+        """Configurar gerenciador com um worker"""
+        self.manager = JobManager(workers=1, max_queue=2)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+    
+    def blocking(self, result='ok'):
+        def fn(job):
+            self.release.wait(5)
+            job.report('parcial')
+            return result
+        return fn
+    
+    def test_job_completes_with_result_and_progress(self):
+        """Testar execução com resultado e progresso"""
+        job = self.manager.submit('k', self.blocking())
+        self.release.set()
+        
+        self.assertTrue(job.wait(2))
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.result, 'ok')
+        self.assertEqual(job.to_dict()['progress']['partials'], ['parcial'])
+        self.assertIs(self.manager.get(job.id), job)
+    
+    def test_identical_in_flight_jobs_are_shared(self):
+        """Testar deduplicação de tarefas idênticas em andamento"""
+        first = self.manager.submit('k', self.blocking())
+        second = self.manager.submit('k', self.blocking())
+        
+        self.assertIs(first, second)
+        self.assertEqual(self.manager.deduplicated, 1)
+        self.release.set()
+        first.wait(2)
+        
+        # Após terminar, a mesma chave gera uma nova tarefa
+        third = self.manager.submit('k', lambda job: 'novo')
+        self.assertIsNot(third, first)
+    
+    def test_bounded_queue_rejects_when_full(self):
+        """Testar backpressure com fila cheia"""
+        self.manager.submit('running', self.blocking())
+        for _ in range(50):
+            if self.manager.pending == 0:
+                break
+            threading.Event().wait(0.01)
+        self.manager.submit('a', self.blocking())
+        self.manager.submit('b', self.blocking())
+        
+        with self.assertRaises(QueueFullError):
+            self.manager.submit('c', self.blocking())
+    
+    def test_cancel_running_job(self):
+        """Testar cancelamento cooperativo via callback de progresso"""
+        job = self.manager.submit('k', self.blocking())
+        self.manager.cancel(job.id)
+        self.release.set()
+        
+        self.assertTrue(job.wait(2))
+        self.assertEqual(job.status, CANCELLED)
+        self.assertIsNone(job.result)
+    
+    def test_cancel_queued_job_never_runs(self):
+        """Testar que tarefas canceladas na fila não executam"""
+        calls = []
+        self.manager.submit('running', self.blocking())
+        queued = self.manager.submit('queued', lambda job: calls.append(1))
+        self.manager.cancel(queued.id)
+        self.release.set()
+        
+        self.assertTrue(queued.wait(2))
+        self.assertEqual(queued.status, CANCELLED)
+        self.assertEqual(calls, [])
+    
+    def test_release_cancels_after_last_requester(self):
+        """Testar que a tarefa compartilhada só é cancelada quando todos desistem"""
+        job = self.manager.submit('k', self.blocking())
+        self.manager.submit('k', self.blocking())
+        
+        self.manager.release(job.id)
+        self.assertFalse(job.cancel_requested)
+        self.manager.release(job.id)
+        self.assertTrue(job.cancel_requested)
+        self.assertIsNone(self.manager.release('inexistente'))
+    
+    def test_subscribe_replays_progress_and_ends(self):
+        """Testar que o assinante recebe os parciais anteriores, os novos e o fim"""
+        def fn(job):
+            job.report('antes')
+            self.release.wait(5)
+            job.report('depois')
+            return 'ok'
+        job = self.manager.submit('k', fn)
+        for _ in range(50):
+            if job.partials:
+                break
+            threading.Event().wait(0.01)
+        
+        events = job.subscribe()
+        self.release.set()
+        
+        self.assertEqual([events.get(timeout=2) for _ in range(3)], [('partial', 'antes'), ('partial', 'depois'), None])
+        late = job.subscribe()
+        self.assertEqual([late.get(timeout=2) for _ in range(3)], [('partial', 'antes'), ('partial', 'depois'), None])
+    
+    def test_failed_job(self):
+        """Testar tarefa que lança exceção"""
+        def fail(job):
+            raise RuntimeError('boom')
+        
+        job = self.manager.submit('k', fail)
+        
+        self.assertTrue(job.wait(2))
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, 'boom')
+    
+    def test_shutdown_cancels_unfinished_jobs(self):
+        """Testar encerramento com tarefa em execução e tarefa na fila"""
+        running = self.manager.submit('running', self.blocking())
+        queued = self.manager.submit('queued', self.blocking())
+        self.release.set()
+        
+        self.assertTrue(self.manager.shutdown(timeout=2))
+        self.assertEqual(running.status, CANCELLED)
+        self.assertEqual(queued.status, CANCELLED)
+    
+    def test_shutdown_timeout(self):
+        """Testar encerramento que não aguarda além do timeout"""
+        self.manager.submit('k', lambda job: self.release.wait(5))
+        
+        self.assertFalse(self.manager.shutdown(timeout=0.05))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import re
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_clients import ClientPool
+from aws_services import AWSServices
+from commands import router
+from cost_store import CostStore
+from ec2_inventory import Instance
+from fake_aws import FakeAccount, FakeAWS
+from listing import (INSTANCE_ORDERS, LISTING_MAX_PAGE_SIZE, InstanceFilter, decode_cursor, encode_cursor,
+                     select_page)
+from renderers import render
+from results import Failure, InstancePage
+
+START = datetime(2024, 1, 1)
+
+def instances(count, region='us-east-1'):
+    return [Instance(f'i-{index:04d}', 't3.micro' if index % 2 else 'm5.large', 'running', START + timedelta(hours=index),
+                     region, f'web-{index}', (('Name', f'web-{index}'), ('env', 'prod' if index % 3 else 'dev')))
+            for index in range(count)]
+
+def walk(items, order='regiao', size=10):
+    """Percorrer todas as páginas seguindo os cursores"""
+    pages = [select_page(items, order, INSTANCE_ORDERS, size)]
+    while pages[-1].next_cursor:
+        pages.append(select_page(items, order, INSTANCE_ORDERS, size, cursor=pages[-1].next_cursor))
+    return pages
+
+class TestSelectPage(unittest.TestCase):
+
+    def test_cursor_walks_every_item_once(self):
+        """Testar que os cursores percorrem a listagem inteira na ordem, sem repetir itens"""
+        items = instances(95)
+
+        pages = walk(items)
+
+        self.assertEqual([page.number for page in pages], list(range(1, 11)))
+        self.assertEqual([item for page in pages for item in page.items], sorted(items, key=lambda i: i.id))
+        self.assertEqual((pages[0].total, pages[0].pages, pages[-1].first, len(pages[-1].items)), (95, 10, 91, 5))
+        self.assertIsNone(pages[-1].next_cursor)
+
+    def test_page_number_matches_cursor(self):
+        """Testar que --pagina N retorna a mesma página que N-1 cursores"""
+        items = instances(95)
+
+        self.assertEqual(select_page(items, 'recentes', INSTANCE_ORDERS, 10, number=3).items,
+                         walk(items, 'recentes')[2].items)
+        self.assertEqual(walk(items, 'recentes')[0].items[0].id, 'i-0094')
+
+    def test_cursor_survives_snapshot_refresh(self):
+        """Testar que itens novos ou removidos antes do cursor não repetem nem pulam itens"""
+        items = instances(30)
+        first = select_page(items, 'regiao', INSTANCE_ORDERS, 10)
+
+        refreshed = instances(1, region='ap-south-1') + items[:3] + items[4:]
+        second = select_page(refreshed, 'regiao', INSTANCE_ORDERS, 10, cursor=first.next_cursor)
+
+        self.assertEqual(second.items, items[10:20])
+
+    def test_invalid_cursors(self):
+        """Testar cursores ilegíveis, adulterados ou de outra ordem"""
+        items = instances(5)
+        cursor = encode_cursor('regiao', 1, ('us-east-1', 'i-0001'))
+
+        self.assertEqual(decode_cursor(cursor, 'regiao'), (1, ('us-east-1', 'i-0001')))
+        for bad in ('???', 'bm9wZQ', encode_cursor('regiao', 0, ()), encode_cursor('regiao', 1, (1.5, 'x'))):
+            with self.assertRaises(ValueError):
+                select_page(items, 'regiao', INSTANCE_ORDERS, 2, cursor=bad)
+        with self.assertRaisesRegex(ValueError, '--ordem regiao'):
+            select_page(items, 'tipo', INSTANCE_ORDERS, 2, cursor=cursor)
+
+    def test_page_size_is_capped(self):
+        """Testar o limite de itens por página"""
+        page = select_page(instances(LISTING_MAX_PAGE_SIZE + 50), 'id', INSTANCE_ORDERS, 10_000)
+
+        self.assertEqual(len(page.items), LISTING_MAX_PAGE_SIZE)
+
+    def test_instance_filter(self):
+        """Testar filtros por estado, tipo ou família, tag e prefixo do nome"""
+        instance = instances(2)[1]
+
+        for matching in (InstanceFilter(), InstanceFilter(state='running'), InstanceFilter(type='t3'),
+                         InstanceFilter(type='t3.micro'), InstanceFilter(tag='env'), InstanceFilter(tag='env=prod'),
+                         InstanceFilter(name='WEB-1')):
+            self.assertTrue(matching.matches(instance), matching)
+        for other in (InstanceFilter(state='stopped'), InstanceFilter(type='t3.mi'), InstanceFilter(tag='team'),
+                      InstanceFilter(tag='env=dev'), InstanceFilter(name='api')):
+            self.assertFalse(other.matches(instance), other)
+
+class TestListingCommands(unittest.TestCase):
+
+    def setUp(self):
+        """AWSServices ligado à AWS local com 2000 instâncias"""
+        self.fake = FakeAWS(FakeAccount(buckets={f'logs-{index:03d}': 1 for index in range(120)},
+                                        regions={'us-east-1': 1500, 'sa-east-1': 500}))
+        self.services = AWSServices(clients=ClientPool(factory=self.fake.client), cost_store=CostStore(':memory:'))
+
+    def test_pages_come_from_cached_snapshot(self):
+        """Testar que filtros e páginas não consultam a AWS de novo e a resposta tem tamanho limitado"""
+        first = render(router.dispatch('ec2 instancias running --tag env=prod', self.services))
+        calls = self.fake.calls['ec2.DescribeInstances']
+        next_command = re.search(r'próxima: `([^`]+)`', first).group(1)
+
+        second = router.dispatch(next_command, self.services)
+
+        self.assertIsInstance(second, InstancePage)
+        self.assertEqual(self.fake.calls['ec2.DescribeInstances'], calls)
+        self.assertEqual(second.page.number, 2)
+        self.assertTrue(all(instance.state == 'running' and dict(instance.tags)['env'] == 'prod'
+                            for instance in second.page.items))
+        self.assertIn('📄 Página 1 de', first)
+        self.assertLess(len(first), 5000)
+        self.assertEqual(len(render(second, 'json')['instances']), 50)
+
+    def test_invalid_cursor_is_reported(self):
+        """Testar cursor inválido como mensagem de erro"""
+        result = self.services.list_ec2_instances(cursor='invalido')
+
+        self.assertIsInstance(result, Failure)
+        self.assertIn('Cursor inválido', render(result))
+
+    def test_bucket_pages(self):
+        """Testar buckets filtrados por prefixo e paginados"""
+        result = router.dispatch('s3 buckets logs-1 --limite 15', self.services)
+
+        self.assertEqual((result.page.total, result.page.pages), (20, 2))
+        self.assertEqual(result.page.items[0].name, 'logs-100')
+        self.assertIn("**Seus buckets S3 com prefixo 'logs-1':** 1-15 de 20", render(result))
+        self.assertIn('`s3 buckets logs-1 --limite 15 --cursor ', render(result))
+        self.assertIn('Nenhum bucket S3 encontrado', render(router.dispatch('s3 buckets tmp-', self.services)))
+
+if __name__ == '__main__':
+    unittest.main()
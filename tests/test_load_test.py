@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.load_test import LocalServer, compare, main, parse_mix, run_load, summarize
+from capacity_planner import load_benchmarks
+
+class TestLoadTest(unittest.TestCase):
+
+    def test_parse_mix(self):
+        """Testar mistura de comandos com pesos"""
+        self.assertEqual(parse_mix('custos=4, s3 buckets=1,ajuda'), {'custos': 4.0, 's3 buckets': 1.0, 'ajuda': 1.0})
+
+    def test_run_against_local_server(self):
+        """Testar carga contra o app local com AWS simulada"""
+        with LocalServer(latency=0) as server:
+            records, elapsed = run_load(server.url, {'custos': 1, 'comando inexistente': 1}, concurrency=2,
+                                        requests=20)
+
+        summary = summarize(records, elapsed)
+        self.assertEqual(summary['requests'], 20)
+        self.assertEqual(set(summary['commands']), {'custos', 'comando inexistente'})
+        self.assertEqual(summary['commands']['custos']['errors'], 0)
+        self.assertEqual(summary['status'], {'200': 20})
+        self.assertGreater(summary['throughput_rps'], 0)
+        self.assertLessEqual(summary['latency_ms']['p50'], summary['latency_ms']['p99'])
+
+    def test_run_against_gunicorn(self):
+        """Testar carga contra o gunicorn.conf.py em subprocesso"""
+        with LocalServer('gunicorn', latency=0) as server:
+            records, elapsed = run_load(server.url, {'s3 buckets': 1}, concurrency=4, requests=20)
+            process = server._process
+        
+        summary = summarize(records, elapsed)
+        self.assertEqual(summary['status'], {'200': 20})
+        self.assertEqual(summary['error_rate'], 0.0)
+        self.assertIsNotNone(process.poll())
+
+    def test_compare_detects_regressions(self):
+        """Testar comparação com resultado de referência"""
+        baseline = {'throughput_rps': 100, 'error_rate': 0.0,
+                    'latency_ms': {'p50': 10, 'p95': 20, 'p99': 40}}
+        same = dict(baseline, throughput_rps=95)
+        slower = dict(baseline, throughput_rps=80, latency_ms={'p50': 10, 'p95': 20, 'p99': 60})
+
+        self.assertEqual(compare(same, baseline, tolerance=0.1), [])
+        regressions = compare(slower, baseline, tolerance=0.1)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('p99 subiu de 40 para 60 ms', regressions)
+
+    def test_results_feed_capacity_planner(self):
+        """Testar que o JSON de resultados é lido pelo capacity_planner.py"""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'resultados.json')
+            for cpu, memory in ((256, 512), (512, 1024)):
+                self.assertEqual(main(['--requests', '10', '--concurrency', '2', '--latency-ms', '0',
+                                       '--mix', 'ajuda', '--cpu', str(cpu), '--memory', str(memory),
+                                       '--output', output, '--append']), 0)
+
+            sizes = load_benchmarks(output)
+            self.assertEqual([(size.cpu, size.memory) for size in sizes], [(256, 512), (512, 1024)])
+            self.assertEqual(main(['--requests', '10', '--concurrency', '2', '--latency-ms', '0',
+                                   '--mix', 'ajuda', '--compare', output, '--tolerance', '100']), 0)
+            with open(output) as results_file:
+                self.assertEqual(len(json.load(results_file)['results']), 2)
+
+if __name__ == '__main__':
+    unittest.main()
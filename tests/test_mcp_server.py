@@ -0,0 +1,259 @@
+import unittest
+import asyncio
+import importlib.util
+import json
+import sys
+import os
+import time
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_clients import ClientPool
+from aws_services import AWSServices
+from cost_store import CostStore
+from fake_aws import FakeAccount, FakeAWS
+
+# Carregado pelo caminho: 'mcp' também é o nome do pacote do SDK em requirements.txt
+SERVER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mcp', 'server.py')
+spec = importlib.util.spec_from_file_location('mcp_server', SERVER_PATH)
+mcp_server = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mcp_server)
+MCPServer = mcp_server.MCPServer
+INVALID_PARAMS, METHOD_NOT_FOUND = mcp_server.INVALID_PARAMS, mcp_server.METHOD_NOT_FOUND
+PARSE_ERROR, RESOURCE_NOT_FOUND = mcp_server.PARSE_ERROR, mcp_server.RESOURCE_NOT_FOUND
+INVALID_REQUEST = mcp_server.INVALID_REQUEST
+
+def request(request_id, method, params=None):
+    message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params is not None:
+        message["params"] = params
+    return message
+
+def by_id(responses):
+    """Respostas em ordem de id (o servidor responde na ordem de conclusão)"""
+    return sorted((response for response in responses if "id" in response),
+                  key=lambda response: (response["id"] is not None, response["id"] or 0))
+
+class TestMCPServer(unittest.TestCase):
+
+    def setUp(self):
+        """Servidor MCP ligado à AWS local"""
+        self.fake = FakeAWS(FakeAccount(buckets={'logs': 100, 'backups': 10}, regions={'us-east-1': 12, 'sa-east-1': 3},
+                                        cost_days=60))
+        self.services = AWSServices(clients=ClientPool(factory=self.fake.client), cost_store=CostStore(':memory:'))
+        self.server = MCPServer(self.services, refresh_interval=0.01)
+        asyncio.run(self.server.initialize())
+
+    def converse(self, messages, until=None):
+        """Enviar mensagens (dict ou texto) pelo transporte stdio e retornar as respostas"""
+        async def scenario():
+            reader = asyncio.StreamReader()
+            output = []
+            for message in messages:
+                line = message if isinstance(message, str) else json.dumps(message)
+                reader.feed_data(line.encode() + b"\n")
+            serving = asyncio.create_task(self.server.serve(reader, output.append))
+            if until is not None:
+                await until(self.server, output)
+            reader.feed_eof()
+            await serving
+            return [json.loads(line) for line in output]
+
+        return asyncio.run(scenario())
+
+    def test_handshake_and_listing(self):
+        """Testar initialize, notificação initialized e listagens"""
+        responses = by_id(self.converse([
+            request(1, "initialize", {"protocolVersion": "2024-11-05", "capabilities": {}}),
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            request(2, "resources/list"),
+            request(3, "tools/list")
+        ]))
+
+        self.assertEqual([response["id"] for response in responses], [1, 2, 3])
+        self.assertTrue(responses[0]["result"]["capabilities"]["resources"]["subscribe"])
+        self.assertEqual({resource["uri"] for resource in responses[1]["result"]["resources"]},
+                         {"aws://costs", "aws://s3/buckets", "aws://ec2/instances"})
+        self.assertEqual(responses[2]["result"]["tools"][0]["name"], "get_aws_context")
+
+    def test_read_resources_from_aws_services(self):
+        """Testar recursos com dados reais e cache compartilhado"""
+        responses = by_id(self.converse([
+            request(1, "resources/read", {"uri": "aws://s3/buckets"}),
+            request(2, "resources/read", {"uri": "aws://ec2/instances"}),
+            request(3, "resources/read", {"uri": "aws://costs"}),
+            request(4, "resources/read", {"uri": "aws://s3/buckets"})
+        ]))
+        s3, ec2, costs, again = (json.loads(response["result"]["contents"][0]["text"]) for response in responses)
+
+        self.assertEqual([bucket["name"] for bucket in s3["buckets"]], ["backups", "logs"])
+        self.assertEqual(ec2["count"], 15)
+        self.assertEqual({region["region"]: region["count"] for region in ec2["regions"]},
+                         {"us-east-1": 12, "sa-east-1": 3})
+        self.assertEqual(costs["currency"], "USD")
+        self.assertGreater(costs["last_30_days"], 0)
+        self.assertEqual(len(costs["daily"]), 7)
+        self.assertEqual(again, s3)
+        self.assertEqual(self.fake.calls['s3.ListBuckets'], 1)
+
+    def test_tool_call(self):
+        """Testar get_aws_context com um recurso e com 'all'"""
+        responses = by_id(self.converse([
+            request(1, "tools/call", {"name": "get_aws_context", "arguments": {"resource_type": "s3"}}),
+            request(2, "tools/call", {"name": "get_aws_context", "arguments": {"resource_type": "all"}})
+        ]))
+
+        single = json.loads(responses[0]["result"]["content"][0]["text"])
+        combined = json.loads(responses[1]["result"]["content"][0]["text"])
+        self.assertEqual(single["count"], 2)
+        self.assertEqual(set(combined), {"costs", "s3", "ec2"})
+        self.assertFalse(responses[1]["result"]["isError"])
+
+    def test_protocol_errors(self):
+        """Testar erros JSON-RPC"""
+        responses = by_id(self.converse([
+            "não é json",
+            request(1, "metodo/inexistente"),
+            request(2, "resources/read", {"uri": "aws://lambda"}),
+            request(3, "tools/call", {"name": "get_aws_context", "arguments": {"resource_type": "rds"}}),
+            request(4, "resources/read", {})
+        ]))
+
+        codes = [response["error"]["code"] for response in responses]
+        self.assertEqual(codes, [PARSE_ERROR, METHOD_NOT_FOUND, RESOURCE_NOT_FOUND, INVALID_PARAMS, INVALID_PARAMS])
+
+    def test_invalid_ids_are_rejected(self):
+        """Testar que ids lista ou objeto recebem INVALID_REQUEST sem derrubar o loop"""
+        responses = self.converse([
+            request([1], "ping"),
+            request({"a": 1}, "ping"),
+            {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": [1]}},
+            {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": ["x"]},
+            request(1, "ping")
+        ])
+
+        self.assertEqual([response["id"] for response in responses], [None, None, 1])
+        self.assertEqual([response["error"]["code"] for response in responses[:2]], [INVALID_REQUEST] * 2)
+        self.assertEqual(responses[2]["result"], {})
+
+    def test_aws_errors_are_reported(self):
+        """Testar erro AWS como isError na ferramenta e como erro JSON-RPC no recurso"""
+        self.fake.throttle_rate = 1.0
+        responses = by_id(self.converse([
+            request(1, "tools/call", {"name": "get_aws_context", "arguments": {"resource_type": "s3"}}),
+            request(2, "resources/read", {"uri": "aws://s3/buckets"})
+        ]))
+
+        self.assertTrue(responses[0]["result"]["isError"])
+        self.assertIn("Rate exceeded", responses[0]["result"]["content"][0]["text"])
+        self.assertIn("Rate exceeded", responses[1]["error"]["message"])
+
+    def test_subscription_pushes_updates(self):
+        """Testar notificação quando o conteúdo de um recurso inscrito muda"""
+        async def launch_instances(server, output):
+            while len(output) < 2:
+                await asyncio.sleep(0.01)
+            # Novas instâncias e cache expirado: a próxima verificação vê a mudança
+            self.fake.account.regions['us-east-1'] += 5
+            self.services.cache.invalidate()
+            while len(output) < 3:
+                await asyncio.sleep(0.01)
+
+        responses = self.converse([
+            request(1, "resources/read", {"uri": "aws://ec2/instances"}),
+            request(2, "resources/subscribe", {"uri": "aws://ec2/instances"})
+        ], until=launch_instances)
+
+        self.assertEqual(responses[2], {"jsonrpc": "2.0", "method": "notifications/resources/updated",
+                                        "params": {"uri": "aws://ec2/instances"}})
+        self.assertEqual(self.server.subscriptions, set())
+
+class TestMCPConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        """Recursos lentos (0.2s cada) no lugar das consultas AWS"""
+        self.server = MCPServer(AWSServices(clients=ClientPool(factory=FakeAWS().client),
+                                            cost_store=CostStore(':memory:')), executor_workers=8)
+        asyncio.run(self.server.initialize())
+        self.loads = []
+
+        def slow(uri):
+            def loader(services, fresh=False):
+                self.loads.append(uri)
+                time.sleep(0.2)
+                return {"uri": uri}
+            return loader
+
+        self.server.loaders = {uri: slow(uri) for uri in self.server.loaders}
+
+    def tearDown(self):
+        self.server.executor.shutdown(wait=True)
+
+    def converse(self, messages):
+        async def scenario():
+            reader = asyncio.StreamReader()
+            output = []
+            for message in messages:
+                reader.feed_data(json.dumps(message).encode() + b"\n")
+            reader.feed_eof()
+            start = time.perf_counter()
+            await self.server.serve(reader, output.append)
+            return [json.loads(line) for line in output], time.perf_counter() - start
+
+        return asyncio.run(scenario())
+
+    def test_all_fans_out_in_parallel(self):
+        """Testar 'all' com os três recursos consultados ao mesmo tempo"""
+        responses, elapsed = self.converse([
+            request(1, "tools/call", {"name": "get_aws_context", "arguments": {"resource_type": "all"}})
+        ])
+
+        context = json.loads(responses[0]["result"]["content"][0]["text"])
+        self.assertEqual(context["ec2"]["uri"], "aws://ec2/instances")
+        self.assertEqual(len(self.loads), 3)
+        self.assertLess(elapsed, 0.45)
+
+    def test_requests_are_answered_as_they_finish(self):
+        """Testar que uma requisição lenta não bloqueia as seguintes"""
+        responses, elapsed = self.converse([
+            request(1, "resources/read", {"uri": "aws://costs"}),
+            request(2, "resources/read", {"uri": "aws://s3/buckets"}),
+            request(3, "ping")
+        ])
+
+        self.assertEqual(responses[0]["id"], 3)
+        self.assertEqual({response["id"] for response in responses}, {1, 2, 3})
+        self.assertLess(elapsed, 0.35)
+
+    def test_batch_tool(self):
+        """Testar consultas em lote com uma resposta combinada"""
+        queries = [{"resource_type": "costs"}, {"resource_type": "s3"}, {"resource_type": "all"}]
+        responses, elapsed = self.converse([
+            request(1, "tools/call", {"name": "get_aws_context_batch", "arguments": {"queries": queries}}),
+            request(2, "tools/call", {"name": "get_aws_context_batch",
+                                      "arguments": {"queries": [{"resource_type": "rds"}]}}),
+            request(3, "tools/call", {"name": "get_aws_context_batch", "arguments": {"queries": []}})
+        ])
+        responses = by_id(responses)
+
+        results = json.loads(responses[0]["result"]["content"][0]["text"])["results"]
+        self.assertEqual([result["resource_type"] for result in results], ["costs", "s3", "all"])
+        self.assertEqual(results[1]["context"]["uri"], "aws://s3/buckets")
+        self.assertEqual(set(results[2]["context"]), {"costs", "s3", "ec2"})
+        self.assertLess(elapsed, 0.45)
+        self.assertEqual(responses[1]["error"]["code"], INVALID_PARAMS)
+        self.assertEqual(responses[2]["error"]["code"], INVALID_PARAMS)
+
+    def test_cancelled_request_gets_no_response(self):
+        """Testar notifications/cancelled para uma requisição em andamento"""
+        responses, _ = self.converse([
+            request(1, "resources/read", {"uri": "aws://costs"}),
+            {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 1}},
+            request(2, "ping")
+        ])
+
+        self.assertEqual(responses, [{"jsonrpc": "2.0", "id": 2, "result": {}}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+import sys
+import os
+import boto3
+from botocore.stub import Stubber
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as chat_app
+import metrics
+from aws_clients import ClientPool
+from aws_services import AWSServices
+from cost_store import CostStore
+from fake_aws import FakeAccount, FakeAWS
+
+def sample(text, line_prefix):
+    """Valor da primeira amostra do texto Prometheus que começa com line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter_and_histogram_exposition(self):
+        """Testar formato de exposição do Prometheus"""
+        counter = self.registry.counter('demo_total', 'Demo', ('kind',))
+        histogram = self.registry.histogram('demo_seconds', 'Demo', ('kind',), buckets=(0.1, 1))
+        counter.inc(1, 'a')
+        counter.inc(2, 'a')
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, 'x"y')
+
+        text = self.registry.render()
+        self.assertIn('# TYPE demo_total counter', text)
+        self.assertIn('demo_total{kind="a"} 3', text)
+        self.assertIn('demo_seconds_bucket{kind="x\\"y",le="0.1"} 1', text)
+        self.assertIn('demo_seconds_bucket{kind="x\\"y",le="1.0"} 2', text)
+        self.assertIn('demo_seconds_bucket{kind="x\\"y",le="+Inf"} 3', text)
+        self.assertIn('demo_seconds_count{kind="x\\"y"} 3', text)
+        self.assertAlmostEqual(sample(text, 'demo_seconds_sum'), 5.55)
+
+    def test_same_name_returns_existing_metric(self):
+        """Testar que registrar duas vezes não duplica a métrica"""
+        first = self.registry.counter('demo_total', 'Demo')
+        self.assertIs(self.registry.counter('demo_total', 'Demo'), first)
+
+    def test_failing_gauge_is_skipped(self):
+        """Testar gauge com erro na coleta"""
+        self.registry.gauge('ok_gauge', 'Ok', lambda: 7)
+        self.registry.gauge('bad_gauge', 'Falha', lambda: 1 / 0)
+        with self.assertLogs('metrics', level='ERROR'):
+            text = self.registry.render()
+        self.assertIn('ok_gauge 7', text)
+        self.assertNotIn('bad_gauge ', text)
+
+class TestTracing(unittest.TestCase):
+
+    def test_spans_accumulate_in_trace(self):
+        """Testar fases acumuladas no trace atual e Server-Timing"""
+        trace, token = metrics.start_trace('teste')
+        try:
+            for _ in range(2):
+                with metrics.span('route'):
+                    pass
+            metrics.record('aws', 0.25)
+        finally:
+            metrics.finish_trace(trace, token)
+
+        self.assertIsNone(metrics.current_trace())
+        self.assertEqual(trace.phases['route'][0], 2)
+        self.assertIn('aws;dur=250.0', trace.server_timing())
+        self.assertIn('route=0ms (2x)', trace.summary())
+
+    def test_slow_request_is_logged(self):
+        """Testar log de requisição lenta com detalhamento por fase"""
+        trace, token = metrics.start_trace('POST /chat')
+        metrics.record('aws', 3.0)
+        trace.started -= 3
+        with self.assertLogs('metrics', level='WARNING') as logs:
+            metrics.finish_trace(trace, token)
+        self.assertIn('aws=3000ms', logs.output[0])
+
+    def test_boto3_client_instrumentation(self):
+        """Testar contagem e tempo de chamadas pelos eventos do botocore"""
+        client = boto3.client('s3', region_name='us-east-1', aws_access_key_id='teste',
+                              aws_secret_access_key='teste')
+        metrics.instrument_client(client)
+        calls = metrics.AWS_SECONDS.count('s3', 'ListBuckets')
+        errors = metrics.AWS_CALLS.value('s3', 'ListBuckets', 'AccessDenied')
+
+        with Stubber(client) as stubber:
+            stubber.add_response('list_buckets', {'Buckets': []})
+            stubber.add_client_error('list_buckets', 'AccessDenied', http_status_code=403)
+            client.list_buckets()
+            with self.assertRaises(Exception):
+                client.list_buckets()
+
+        self.assertEqual(metrics.AWS_SECONDS.count('s3', 'ListBuckets'), calls + 2)
+        self.assertEqual(metrics.AWS_CALLS.value('s3', 'ListBuckets', 'AccessDenied'), errors + 1)
+
+class TestMetricsEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = chat_app.aws_services
+        self.fake = FakeAWS(FakeAccount(buckets={'logs': 100}, regions={'us-east-1': 5}, cost_days=30))
+        chat_app.aws_services = AWSServices(clients=ClientPool(factory=self.fake.client),
+                                            cost_store=CostStore(':memory:'))
+        self.client = chat_app.app.test_client()
+
+    def tearDown(self):
+        chat_app.aws_services = self.previous
+
+    def test_chat_is_traced_and_exposed(self):
+        """Testar Server-Timing do /chat e contadores em /metrics"""
+        before = self.client.get('/metrics').get_data(as_text=True)
+        response = self.client.post('/chat', json={'message': 's3 buckets'})
+        self.client.post('/chat', json={'message': 's3 buckets'})
+        self.client.post('/chat', json={'message': 'comando inexistente'})
+        after = self.client.get('/metrics')
+        text = after.get_data(as_text=True)
+
+        def delta(prefix):
+            return (sample(text, prefix) or 0) - (sample(before, prefix) or 0)
+
+        timing = response.headers['Server-Timing']
+        for phase in ('route', 'aws', 'services-list_s3_buckets', 'command', 'total'):
+            self.assertIn(f'{phase};dur=', timing)
+        self.assertTrue(after.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertEqual(delta('chatbot_http_requests_total{method="POST",route="/chat",status="200"}'), 3)
+        self.assertEqual(delta('chatbot_aws_calls_total{service="s3",operation="ListBuckets",result="ok"}'), 1)
+        self.assertEqual(delta('chatbot_cache_requests_total{operation="list_s3_buckets",result="fresh"}'), 1)
+        self.assertEqual(delta('chatbot_command_seconds_count{command="s3 buckets"}'), 2)
+        self.assertEqual(delta('chatbot_errors_total{source="command",type="CommandError"}'), 1)
+        self.assertIn('chatbot_cache_entries ', text)
+        self.assertEqual(sample(text, 'chatbot_singleflight_executions_total'),
+                         chat_app.aws_services.flight.stats()['executions'])
+        self.assertIn('# TYPE chatbot_singleflight_coalesced_total counter', text)
+
+    def test_throttled_calls_are_counted_by_error_code(self):
+        """Testar contagem de chamadas AWS com erro pelo código"""
+        self.fake.throttle_rate = 1.0
+        label = 'chatbot_aws_calls_total{service="s3",operation="ListBuckets",result="SlowDown"}'
+        before = sample(metrics.registry.render(), label) or 0
+
+        response = self.client.post('/chat', json={'message': 's3 buckets'})
+
+        self.assertIn('Rate exceeded', response.get_json()['response'])
+        self.assertEqual(sample(metrics.registry.render(), label), before + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import json
+import sys
+import os
+from datetime import date, datetime
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ec2_inventory import Instance, describe_region
+from fake_aws import FakeAccount, FakeAWS
+from listing import BUCKET_ORDERS, INSTANCE_ORDERS, InstanceFilter, select_page
+from renderers import render, to_text
+from results import (Bucket, BucketPage, CostBreakdown, CostShare, DailyCost, DailyCosts, Failure, InstancePage,
+                     Notice)
+from s3_inventory import S3ObjectStats
+
+LAUNCH = datetime(2024, 1, 2, 3, 4, 5)
+
+def instances():
+    return InstancePage(select_page([Instance('i-1', 't3.micro', 'running', LAUNCH, 'us-east-1'),
+                                     Instance('i-2', 'm5.large', 'pending', LAUNCH, 'us-east-1')],
+                                    'regiao', INSTANCE_ORDERS), InstanceFilter(), ['sa-east-1'])
+
+class TestRenderers(unittest.TestCase):
+
+    def test_ec2_markdown(self):
+        """Testar a página de instâncias EC2 em markdown"""
+        self.assertEqual(render(instances()),
+                         "🖥️ **Instâncias EC2:** 2 instância(s)\n"
+                         "\n🟢 **i-1** (t3.micro) - running · us-east-1"
+                         "\n🟡 **i-2** (m5.large) - pending · us-east-1"
+                         "\n⚠️ Falha em: sa-east-1")
+
+    def test_text_strips_markdown_and_emoji(self):
+        """Testar o texto simples derivado do markdown"""
+        text = render(instances(), 'text')
+
+        self.assertTrue(text.startswith("Instâncias EC2: 2 instância(s)\n\ni-1 (t3.micro)"))
+        self.assertIn("Falha em: sa-east-1", text)
+        self.assertNotIn('**', text)
+        self.assertEqual(to_text("📊 **Custos por serviço** → `x`"), "Custos por serviço → x")
+
+    def test_ec2_json(self):
+        """Testar a página de instâncias EC2 como dados JSON"""
+        data = render(instances(), 'json')
+
+        self.assertEqual(data['type'], 'InstancePage')
+        self.assertEqual((data['total'], data['failed']), (2, ['sa-east-1']))
+        self.assertEqual(data['instances'][0], {'id': 'i-1', 'type': 't3.micro', 'state': 'running',
+                                                'region': 'us-east-1', 'name': '', 'tags': {},
+                                                'launch_time': '2024-01-02T03:04:05'})
+        json.dumps(data)
+
+    def test_cost_breakdown(self):
+        """Testar custos com top: restante agregado no markdown, apenas os exibidos no JSON"""
+        result = CostBreakdown('service', 30, 'USD', [CostShare('EC2', 75.0), CostShare('S3', 20.0),
+                                                      CostShare('Lambda', 5.0)], top=1)
+
+        self.assertEqual(render(result), "📊 **Custos por serviço (últimos 30 dias):**\n\n"
+                                         "• EC2: USD $75.00 (75.0%)\n"
+                                         "• ... e mais 2: USD $25.00\n"
+                                         "\n💰 **Total:** USD $100.00")
+        self.assertEqual(render(result, 'json'), {'type': 'CostBreakdown', 'dimension': 'service', 'days': 30,
+                                                  'currency': 'USD', 'total': 100.0, 'count': 3,
+                                                  'items': [{'name': 'EC2', 'amount': 75.0}]})
+
+    def test_other_records(self):
+        """Testar buckets, custos diários, avisos, erros, contagens S3 e texto livre"""
+        buckets = BucketPage(select_page([Bucket('logs', LAUNCH)], 'nome', BUCKET_ORDERS))
+        daily = DailyCosts('USD', [DailyCost(date(2024, 1, 1), 1.0), DailyCost(date(2024, 1, 2), 3.0)])
+        stats = S3ObjectStats('b', count=2, total_bytes=2048, by_storage_class={'STANDARD': [2, 2048]},
+                              by_prefix={'': [2, 2048]})
+
+        self.assertEqual(render(buckets), "🗂️ **Seus buckets S3:** 1 bucket(s)\n\n• logs (criado em 02/01/2024)")
+        self.assertEqual(render(buckets, 'json')['buckets'], [{'name': 'logs', 'created': '2024-01-02T03:04:05'}])
+        self.assertIn("(média de USD $2.00/dia)", render(daily))
+        self.assertEqual(render(daily, 'json')['days'][1], {'day': '2024-01-02', 'amount': 3.0})
+        self.assertEqual(render(Notice('Sem dados.', '📊')), "📊 Sem dados.")
+        self.assertEqual(render(Failure('Erro ao listar buckets: negado')), "❌ Erro ao listar buckets: negado")
+        self.assertEqual(render(Failure('negado'), 'json'), {'type': 'Failure', 'error': 'negado'})
+        self.assertIn("2 arquivo(s) encontrado(s) (2.0 KB)", render(stats))
+        self.assertEqual(render(stats, 'json')['by_storage_class'], {'STANDARD': {'count': 2, 'bytes': 2048}})
+        self.assertEqual(render("**Ajuda**"), "**Ajuda**")
+        self.assertEqual(render("**Ajuda**", 'json'), {'type': 'message', 'text': 'Ajuda'})
+
+    def test_invalid_format(self):
+        """Testar formato desconhecido"""
+        with self.assertRaises(ValueError):
+            render(Notice('x'), 'html')
+
+    def test_instances_share_type_and_state_strings(self):
+        """Testar que tipos e estados repetidos são a mesma string em memória"""
+        fake = FakeAWS(FakeAccount(regions={'us-east-1': 50}))
+
+        instances = describe_region(fake.client('ec2', 'us-east-1'), 'us-east-1').instances
+
+        self.assertEqual(len(instances), 50)
+        self.assertEqual(len({id(instance.state) for instance in instances}),
+                         len({instance.state for instance in instances}))
+        self.assertFalse(hasattr(instances[0], '__dict__'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router import Arg, CommandError, CommandRouter, Flag
+from commands import router as default_router
+from listing import LISTING_PAGE_SIZE, InstanceFilter
+
+class TestCommandRouter(unittest.TestCase):
+
+    def setUp(self):
+        """Configurar roteador com comandos de exemplo"""
+        self.router = CommandRouter()
+        self.calls = []
+
+        @self.router.command('custos', help='Total de custos')
+        def costs(services):
+            self.calls.append(('custos', {}))
+            return 'custos'
+
+        @self.router.command('custos top', help='Maiores serviços',
+                             args=(Arg('n', type=int, default=5),),
+                             flags=(Flag('dias', type=int, default=30), Flag('fresh')))
+        def top(services, **kwargs):
+            self.calls.append(('custos top', kwargs))
+            return 'top'
+
+        @self.router.command('s3 arquivos', args=(Arg('bucket', required=True), Arg('prefix')))
+        def objects(services, **kwargs):
+            self.calls.append(('s3 arquivos', kwargs))
+            return 'arquivos'
+
+    def test_longest_phrase_wins(self):
+        """Testar que 'custos top' não é despachado como 'custos'"""
+        self.assertEqual(self.router.dispatch('custos top 3 --dias 7 --fresh', None), 'top')
+        self.assertEqual(self.calls[-1], ('custos top', {'n': 3, 'dias': 7, 'fresh': True}))
+
+    def test_defaults_applied(self):
+        """Testar valores padrão de argumentos e opções"""
+        self.router.dispatch('custos top', None)
+        self.assertEqual(self.calls[-1][1], {'n': 5, 'dias': 30, 'fresh': False})
+
+    def test_phrase_case_insensitive_and_args_keep_case(self):
+        """Testar frase sem diferenciar maiúsculas e argumentos preservados"""
+        self.router.dispatch('S3   Arquivos  meu-bucket Logs/2024/', None)
+        self.assertEqual(self.calls[-1][1], {'bucket': 'meu-bucket', 'prefix': 'Logs/2024/'})
+
+    def test_command_must_start_message(self):
+        """Testar que palavras-chave no meio da mensagem não disparam comandos"""
+        with self.assertRaises(CommandError):
+            self.router.dispatch('quero ver os custos', None)
+        with self.assertRaises(CommandError):
+            self.router.dispatch('custosx', None)
+
+    def test_usage_errors(self):
+        """Testar erros de uso com mensagens para o usuário"""
+        cases = {
+            's3 arquivos': 'especifique bucket',
+            's3 arquivos a b c': 'Argumentos demais',
+            'custos top abc': 'Valor inválido',
+            'custos top --dias': 'precisa de um valor',
+            'custos --fresh': 'Opção desconhecida'
+        }
+        for message, expected in cases.items():
+            with self.assertRaises(CommandError) as context:
+                self.router.dispatch(message, None)
+            self.assertIn(expected, str(context.exception), message)
+
+    def test_duplicate_phrase_rejected(self):
+        """Testar que frases duplicadas são rejeitadas no registro"""
+        with self.assertRaises(ValueError):
+            self.router.command('custos')(lambda services: None)
+
+    def test_help_generated_from_registry(self):
+        """Testar texto de ajuda gerado a partir dos comandos"""
+        help_text = self.router.help_text()
+        self.assertIn('`custos top [n]` - Maiores serviços', help_text)
+        self.assertIn('`--dias DIAS`', help_text)
+        self.assertIn('`s3 arquivos bucket [prefix]`', help_text)
+
+    def test_many_commands(self):
+        """Testar despacho correto com dezenas de comandos registrados"""
+        router = CommandRouter()
+        for index in range(60):
+            router.command(f'servico{index} listar')(lambda services, index=index: index)
+
+        self.assertEqual(router.dispatch('servico42 listar', None), 42)
+        self.assertEqual(router.dispatch('servico4 listar', None), 4)
+
+class TestDefaultCommands(unittest.TestCase):
+
+    def test_aliases_route_to_same_handler(self):
+        """Testar aliases com e sem acento"""
+        services = MagicMock()
+        default_router.dispatch('ec2 instâncias', services)
+        default_router.dispatch('ec2 instancias --fresh', services)
+
+        self.assertEqual(services.list_ec2_instances.call_count, 2)
+        self.assertTrue(services.list_ec2_instances.call_args.kwargs['fresh'])
+
+    def test_ec2_listing_arguments(self):
+        """Testar filtros, ordem e paginação de ec2 instancias"""
+        services = MagicMock()
+        default_router.dispatch('ec2 instancias running --tipo T3 --tag env=prod --ordem recentes --pagina 2', services)
+
+        kwargs = services.list_ec2_instances.call_args.kwargs
+        self.assertEqual(kwargs['filters'], InstanceFilter('running', 't3', 'env=prod', ''))
+        self.assertEqual((kwargs['order'], kwargs['page'], kwargs['size'], kwargs['cursor']),
+                         ('recentes', 2, LISTING_PAGE_SIZE, None))
+        with self.assertRaises(CommandError):
+            default_router.dispatch('ec2 instancias ligada', services)
+        with self.assertRaises(CommandError):
+            default_router.dispatch('s3 buckets --ordem tamanho', services)
+
+    def test_s3_objects_arguments(self):
+        """Testar argumentos do comando s3 arquivos"""
+        services = MagicMock()
+        default_router.dispatch('s3 arquivos meu-bucket Logs/ --parallel', services)
+
+        services.count_s3_objects.assert_called_once_with('meu-bucket', prefix='Logs/', parallel=True, progress=None)
+
+if __name__ == '__main__':
+    unittest.main()
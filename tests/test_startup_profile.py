@@ -0,0 +1,43 @@
+import unittest
+import subprocess
+import sys
+import os
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from startup_profile import ROOT, format_report, init_profile, parse_importtime
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:      1500 |       1500 |       botocore.exceptions
+import time:       500 |       2000 |     botocore
+import time:       250 |        250 |   metrics
+import time:      3000 |       5250 | app
+"""
+
+class TestStartupProfile(unittest.TestCase):
+
+    def test_parse_importtime(self):
+        """Testar tempo próprio somado por pacote de primeiro nível"""
+        self.assertEqual(parse_importtime(IMPORTTIME), {'app': 3.0, 'botocore': 2.0, 'metrics': 0.25})
+
+    def test_import_app_defers_sdk(self):
+        """Testar que importar o app não carrega boto3 nem NumPy"""
+        result = subprocess.run(
+            [sys.executable, '-c', "import sys, app; print(sorted({'boto3', 'numpy'} & set(sys.modules)))"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_init_phases(self):
+        """Testar etapas da inicialização em um processo novo"""
+        phases = init_profile()
+
+        self.assertEqual([phase['phase'] for phase in phases],
+                         ['import app', 'GET /ready', 'GET /', 'cliente s3', 'cliente ec2', 'cliente ce'])
+        self.assertTrue(all(phase['error'] is None for phase in phases))
+        report = format_report({'import_ms': 100.0, 'imports': {'flask': 40.0}, 'phases': phases})
+        self.assertIn('cliente ec2', report)
+
+if __name__ == '__main__':
+    unittest.main()